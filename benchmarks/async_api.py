@@ -0,0 +1,167 @@
+"""
+Compare task API throughput at high concurrency between WSGI, ASGI with the
+sync DRF views, and ASGI with the async views (TASK_API_ASYNC).
+
+    python benchmarks/async_api.py --concurrency 64 --requests 4000
+
+Every profile runs in its own process on a fresh file-backed SQLite
+database seeded by ``generate_dataset``. WSGI requests are issued from a
+thread pool the size of ``--concurrency``, like a threaded WSGI server;
+ASGI requests are ``--concurrency`` coroutines on one event loop. The mix
+is list pages, task details and task reports of random users.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import BASE_DIR, percentile, setup_django
+
+PROFILES = {
+    "wsgi": {"TASK_API_ASYNC": "false"},
+    "asgi, sync views": {"TASK_API_ASYNC": "false"},
+    "asgi, async views": {"TASK_API_ASYNC": "true"},
+}
+
+
+def build_requests(count, seed):
+    """``count`` ``(path, token)`` pairs over the seeded users and tasks."""
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from tm_app.models import CustomUser, Task
+
+    rng = random.Random(seed)
+    users = list(
+        CustomUser.objects.filter(user_type=CustomUser.UserType.USER).exclude(
+            tasks=None
+        )
+    )
+    tokens = {user.pk: f"Bearer {AccessToken.for_user(user)}" for user in users}
+    tasks = list(Task.objects.values_list("pk", "assigned_to_id"))
+    requests = []
+    for _ in range(count):
+        task_id, user_id = rng.choice(tasks)
+        path = rng.choice(
+            (
+                "/api/tasks/?page_size=50",
+                f"/api/tasks/{task_id}/",
+                f"/api/tasks/{task_id}/report/",
+            )
+        )
+        requests.append((path, tokens[user_id]))
+    return requests
+
+
+def run_wsgi(requests, concurrency):
+    from django.test import Client
+
+    local = threading.local()
+
+    def issue(item):
+        path, token = item
+        if not hasattr(local, "client"):
+            local.client = Client()
+        start = time.perf_counter()
+        response = local.client.get(path, HTTP_AUTHORIZATION=token)
+        return response.status_code, (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(issue, requests))
+
+
+async def run_asgi(requests, concurrency):
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def issue(item):
+        path, token = item
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path, headers={"Authorization": token})
+            return response.status_code, (time.perf_counter() - start) * 1000
+
+    return await asyncio.gather(*(issue(item) for item in requests))
+
+
+def worker(args, profile):
+    """Seed a fresh database, replay the request mix; print JSON results."""
+    setup_django()
+    from django.core.management import call_command
+    from django.db import connections
+    from django.test.utils import setup_test_environment
+
+    from tm_app.dataset import generate_dataset
+
+    setup_test_environment()
+    call_command("migrate", verbosity=0)
+    generate_dataset(args.admins, args.users, args.tasks, seed=0, prefix="bench")
+    requests = build_requests(args.requests, seed=1)
+    connections.close_all()
+
+    start = time.perf_counter()
+    if profile == "wsgi":
+        results = run_wsgi(requests, args.concurrency)
+    else:
+        results = asyncio.run(run_asgi(requests, args.concurrency))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for _, latency in results]
+    print(
+        json.dumps(
+            {
+                "rps": len(results) / elapsed,
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "errors": sum(status >= 500 for status, _ in results),
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--admins", type=int, default=5)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.profile:
+        return worker(args, args.profile)
+
+    print(f"{'profile':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'5xx':>6}")
+    for name, overrides in PROFILES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                **os.environ,
+                **overrides,
+                "SQLITE_PATH": os.path.join(directory, "bench.sqlite3"),
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, "--profile", name, *sys.argv[1:]],
+                env=env,
+                cwd=BASE_DIR / "benchmarks",
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:<20}{result['rps']:>10.1f}{result['p50']:>10.1f}"
+            f"{result['p95']:>10.1f}{result['errors']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
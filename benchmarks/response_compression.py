@@ -0,0 +1,95 @@
+"""
+Measure bytes saved and CPU time per codec on real task API and report
+export responses.
+
+    python benchmarks/response_compression.py --tasks 5000
+"""
+
+import argparse
+import datetime
+import random
+
+from common import create_test_database, setup_django, timed
+from task_search import sentence
+
+
+def seed(tasks, users, rng):
+    from django.db import transaction
+
+    from tm_app.models import CustomUser, Task
+
+    owners = CustomUser.objects.bulk_create(
+        CustomUser(username=f"bench_user_{i}", password="!", user_type=3)
+        for i in range(users)
+    )
+    start = datetime.date(2020, 1, 1)
+    rows = []
+    for _ in range(tasks):
+        done = rng.random() < 0.5
+        rows.append(
+            Task(
+                title=sentence(rng, 2, 6),
+                description=sentence(rng, 10, 80),
+                assigned_to=rng.choice(owners),
+                due_date=start + datetime.timedelta(days=rng.randint(0, 2000)),
+                status="completed" if done else "pending",
+                completion_report=sentence(rng, 5, 40) if done else None,
+                worked_hours=rng.randint(1, 4000) / 100 if done else None,
+            )
+        )
+    with transaction.atomic():
+        Task.objects.bulk_create(rows, batch_size=1000)
+    return owners[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+    from rest_framework.test import APIClient
+
+    from tm_app.compression import CODECS
+    from tm_app.models import CustomUser
+
+    teardown = create_test_database()
+    try:
+        owner = seed(args.tasks, args.users, random.Random(args.seed))
+        api = APIClient()
+        api.force_authenticate(owner)
+        html = Client()
+        html.force_login(CustomUser.objects.create_superuser("bench_admin", "!"))
+
+        # Identity bodies, fetched without Accept-Encoding.
+        payloads = {
+            "task list, 100 rows": api.get("/api/tasks/").content,
+            "task list, 1000 rows": api.get("/api/tasks/?page_size=1000").content,
+            "task list, 1000 rows, ?fields=id,title,status": api.get(
+                "/api/tasks/?page_size=1000&fields=id,title,status"
+            ).content,
+            "report HTML page": html.get("/task-report/").content,
+            "report CSV export": b"".join(
+                html.get("/task-report/export/?format=csv").streaming_content
+            ),
+        }
+        codecs = [codec for codec in CODECS.values() if codec.available()]
+        for name, body in payloads.items():
+            print(f"\n=== {name}: {len(body):,} bytes ===")
+            for codec in codecs:
+                size = len(codec.compress(body))
+                elapsed = timed(lambda: codec.compress(body), args.repeat)
+                print(
+                    f"{codec.name:>8}: {size:>10,} bytes "
+                    f"({100 * (1 - size / len(body)):.1f}% saved), {elapsed:.2f} ms"
+                )
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Drive the main routes in-process against a generated dataset and report
+latency percentiles, throughput and SQL queries per request; save the
+results as a JSON baseline and compare later runs against it.
+
+    python benchmarks/routes.py --tasks 100000 --save baseline.json
+    python benchmarks/routes.py --tasks 100000 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import platform
+import sys
+import time
+
+from common import create_test_database, percentile, setup_django
+
+
+class QueryCounter:
+    """Counts SQL on every connection, whichever thread runs the view."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        for connection in connections.all():
+            connection.execute_wrappers.append(self)
+        connection_created.connect(self.connected, weak=False)
+
+    def connected(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self)
+
+
+def build_routes(user, password, report_pk):
+    """
+    ``name -> (method, path, data)``. Clients send the busiest user's JWT
+    and carry a SuperAdmin session, so API routes act as the user and the
+    HTML pages as the SuperAdmin.
+    """
+    return {
+        "api_login": (
+            "post",
+            "/api/login/",
+            {"username": user.username, "password": password},
+        ),
+        "api_tasks": ("get", "/api/tasks/", None),
+        "api_task_report": ("get", f"/api/tasks/{report_pk}/report/", None),
+        "all_tasks": ("get", "/all-tasks/", None),
+        "task_report": ("get", "/task-report/", None),
+        "manage_users": ("get", "/manage-users/", None),
+    }
+
+
+def summarize(samples, queries, elapsed):
+    return {
+        "requests": len(samples),
+        "p50_ms": round(percentile(samples, 0.50), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "queries": max(queries),
+    }
+
+
+def run_wsgi(routes, superadmin, token, counter, requests, warmup):
+    from django.test import Client
+
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+    client.force_login(superadmin)
+    results = {}
+    for name, (method, path, data) in routes.items():
+        request = getattr(client, method)
+        for _ in range(warmup):
+            check(name, request(path, data))
+        samples, queries = [], []
+        started = time.perf_counter()
+        for _ in range(requests):
+            before = counter.count
+            start = time.perf_counter()
+            response = request(path, data)
+            samples.append((time.perf_counter() - start) * 1000)
+            queries.append(counter.count - before)
+            check(name, response)
+        results[name] = summarize(samples, queries, time.perf_counter() - started)
+    return results
+
+
+async def run_asgi(routes, superadmin, token, counter, requests, warmup):
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    await client.aforce_login(superadmin)
+    results = {}
+    for name, (method, path, data) in routes.items():
+        request = functools.partial(
+            getattr(client, method), headers={"Authorization": f"Bearer {token}"}
+        )
+        for _ in range(warmup):
+            check(name, await request(path, data))
+        samples, queries = [], []
+        started = time.perf_counter()
+        for _ in range(requests):
+            before = counter.count
+            start = time.perf_counter()
+            response = await request(path, data)
+            samples.append((time.perf_counter() - start) * 1000)
+            queries.append(counter.count - before)
+            check(name, response)
+        results[name] = summarize(samples, queries, time.perf_counter() - started)
+    return results
+
+
+def check(name, response):
+    if response.status_code != 200:
+        raise SystemExit(f"{name}: HTTP {response.status_code}, not benchmarking it.")
+
+
+def print_results(results, baseline=None, tolerance=0.0):
+    """Print a table; with ``baseline``, return the names that regressed."""
+    regressed = []
+    print(
+        f"{'route':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'req/s':>10}{'queries':>9}"
+    )
+    for name, row in results.items():
+        line = (
+            f"{name:<18}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+            f"{row['p99_ms']:>10.2f}{row['throughput_rps']:>10.1f}{row['queries']:>9}"
+        )
+        base = (baseline or {}).get(name)
+        if base:
+            change = row["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+            extra_queries = row["queries"] - base["queries"]
+            line += f"   p95 {change:+.0%}, queries {extra_queries:+d}"
+            if change > tolerance or extra_queries > 0:
+                regressed.append(name)
+                line += "  REGRESSED"
+        print(line)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--admins", type=int, default=10)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=50, help="Per route.")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--client", choices=["wsgi", "asgi"], default="wsgi")
+    parser.add_argument("--routes", help="Comma-separated subset of routes to run.")
+    parser.add_argument("--save", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed p95 slowdown against the baseline (0.25 = 25%%).",
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    import django
+    from django.db.models import Count
+
+    from tm_app.dataset import generate_dataset
+    from tm_app.models import CustomUser, Task
+    from tm_app.provisioning import DEFAULT_PASSWORD
+
+    teardown = create_test_database()
+    try:
+        print(f"Generating {args.tasks} tasks for {args.users} users ...")
+        generate_dataset(
+            args.admins, args.users, args.tasks, seed=args.seed, prefix="bench"
+        )
+        superadmin = CustomUser.objects.create_superuser(
+            "bench_superadmin", DEFAULT_PASSWORD
+        )
+        # The busiest user, so the API routes see the skewed worst case.
+        user = (
+            CustomUser.objects.filter(user_type=CustomUser.UserType.USER)
+            .annotate(task_count=Count("tasks"))
+            .order_by("-task_count")
+            .first()
+        )
+        report = Task.objects.filter(
+            assigned_to=user, status=Task.Status.COMPLETED
+        ).first()
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        token = str(RefreshToken.for_user(user).access_token)
+        routes = build_routes(user, DEFAULT_PASSWORD, report.pk if report else 0)
+        if args.routes:
+            wanted = args.routes.split(",")
+            routes = {name: routes[name] for name in wanted if name in routes}
+
+        counter = QueryCounter()
+        counter.install()
+        runner_args = (routes, superadmin, token, counter, args.requests, args.warmup)
+        if args.client == "asgi":
+            results = asyncio.run(run_asgi(*runner_args))
+        else:
+            results = run_wsgi(*runner_args)
+    finally:
+        teardown()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as stream:
+            baseline = json.load(stream)["routes"]
+    regressed = print_results(results, baseline, args.tolerance)
+
+    if args.save:
+        meta = {
+            key: getattr(args, key)
+            for key in ("admins", "users", "tasks", "seed", "requests", "client")
+        }
+        meta.update(python=platform.python_version(), django=django.get_version())
+        with open(args.save, "w") as stream:
+            json.dump({"meta": meta, "routes": results}, stream, indent=2)
+        print(f"Saved to {args.save}")
+    if regressed:
+        sys.exit(f"Regressed against {args.compare}: {', '.join(regressed)}")
+
+
+if __name__ == "__main__":
+    main()
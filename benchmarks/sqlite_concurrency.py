@@ -0,0 +1,147 @@
+"""
+Compare concurrent task update and read throughput on a file-backed SQLite
+database between Django's stock settings and the tuned SQLITE_* defaults.
+
+    python benchmarks/sqlite_concurrency.py --writers 4 --readers 8 --seconds 10
+
+Every profile runs in its own process with the matching environment, so
+each one goes through the real settings module.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import BASE_DIR, setup_django
+
+PROFILES = {
+    # What Django does out of the box.
+    "stock": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_CACHE_SIZE": "-2000",
+        "SQLITE_MMAP_SIZE": "0",
+        "SQLITE_BUSY_TIMEOUT": "5",
+        "SQLITE_TRANSACTION_MODE": "DEFERRED",
+        "DB_CONN_MAX_AGE": "0",
+    },
+    "wal only": {"SQLITE_TRANSACTION_MODE": "DEFERRED"},
+    # The project defaults.
+    "tuned": {},
+}
+
+
+def worker(args):
+    """Seed a fresh database, then hammer it from threads; print JSON counts."""
+    setup_django()
+    from django.core.management import call_command
+    from django.db import (
+        OperationalError,
+        close_old_connections,
+        connections,
+        transaction,
+    )
+
+    from tm_app.dataset import generate_dataset
+    from tm_app.models import Task
+
+    call_command("migrate", verbosity=0)
+    _, users, _ = generate_dataset(2, 50, args.tasks, seed=0, prefix="bench")
+    user_ids = [user.pk for user in users]
+    task_ids = list(Task.objects.values_list("pk", flat=True))
+    connections.close_all()
+
+    deadline = time.perf_counter() + args.seconds
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def write(index):
+        step = 0
+        while time.perf_counter() < deadline:
+            step += 1
+            pk = task_ids[(index * 7919 + step * 104729) % len(task_ids)]
+            try:
+                with transaction.atomic():
+                    task = Task.objects.get(pk=pk)
+                    task.status = (
+                        "in_progress" if task.status == "pending" else "pending"
+                    )
+                    task.save()
+                bump("writes")
+            except OperationalError:
+                bump("locked")
+            # As in a request/response cycle.
+            close_old_connections()
+        connections.close_all()
+
+    def read(index):
+        step = 0
+        while time.perf_counter() < deadline:
+            step += 1
+            user_id = user_ids[(index + step) % len(user_ids)]
+            try:
+                list(
+                    Task.objects.filter(assigned_to_id=user_id)
+                    .order_by("due_date", "id")
+                    .values("id", "title", "status", "due_date")[:100]
+                )
+                bump("reads")
+            except OperationalError:
+                bump("locked")
+            close_old_connections()
+        connections.close_all()
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=read, args=(i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps(counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return worker(args)
+
+    print(f"{'profile':<10}{'writes/s':>10}{'reads/s':>10}{'locked errors':>15}")
+    for name, overrides in PROFILES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                **os.environ,
+                **overrides,
+                "SQLITE_PATH": os.path.join(directory, "bench.sqlite3"),
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, "--worker", *sys.argv[1:]],
+                env=env,
+                cwd=BASE_DIR / "benchmarks",
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        counts = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:<10}{counts['writes'] / args.seconds:>10.1f}"
+            f"{counts['reads'] / args.seconds:>10.1f}{counts['locked']:>15}"
+        )
+
+
+if __name__ == "__main__":
+    main()
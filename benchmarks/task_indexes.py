@@ -0,0 +1,151 @@
+"""
+Compare query plans and timings for the hot ``Task`` queries with and without
+the composite indexes declared on ``Task.Meta.indexes``.
+
+    python benchmarks/task_indexes.py --tasks 1000000
+"""
+
+import argparse
+import datetime
+import random
+
+from common import create_test_database, setup_django, timed
+
+
+def seed(tasks, users, admins, rng):
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from tm_app.models import CustomUser, Task
+
+    admin_objs = CustomUser.objects.bulk_create(
+        CustomUser(
+            username=f"bench_admin_{i}",
+            password="!",
+            user_type=CustomUser.UserType.ADMIN,
+        )
+        for i in range(admins)
+    )
+    user_objs = CustomUser.objects.bulk_create(
+        CustomUser(
+            username=f"bench_user_{i}",
+            password="!",
+            user_type=CustomUser.UserType.USER,
+            assigned_admin=admin_objs[i % admins],
+        )
+        for i in range(users)
+    )
+    user_ids = [user.pk for user in user_objs]
+
+    statuses = [choice for choice, _ in Task.Status.choices]
+    weights = [3, 2, 5]
+    start = datetime.date(2020, 1, 1)
+    now = timezone.now()
+    # Raw SQL skips the model defaults, so name every NOT NULL column.
+    sql = (
+        f"INSERT INTO {Task._meta.db_table} "
+        "(title, description, assigned_to_id, due_date, status, "
+        "completion_report, worked_hours, updated_at, version) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+    )
+    batch = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(tasks):
+            status = rng.choices(statuses, weights)[0]
+            done = status == Task.Status.COMPLETED
+            batch.append(
+                (
+                    f"Task {i}",
+                    "Lorem ipsum dolor sit amet " * rng.randint(1, 8),
+                    # Skew ownership so a few users hold most of the history.
+                    user_ids[min(int(rng.paretovariate(1.2)) - 1, users - 1)],
+                    start + datetime.timedelta(days=rng.randint(0, 2000)),
+                    status,
+                    "Done." * rng.randint(1, 20) if done else None,
+                    round(rng.uniform(0.5, 40), 2) if done else None,
+                    now,
+                    0,
+                )
+            )
+            if len(batch) == 10000:
+                cursor.executemany(sql, batch)
+                batch.clear()
+        if batch:
+            cursor.executemany(sql, batch)
+    return admin_objs[0], user_objs[0]
+
+
+def queries(admin, user):
+    from tm_app.models import CustomUser, Task
+
+    managed_users = CustomUser.objects.filter(assigned_admin=admin)
+    return {
+        "user task page": Task.objects.filter(assigned_to=user).order_by(
+            "due_date", "id"
+        )[:100],
+        "user completed tasks": Task.objects.filter(
+            assigned_to=user, status=Task.Status.COMPLETED
+        ).order_by("due_date")[:100],
+        "admin task report": Task.objects.filter(
+            status=Task.Status.COMPLETED, assigned_to__in=managed_users
+        ).order_by("due_date")[:100],
+        "completed by due date": Task.objects.filter(
+            status=Task.Status.COMPLETED
+        ).order_by("due_date")[:100],
+        "overdue count": Task.objects.filter(
+            due_date__lt=datetime.date(2022, 1, 1)
+        ).exclude(status=Task.Status.COMPLETED),
+    }
+
+
+def run(label, admin, user, repeat):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    print(f"\n=== {label} ===")
+    for name, queryset in queries(admin, user).items():
+        if name == "overdue count":
+            elapsed = timed(queryset.count, repeat)
+        else:
+            elapsed = timed(lambda: list(queryset.all()), repeat)
+        print(f"\n{name}: {elapsed:.2f} ms")
+        for line in queryset.explain().splitlines():
+            print(f"    {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--admins", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    from tm_app.models import Task
+
+    teardown = create_test_database()
+    try:
+        print(f"Seeding {args.tasks} tasks for {args.users} users ...")
+        admin, user = seed(args.tasks, args.users, args.admins, random.Random(args.seed))
+
+        with connection.schema_editor() as editor:
+            for index in Task._meta.indexes:
+                editor.remove_index(Task, index)
+        run("without composite indexes", admin, user, args.repeat)
+
+        with connection.schema_editor() as editor:
+            for index in Task._meta.indexes:
+                editor.add_index(Task, index)
+        run("with composite indexes", admin, user, args.repeat)
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Time ranked full-text task searches against the FTS5 index and the portable
+icontains fallback.
+
+    python benchmarks/task_search.py --tasks 1000000
+"""
+
+import argparse
+import datetime
+import itertools
+import random
+
+from common import create_test_database, setup_django, timed
+
+STOPWORDS = "the a to and of in for on with is".split()
+WORDS = (
+    "database backup migration invoice report client server deploy review "
+    "budget meeting release audit design bug feature security onboarding "
+    "payroll inventory forecast schedule training vendor contract support "
+    "network storage analytics dashboard upgrade testing compliance"
+).split()
+SYLLABLES = "ka lo mi ne ru sa te vo xi za pe do".split()
+# Stopwords, then made-up words with the real ones spread through them,
+# drawn with Zipf weights so a few words are very common and most are rare.
+VOCABULARY = STOPWORDS + [
+    a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES
+]
+for position, word in enumerate(WORDS):
+    VOCABULARY.insert(len(STOPWORDS) + 20 + position * 50, word)
+CUM_WEIGHTS = list(
+    itertools.accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1))
+)
+
+
+def sentence(rng, low, high):
+    words = rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=rng.randint(low, high))
+    return " ".join(words)
+
+
+def seed(tasks, users, rng):
+    from django.db import connection, transaction
+
+    from tm_app.models import CustomUser, Task
+
+    user_ids = [
+        user.pk
+        for user in CustomUser.objects.bulk_create(
+            CustomUser(username=f"bench_user_{i}", password="!") for i in range(users)
+        )
+    ]
+    sql = (
+        f"INSERT INTO {Task._meta.db_table} "
+        "(title, description, assigned_to_id, due_date, status, completion_report, "
+        "updated_at, version) VALUES (%s, %s, %s, %s, %s, %s, %s, 1)"
+    )
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    start = datetime.date(2020, 1, 1)
+    batch = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for _ in range(tasks):
+            done = rng.random() < 0.5
+            batch.append(
+                (
+                    sentence(rng, 2, 5),
+                    sentence(rng, 10, 40),
+                    rng.choice(user_ids),
+                    start + datetime.timedelta(days=rng.randint(0, 2000)),
+                    "completed" if done else "pending",
+                    sentence(rng, 5, 20) if done else None,
+                    now,
+                )
+            )
+            if len(batch) == 10000:
+                cursor.executemany(sql, batch)
+                batch.clear()
+        if batch:
+            cursor.executemany(sql, batch)
+    return user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django()
+    from tm_app.models import Task
+    from tm_app.search import RANK_ORDERING, SimpleSearchBackend, SQLiteFTSBackend
+
+    teardown = create_test_database()
+    try:
+        print(f"Seeding {args.tasks} tasks (the triggers index them as they go) ...")
+        user_ids = seed(args.tasks, args.users, random.Random(args.seed))
+        scoped = Task.objects.filter(assigned_to__in=user_ids[:100])
+        searches = {
+            "two words, everyone": (Task.objects.all(), "invoice payroll"),
+            "common word, everyone": (Task.objects.all(), "database"),
+            "rare word, everyone": (Task.objects.all(), "compliance"),
+            "prefix, everyone": (Task.objects.all(), "migr"),
+            "common word, 100 users": (scoped, "database"),
+        }
+        for backend in (SQLiteFTSBackend(), SimpleSearchBackend()):
+            print(f"\n=== {type(backend).__name__} ===")
+            for name, (queryset, query) in searches.items():
+                page = backend.search(queryset, query).order_by(*RANK_ORDERING)
+                page = page[: args.page_size]
+                elapsed = timed(lambda: list(page.all()), args.repeat)
+                print(f"{name} ({query!r}): {elapsed:.2f} ms")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Time rendering task list pages through TaskSerializer and the stock JSON
+renderer against the .values() fast path, orjson and sparse fieldsets.
+
+    python benchmarks/task_serialization.py --page-size 1000
+"""
+
+import argparse
+import datetime
+import decimal
+import random
+
+from common import create_test_database, setup_django, timed
+
+
+def seed(tasks, rng):
+    from django.db import transaction
+
+    from tm_app.models import CustomUser, Task
+
+    user = CustomUser.objects.create(username="bench_user", password="!")
+    start = datetime.date(2020, 1, 1)
+    rows = []
+    for i in range(tasks):
+        done = rng.random() < 0.5
+        rows.append(
+            Task(
+                title=f"Task {i}",
+                description="Lorem ipsum dolor sit amet. " * rng.randint(2, 40),
+                assigned_to=user,
+                due_date=start + datetime.timedelta(days=rng.randint(0, 2000)),
+                status="completed" if done else "pending",
+                completion_report="Done and dusted. " * 20 if done else None,
+                worked_hours=decimal.Decimal(rng.randint(1, 4000)) / 100
+                if done
+                else None,
+            )
+        )
+    with transaction.atomic():
+        Task.objects.bulk_create(rows, batch_size=1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+
+    from tm_app.models import Task
+    from tm_app.renderers import ORJSONRenderer, orjson
+    from tm_app.serializers import TaskSerializer, TaskValuesSerializer
+
+    teardown = create_test_database()
+    try:
+        seed(args.page_size, random.Random(args.seed))
+        tasks = Task.objects.order_by("due_date", "id")
+        lean = ("id", "title", "status", "due_date")
+
+        def values(fields=None):
+            serializer = TaskValuesSerializer(fields)
+            return serializer.serialize(serializer.values(tasks))
+
+        renderers = [JSONRenderer()] + ([ORJSONRenderer()] if orjson else [])
+        for renderer in renderers:
+            print(f"\n=== {type(renderer).__name__} ===")
+            cases = {
+                "TaskSerializer": lambda: TaskSerializer(tasks.all(), many=True).data,
+                "values fast path": values,
+                "values, ?fields=" + ",".join(lean): lambda: values(lean),
+            }
+            for name, build in cases.items():
+                elapsed = timed(lambda: renderer.render(build()), args.repeat)
+                print(f"{name} ({args.page_size} tasks): {elapsed:.2f} ms")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 from environs import Env
 from datetime import timedelta
@@ -46,12 +47,113 @@ INSTALLED_APPS = [
     'tm_app',
 ]
 
+# Cache the user record behind JWT-authenticated requests instead of
+# loading it on every call (opt-in)
+JWT_USER_CACHE = env.bool("JWT_USER_CACHE", default=False)
+JWT_USER_CACHE_TTL = env.int("JWT_USER_CACHE_TTL", default=30)
+JWT_USER_CACHE_ALIAS = env.str("JWT_USER_CACHE_ALIAS", default="default")
+
+# Render API responses with orjson; on by default when it is installed
+API_ORJSON_RENDERER = env.bool(
+    "API_ORJSON_RENDERER", default=find_spec("orjson") is not None
+)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'tm_app.authentication.CachedJWTAuthentication'
+        if JWT_USER_CACHE
+        else 'tm_app.authentication.AsyncJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'tm_app.renderers.ORJSONRenderer'
+        if API_ORJSON_RENDERER
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+# Responses of at least this many bytes are compressed with the first of
+# these encodings the client accepts (zstd/br need zstandard/brotli installed)
+RESPONSE_COMPRESSION_MIN_SIZE = env.int("RESPONSE_COMPRESSION_MIN_SIZE", default=512)
+RESPONSE_COMPRESSION_ENCODINGS = env.list(
+    "RESPONSE_COMPRESSION_ENCODINGS", default=["zstd", "br", "gzip", "deflate"]
+)
+
+# Per-route query counts, timings and sizes, exposed at /metrics/ for
+# SuperAdmins or with "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_ENABLED = env.bool("METRICS_ENABLED", default=False)
+METRICS_TOKEN = env.str("METRICS_TOKEN", default="")
+# Requests slower than this are logged with their SQL (0 turns it off)
+METRICS_SLOW_REQUEST_MS = env.int("METRICS_SLOW_REQUEST_MS", default=1000)
+METRICS_SLOW_REQUEST_MAX_QUERIES = env.int(
+    "METRICS_SLOW_REQUEST_MAX_QUERIES", default=100
+)
+
+# Keyset pagination for the task API
+TASK_API_PAGE_SIZE = env.int("TASK_API_PAGE_SIZE", default=100)
+TASK_API_MAX_PAGE_SIZE = env.int("TASK_API_MAX_PAGE_SIZE", default=1000)
+TASK_BULK_MAX_ITEMS = env.int("TASK_BULK_MAX_ITEMS", default=1000)
+# Days delete markers are kept for delta sync; older cursors must resync
+TASK_TOMBSTONE_RETENTION_DAYS = env.int("TASK_TOMBSTONE_RETENTION_DAYS", default=30)
+# Serve task list/detail/report with async views (worth it under ASGI only)
+TASK_API_ASYNC = env.bool("TASK_API_ASYNC", default=False)
+
+# Server-sent task change feed (ASGI only). The default broker only reaches
+# listeners in the same process; point this at a shared broker to scale out.
+TASK_EVENT_BROKER = env.str("TASK_EVENT_BROKER", default="tm_app.events.InMemoryBroker")
+TASK_EVENT_HEARTBEAT = env.int("TASK_EVENT_HEARTBEAT", default=15)
+TASK_EVENT_QUEUE_SIZE = env.int("TASK_EVENT_QUEUE_SIZE", default=1000)
+
+# Dotted path of a tm_app.search.BaseSearchBackend; empty picks FTS5 on SQLite
+# and a portable icontains fallback elsewhere
+TASK_SEARCH_BACKEND = env.str("TASK_SEARCH_BACKEND", default="")
+
+# Completed tasks untouched for this many days are moved to the archive table
+# by the archive_tasks command
+TASK_ARCHIVE_AFTER_DAYS = env.int("TASK_ARCHIVE_AFTER_DAYS", default=365)
+TASK_ARCHIVE_BATCH_SIZE = env.int("TASK_ARCHIVE_BATCH_SIZE", default=1000)
+# zlib-compress archived completion reports of at least this many characters
+TASK_ARCHIVE_COMPRESS = env.bool("TASK_ARCHIVE_COMPRESS", default=False)
+TASK_ARCHIVE_COMPRESS_MIN_LENGTH = env.int(
+    "TASK_ARCHIVE_COMPRESS_MIN_LENGTH", default=512
+)
+
+# Users and admins are deleted in chunks of this many rows per transaction,
+# as a background job unless turned off
+USER_DELETION_CHUNK_SIZE = env.int("USER_DELETION_CHUNK_SIZE", default=1000)
+USER_DELETION_IN_BACKGROUND = env.bool("USER_DELETION_IN_BACKGROUND", default=True)
+
+# Background jobs, run by `python manage.py run_jobs`. JOBS_RUN_INLINE runs
+# them in the requesting process right after commit instead (no worker needed)
+JOBS_RUN_INLINE = env.bool("JOBS_RUN_INLINE", default=False)
+JOB_MAX_ATTEMPTS = env.int("JOB_MAX_ATTEMPTS", default=3)
+# Seconds before the first retry of a failed job, doubled for each later one
+JOB_RETRY_DELAY = env.int("JOB_RETRY_DELAY", default=30)
+# Seconds a worker waits before checking an empty queue again
+JOB_POLL_INTERVAL = env.float("JOB_POLL_INTERVAL", default=1.0)
+# Running jobs whose worker has not checked in for this many seconds are
+# requeued (or failed, once out of attempts)
+JOB_LOCK_TIMEOUT = env.int("JOB_LOCK_TIMEOUT", default=300)
+# Files jobs produce, such as report exports
+JOB_RESULTS_ROOT = env.path("JOB_RESULTS_ROOT", default=BASE_DIR / "job_results")
+
+# Keyset pagination for the admin HTML list views
+LIST_PAGE_SIZE = env.int("LIST_PAGE_SIZE", default=50)
+LIST_MAX_PAGE_SIZE = env.int("LIST_MAX_PAGE_SIZE", default=500)
+# Users per page in the admin edit form's user picker
+USER_PICKER_PAGE_SIZE = env.int("USER_PICKER_PAGE_SIZE", default=50)
+
+# Rows fetched per database round-trip by the streaming report export
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
+
+# Role scopes (user ids an admin may see); 0 disables caching across requests
+ROLE_SCOPE_CACHE_TIMEOUT = env.int("ROLE_SCOPE_CACHE_TIMEOUT", default=0)
+# Larger scopes are filtered with a subquery instead of an inline id list
+ROLE_SCOPE_INLINE_IDS = env.int("ROLE_SCOPE_INLINE_IDS", default=1000)
+
+# Processes used to hash passwords during bulk user provisioning (0 = all cores)
+USER_PROVISIONING_WORKERS = env.int("USER_PROVISIONING_WORKERS", default=0)
+
 # Simple JWT Settings
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=env.int("JWT_ACCESS_EXPIRY_DAYS", default=1)),
@@ -59,7 +161,10 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'tm_app.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'tm_app.middleware.CompressionMiddleware',
+    'tm_app.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -91,13 +196,62 @@ WSGI_APPLICATION = 'task_management_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuning. WAL lets readers run alongside the writer, and
+# BEGIN IMMEDIATE takes the write lock when a transaction starts, so a busy
+# writer waits up to the timeout instead of failing with "database is
+# locked" when a read lock cannot be upgraded.
+SQLITE_PATH = env.path("SQLITE_PATH", default=BASE_DIR / "db.sqlite3")
+SQLITE_JOURNAL_MODE = env.str("SQLITE_JOURNAL_MODE", default="WAL")
+SQLITE_SYNCHRONOUS = env.str("SQLITE_SYNCHRONOUS", default="NORMAL")
+# Page cache per connection; negative values are KiB
+SQLITE_CACHE_SIZE = env.int("SQLITE_CACHE_SIZE", default=-64000)
+SQLITE_MMAP_SIZE = env.int("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024)
+# Seconds to wait for the write lock
+SQLITE_BUSY_TIMEOUT = env.float("SQLITE_BUSY_TIMEOUT", default=20)
+# DEFERRED, IMMEDIATE or EXCLUSIVE
+SQLITE_TRANSACTION_MODE = env.str("SQLITE_TRANSACTION_MODE", default="IMMEDIATE")
+# Seconds to keep connections open between requests; health checks replace
+# broken ones. Set 0 under ASGI, where connections are not reused safely
+DB_CONN_MAX_AGE = env.int("DB_CONN_MAX_AGE", default=600)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': SQLITE_PATH,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            'transaction_mode': SQLITE_TRANSACTION_MODE,
+            'init_command': ';'.join(
+                [
+                    f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}',
+                    f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}',
+                    f'PRAGMA cache_size={SQLITE_CACHE_SIZE}',
+                    f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+                    'PRAGMA temp_store=MEMORY',
+                ]
+            ),
+        },
     }
 }
 
+# Read replicas: SQLite files kept in step with the primary (by Litestream,
+# LiteFS or, locally, the sync_sqlite_replicas command). Safe requests to
+# read-only views read from them; a client that writes reads from the
+# primary for the next DATABASE_REPLICA_PIN_SECONDS
+SQLITE_REPLICA_PATHS = env.list("SQLITE_REPLICA_PATHS", default=[])
+DATABASE_REPLICA_PIN_SECONDS = env.int("DATABASE_REPLICA_PIN_SECONDS", default=10)
+DATABASE_REPLICAS = []
+for index, path in enumerate(SQLITE_REPLICA_PATHS, start=1):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+DATABASE_ROUTERS = ['tm_app.replicas.ReplicaRouter'] if DATABASE_REPLICAS else []
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
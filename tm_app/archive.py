@@ -0,0 +1,103 @@
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+
+from .deletion import purge_tasks
+from .models import ArchivedTask, Task
+
+
+class ArchiveConflict(Exception):
+    """A task in the batch changed while it was being archived."""
+
+
+def compress_report(report, min_length=None):
+    """
+    Return ``(completion_report, compressed_report)`` for ``report``: short
+    or empty reports stay plain text, longer ones are zlib-compressed.
+    """
+    if min_length is None:
+        min_length = settings.TASK_ARCHIVE_COMPRESS_MIN_LENGTH
+    if not report or len(report) < min_length:
+        return report, None
+    return None, zlib.compress(report.encode(), 6)
+
+
+def archivable_tasks(before):
+    """Completed tasks last written before ``before``."""
+    return Task.objects.filter(status=Task.Status.COMPLETED, updated_at__lt=before)
+
+
+def _archived_copy(task, compress):
+    report, compressed = (
+        compress_report(task.completion_report)
+        if compress
+        else (task.completion_report, None)
+    )
+    return ArchivedTask(
+        id=task.pk,
+        title=task.title,
+        description=task.description,
+        assigned_to_id=task.assigned_to_id,
+        due_date=task.due_date,
+        status=task.status,
+        completion_report=report,
+        compressed_report=compressed,
+        worked_hours=task.worked_hours,
+        updated_at=task.updated_at,
+    )
+
+
+def archive_batch(before, after_id=0, batch_size=None, compress=None):
+    """
+    Move up to ``batch_size`` archivable tasks with ids above ``after_id``
+    into ``ArchivedTask`` in one transaction. Returns ``(moved, last_id)``;
+    ``last_id`` is None once nothing is left.
+
+    Each batch commits on its own, so an interrupted run loses nothing and
+    simply continues where it stopped when started again.
+    """
+    batch_size = batch_size or settings.TASK_ARCHIVE_BATCH_SIZE
+    if compress is None:
+        compress = settings.TASK_ARCHIVE_COMPRESS
+
+    with transaction.atomic():
+        tasks = list(
+            archivable_tasks(before)
+            .filter(pk__gt=after_id)
+            .select_for_update()
+            .order_by("pk")[:batch_size]
+        )
+        if not tasks:
+            return 0, None
+
+        ids = [task.pk for task in tasks]
+        ArchivedTask.objects.bulk_create(
+            [_archived_copy(task, compress) for task in tasks]
+        )
+        if purge_tasks(archivable_tasks(before), tasks) != len(ids):
+            raise ArchiveConflict(
+                f"Tasks changed while archiving ids {ids[0]}-{ids[-1]}."
+            )
+    return len(tasks), ids[-1]
+
+
+def archive_tasks(before, after_id=0, batch_size=None, compress=None, retries=3):
+    """
+    Archive everything archivable, yielding ``(moved, last_id)`` after each
+    committed batch. A batch that hits a concurrent write is retried.
+    """
+    attempts = 0
+    while True:
+        try:
+            moved, last_id = archive_batch(before, after_id, batch_size, compress)
+        except ArchiveConflict:
+            attempts += 1
+            if attempts > retries:
+                raise
+            continue
+        attempts = 0
+        if last_id is None:
+            return
+        after_id = last_id
+        yield moved, last_id
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .authentication import invalidate_cached_user
+from .pagination import encode_cursor, keyset_page
+from .scopes import invalidate_role_scope
+
+CustomUser = get_user_model()
+
+PICKER_ORDERING = ("username",)
+
+
+def parse_ids(values):
+    """Integer ids from form values, silently dropping anything else."""
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def assignment_diff(admin, selected_ids):
+    """
+    ``(add_ids, remove_ids)`` turning the admin's current users into
+    ``selected_ids``, for forms that post the complete selection.
+    """
+    current = set(
+        CustomUser.objects.filter(assigned_admin=admin).values_list("pk", flat=True)
+    )
+    return selected_ids - current, current - selected_ids
+
+
+def reassign_users(admin, add_ids=(), remove_ids=()):
+    """
+    Give ``admin`` the unassigned users in ``add_ids`` and release their
+    users in ``remove_ids``, touching only those rows, in one transaction.
+    Users managed by another admin are left alone. Returns
+    ``(added, removed)`` counts.
+    """
+    add_ids, remove_ids = set(add_ids) - set(remove_ids), set(remove_ids)
+    with transaction.atomic():
+        added = removed = 0
+        if add_ids:
+            added = CustomUser.objects.filter(
+                pk__in=add_ids,
+                user_type=CustomUser.UserType.USER,
+                assigned_admin__isnull=True,
+            ).update(assigned_admin=admin)
+        if remove_ids:
+            removed = CustomUser.objects.filter(
+                pk__in=remove_ids, assigned_admin=admin
+            ).update(assigned_admin=None)
+        if added or removed:
+            # After commit, so no request re-caches the old assignment.
+            transaction.on_commit(lambda: invalidate_role_scope(admin.pk))
+            transaction.on_commit(
+                lambda: invalidate_cached_user(*add_ids, *remove_ids)
+            )
+    return added, removed
+
+
+def release_all_users(admin):
+    """Unassign every user of ``admin``, e.g. when they stop being an admin."""
+    user_ids = list(
+        CustomUser.objects.filter(assigned_admin=admin).values_list("pk", flat=True)
+    )
+    return reassign_users(admin, remove_ids=user_ids)[1]
+
+
+def reassign_users_job(job):
+    """
+    Run the user changes ``AdminUpdateView`` queued for an admin: either
+    ``add``/``remove`` id lists or ``release_all``. Running it again is
+    harmless, since users already moved no longer match.
+    """
+    payload = job.payload
+    admin = CustomUser.objects.filter(pk=payload["admin_id"]).first()
+    if admin is None:
+        return {"added": 0, "removed": 0}
+    if payload.get("release_all"):
+        return {"added": 0, "removed": release_all_users(admin)}
+    added, removed = reassign_users(
+        admin, payload.get("add", ()), payload.get("remove", ())
+    )
+    return {"added": added, "removed": removed}
+
+
+def picker_page(admin, assigned, query="", cursor=None, page_size=50):
+    """
+    One page of users for the admin's user picker: their own users when
+    ``assigned``, otherwise the unassigned ones, optionally narrowed to
+    usernames starting with ``query``. Returns ``(users, next_cursor)``.
+    """
+    users = CustomUser.objects.filter(user_type=CustomUser.UserType.USER)
+    if assigned:
+        users = users.filter(assigned_admin=admin)
+    else:
+        users = users.filter(assigned_admin__isnull=True)
+    if query:
+        users = users.filter(username__startswith=query)
+
+    rows, next_position, _ = keyset_page(
+        users.values("id", "username"), PICKER_ORDERING, cursor, page_size
+    )
+    return rows, encode_cursor(next_position) if next_position else None
@@ -0,0 +1,161 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+CustomUser = get_user_model()
+
+SLIM_USER_FIELDS = ("id", "is_active", "user_type", "assigned_admin_id")
+
+
+def _cache_key(user_id):
+    return f"tm_app:jwt-user:{user_id}"
+
+
+def invalidate_cached_user(*user_ids):
+    keys = [_cache_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        caches[settings.JWT_USER_CACHE_ALIAS].delete_many(keys)
+
+
+def slim_user(record):
+    """
+    Build a ``CustomUser`` with only ``SLIM_USER_FIELDS`` loaded. Any other
+    field is deferred and loaded on first access, and ``save()`` only writes
+    the loaded fields.
+    """
+    field_names = [
+        field.attname
+        for field in CustomUser._meta.concrete_fields
+        if field.attname in SLIM_USER_FIELDS
+    ]
+    return CustomUser.from_db(
+        DEFAULT_DB_ALIAS, field_names, [record[name] for name in field_names]
+    )
+
+
+def _token_user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+
+
+def _active_record(record):
+    if record is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    if api_settings.CHECK_USER_IS_ACTIVE and not record["is_active"]:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    return slim_user(record)
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that async views can ``await``: the token is
+    checked in the event loop and the user is loaded with the async ORM, so
+    authenticating never holds a worker thread.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = _token_user_id(validated_token)
+        try:
+            user = await self.user_model.objects.aget(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return user
+
+
+class CachedJWTAuthentication(AsyncJWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves the token's user from a short-lived
+    cache instead of a SELECT per request. Entries expire after
+    ``JWT_USER_CACHE_TTL`` seconds and are dropped whenever the user is
+    saved or deleted.
+    """
+
+    def can_cache(self):
+        return (
+            not api_settings.CHECK_REVOKE_TOKEN and api_settings.USER_ID_FIELD == "id"
+        )
+
+    def get_user(self, validated_token):
+        if not self.can_cache():
+            return super().get_user(validated_token)
+
+        user_id = _token_user_id(validated_token)
+        cache = caches[settings.JWT_USER_CACHE_ALIAS]
+        record = cache.get(_cache_key(user_id))
+        if record is None:
+            record = (
+                CustomUser.objects.filter(pk=user_id).values(*SLIM_USER_FIELDS).first()
+            )
+            if record is not None:
+                cache.set(_cache_key(user_id), record, settings.JWT_USER_CACHE_TTL)
+        return _active_record(record)
+
+    async def aget_user(self, validated_token):
+        if not self.can_cache():
+            return await super().aget_user(validated_token)
+
+        user_id = _token_user_id(validated_token)
+        cache = caches[settings.JWT_USER_CACHE_ALIAS]
+        record = await cache.aget(_cache_key(user_id))
+        if record is None:
+            record = (
+                await CustomUser.objects.filter(pk=user_id)
+                .values(*SLIM_USER_FIELDS)
+                .afirst()
+            )
+            if record is not None:
+                await cache.aset(
+                    _cache_key(user_id), record, settings.JWT_USER_CACHE_TTL
+                )
+        return _active_record(record)
+
+
+async def aauthenticate(request):
+    """
+    Run ``DEFAULT_AUTHENTICATION_CLASSES`` against a plain ``HttpRequest``
+    from an async view and return ``(user, token)`` or None. Classes with
+    ``aauthenticate`` are awaited; others run in a worker thread. Errors
+    are raised as ``APIException`` like DRF does.
+    """
+    for authentication_class in drf_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        authenticator = authentication_class()
+        if hasattr(authenticator, "aauthenticate"):
+            result = await authenticator.aauthenticate(request)
+        else:
+            result = await sync_to_async(authenticator.authenticate)(Request(request))
+        if result is not None:
+            return result
+    return None
@@ -0,0 +1,210 @@
+import re
+import secrets
+import struct
+import zlib
+
+from django.utils.crypto import get_random_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Codec:
+    """
+    A ``Content-Encoding``. ``compressor()`` returns an object with
+    ``compress(data)`` and ``finish()``, both returning bytes, so a
+    streaming body is compressed as it is produced.
+    """
+
+    name = None
+
+    def available(self):
+        return True
+
+    def compressor(self):
+        raise NotImplementedError
+
+    def compress(self, data):
+        compressor = self.compressor()
+        return compressor.compress(data) + compressor.finish()
+
+
+class _ZlibCompressor:
+    def __init__(self, level, wbits):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+    level = 6
+
+    def compressor(self):
+        return _ZlibCompressor(self.level, 16 + zlib.MAX_WBITS)
+
+
+class _PaddedGzipCompressor:
+    """
+    gzip whose header names a random file of 1 to ``max_random_bytes``
+    characters, as ``GZipMiddleware`` writes it, so the compressed length
+    no longer pins down the body (BREACH).
+    """
+
+    def __init__(self, level, max_random_bytes):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        filename = get_random_string(secrets.randbelow(max_random_bytes) + 1)
+        # Magic, deflate, FNAME flag, no mtime, no extra flags, unknown OS.
+        self._header = b"\x1f\x8b\x08\x08\x00\x00\x00\x00\x00\xff"
+        self._header += filename.encode() + b"\x00"
+        self._crc = 0
+        self._size = 0
+
+    def _take_header(self):
+        header, self._header = self._header, b""
+        return header
+
+    def compress(self, data):
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        return self._take_header() + self._compressor.compress(data)
+
+    def finish(self):
+        trailer = struct.pack("<LL", self._crc, self._size & 0xFFFFFFFF)
+        return self._take_header() + self._compressor.flush() + trailer
+
+
+class PaddedGzipCodec(GzipCodec):
+    """gzip with random-length padding, for bodies that may carry secrets."""
+
+    max_random_bytes = 100
+
+    def compressor(self):
+        return _PaddedGzipCompressor(self.level, self.max_random_bytes)
+
+
+class DeflateCodec(Codec):
+    # HTTP "deflate" is the zlib format, not a raw deflate stream.
+    name = "deflate"
+    level = 6
+
+    def compressor(self):
+        return _ZlibCompressor(self.level, zlib.MAX_WBITS)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class BrotliCodec(Codec):
+    """Needs the ``brotli`` package. Quality 11 is far too slow per request."""
+
+    name = "br"
+    quality = 4
+
+    def available(self):
+        return brotli is not None
+
+    def compressor(self):
+        return _BrotliCompressor(self.quality)
+
+
+class _ZstdCompressor:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class ZstdCodec(Codec):
+    """Needs the ``zstandard`` package."""
+
+    name = "zstd"
+    level = 3
+
+    def available(self):
+        return zstandard is not None
+
+    def compressor(self):
+        return _ZstdCompressor(self.level)
+
+
+CODECS = {
+    codec.name: codec
+    for codec in (ZstdCodec(), BrotliCodec(), GzipCodec(), DeflateCodec())
+}
+
+_CODING = re.compile(r"^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an ``Accept-Encoding`` header to its q-value."""
+    accepted = {}
+    for item in (header or "").split(","):
+        match = _CODING.match(item)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        accepted[match.group(1).lower()] = quality
+    return accepted
+
+
+def negotiate(header, encodings):
+    """
+    The first codec in ``encodings`` (server preference) among those the
+    client rates highest, or ``None`` to send the body as is.
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for name in encodings:
+        codec = CODECS.get(name)
+        if codec is None or not codec.available():
+            continue
+        quality = accepted.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = codec, quality
+    return best
+
+
+def compress_stream(codec, chunks):
+    compressor = codec.compressor()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(codec, chunks):
+    compressor = codec.compressor()
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
@@ -0,0 +1,159 @@
+import datetime
+import itertools
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CustomUser, Task
+from .provisioning import DEFAULT_PASSWORD
+from .scopes import invalidate_role_scope
+
+DEFAULT_STATUS_MIX = {
+    Task.Status.PENDING: 35,
+    Task.Status.IN_PROGRESS: 15,
+    Task.Status.COMPLETED: 50,
+}
+
+_WORDS = (
+    "the a to and of in for on with is review update client report server "
+    "database backup migration invoice deploy budget meeting release audit "
+    "design bug feature security onboarding payroll inventory forecast "
+    "schedule training vendor contract support network storage analytics "
+    "dashboard upgrade testing compliance customer ticket follow call email "
+    "draft summary sprint roadmap hiring interview office supplies travel "
+    "expense approval policy quarterly weekly monthly plan check fix write"
+).split()
+# Zipf weights over the vocabulary, so a few words dominate as in real text.
+_WORD_WEIGHTS = list(
+    itertools.accumulate(1 / rank for rank in range(1, len(_WORDS) + 1))
+)
+
+
+def parse_status_mix(value):
+    """Parse ``pending=35,in_progress=15,completed=50`` into weights."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in Task.Status.values:
+            raise ValueError(f"Unknown status '{name}'.")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight for '{name}'.")
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("The status weights must add up to more than zero.")
+    return mix
+
+
+def zipf_weights(count, skew):
+    """Cumulative weights of ranks ``1..count`` under Zipf's law."""
+    return list(itertools.accumulate(1 / rank**skew for rank in range(1, count + 1)))
+
+
+def text(rng, median_words, longest):
+    """A lognormal number of words: mostly short, with a long tail."""
+    count = min(longest, max(1, int(rng.lognormvariate(0, 0.8) * median_words)))
+    words = rng.choices(_WORDS, cum_weights=_WORD_WEIGHTS, k=count)
+    return " ".join(words).capitalize() + "."
+
+
+def _task(rng, user_id, status, today):
+    done = status == Task.Status.COMPLETED
+    # Completed work is mostly in the past, open work mostly ahead.
+    offset = rng.randint(-720, 30) if done else rng.randint(-60, 365)
+    return Task(
+        title=text(rng, 5, 12).rstrip("."),
+        description=text(rng, 40, 2000),
+        assigned_to_id=user_id,
+        due_date=today + datetime.timedelta(days=offset),
+        status=status,
+        completion_report=text(rng, 60, 3000) if done else None,
+        worked_hours=Decimal(rng.randint(1, 160)) / 4 if done else None,
+    )
+
+
+def generate_dataset(
+    admins,
+    users,
+    tasks,
+    *,
+    seed=0,
+    skew=1.1,
+    status_mix=None,
+    prefix="load",
+    batch_size=5000,
+    progress=None,
+):
+    """
+    Create ``admins`` admins, ``users`` users and ``tasks`` tasks with the
+    skew of a real install: users are spread over admins, and tasks over
+    users, by Zipf's law, so a few admins and users own most of the rows.
+    Statuses follow ``status_mix`` and description and report lengths are
+    lognormal. The same ``seed`` gives the same data. Everyone's password is
+    ``provisioning.DEFAULT_PASSWORD``, hashed once.
+
+    ``progress`` is called with the number of tasks created so far.
+    """
+    rng = random.Random(seed)
+    mix = status_mix or DEFAULT_STATUS_MIX
+    statuses, status_weights = list(mix), list(itertools.accumulate(mix.values()))
+    password = make_password(DEFAULT_PASSWORD)
+
+    with transaction.atomic():
+        admin_rows = CustomUser.objects.bulk_create(
+            (
+                CustomUser(
+                    username=f"{prefix}_admin_{i}",
+                    email=f"{prefix}_admin_{i}@example.com",
+                    user_type=CustomUser.UserType.ADMIN,
+                    password=password,
+                )
+                for i in range(admins)
+            ),
+            batch_size=batch_size,
+        )
+        admin_ids = [admin.pk for admin in admin_rows]
+        admin_weights = zipf_weights(len(admin_ids), skew) if admin_ids else None
+        user_rows = CustomUser.objects.bulk_create(
+            (
+                CustomUser(
+                    username=f"{prefix}_user_{i}",
+                    email=f"{prefix}_user_{i}@example.com",
+                    user_type=CustomUser.UserType.USER,
+                    password=password,
+                    # A few users are left without an admin.
+                    assigned_admin_id=(
+                        rng.choices(admin_ids, cum_weights=admin_weights)[0]
+                        if admin_ids and rng.random() >= 0.05
+                        else None
+                    ),
+                )
+                for i in range(users)
+            ),
+            batch_size=batch_size,
+        )
+    invalidate_role_scope(*admin_ids)
+
+    user_ids = [user.pk for user in user_rows]
+    if not user_ids:
+        return admin_rows, user_rows, 0
+    # Shuffle so the heaviest users are not simply the first ones created.
+    rng.shuffle(user_ids)
+    user_weights = zipf_weights(len(user_ids), skew)
+    today = timezone.localdate()
+    created = 0
+    while created < tasks:
+        count = min(batch_size, tasks - created)
+        owners = rng.choices(user_ids, cum_weights=user_weights, k=count)
+        chosen = rng.choices(statuses, cum_weights=status_weights, k=count)
+        Task.objects.bulk_create(
+            [_task(rng, owner, status, today) for owner, status in zip(owners, chosen)]
+        )
+        created += count
+        if progress is not None:
+            progress(created)
+    return admin_rows, user_rows, created
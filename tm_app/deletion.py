@@ -0,0 +1,167 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .authentication import invalidate_cached_user
+from .events import publish_task_deletions
+from .jobs import enqueue
+from .models import ArchivedTask, CustomUser, Task, UserDeletion
+from .scopes import invalidate_role_scope
+from .stats import apply_task_changes
+from .sync import record_tombstones
+
+ACTIVE_STATUSES = (UserDeletion.Status.PENDING, UserDeletion.Status.RUNNING)
+
+# Enough of a task to undo its statistics.
+TASK_STATE_FIELDS = ("assigned_to", "status", "worked_hours", "due_date")
+
+
+def purge_tasks(queryset, tasks):
+    """
+    Delete ``tasks`` (loaded from ``queryset``) with a single DELETE and do
+    once per batch what the per-row delete signals would: tombstones,
+    statistics and change events. Returns the number of rows deleted; it is
+    lower than ``len(tasks)`` when some rows no longer match ``queryset``.
+    """
+    if not tasks:
+        return 0
+    deleted = queryset.filter(pk__in=[task.pk for task in tasks])._raw_delete(
+        queryset.db
+    )
+    pairs = [(task.pk, task.assigned_to_id) for task in tasks]
+    version = record_tombstones(pairs)
+    apply_task_changes(
+        [(task.tracked_state(), None) for task in tasks], create_missing=False
+    )
+    publish_task_deletions(version, pairs)
+    return deleted
+
+
+def active_deletions():
+    return UserDeletion.objects.filter(status__in=ACTIVE_STATUSES)
+
+
+def request_deletion(user, requested_by=None):
+    """
+    Deactivate ``user`` right away and delete them in chunks, as a
+    ``delete_user`` job unless ``USER_DELETION_IN_BACKGROUND`` is off.
+    Returns the ``UserDeletion`` tracking it; asking twice returns the
+    deletion already under way.
+    """
+    with transaction.atomic():
+        deletion = active_deletions().filter(user_id=user.pk).first()
+        if deletion is not None:
+            return deletion
+
+        CustomUser.objects.filter(pk=user.pk).update(is_active=False)
+        invalidate_cached_user(user.pk)
+        deletion = UserDeletion.objects.create(
+            user_id=user.pk,
+            username=user.username,
+            total_tasks=Task.objects.filter(assigned_to=user).count()
+            + ArchivedTask.objects.filter(assigned_to=user).count(),
+            total_users=CustomUser.objects.filter(assigned_admin=user).count(),
+            requested_by=requested_by,
+        )
+        if settings.USER_DELETION_IN_BACKGROUND:
+            enqueue(
+                "delete_user", {"deletion_id": deletion.pk}, requested_by=requested_by
+            )
+
+    if not settings.USER_DELETION_IN_BACKGROUND:
+        run_deletion(deletion.pk)
+    # Read back the progress so far; a job run inline has finished already.
+    deletion.refresh_from_db()
+    return deletion
+
+
+def delete_user_job(job):
+    """Job handler running the deletion ``request_deletion`` queued."""
+    deletion = run_deletion(job.payload["deletion_id"])
+    return {
+        "deletion_id": deletion.pk,
+        "deleted_tasks": deletion.deleted_tasks,
+        "released_users": deletion.released_users,
+    }
+
+
+def _delete_tasks(deletion, chunk_size):
+    while True:
+        with transaction.atomic():
+            tasks = Task.objects.filter(assigned_to_id=deletion.user_id)
+            batch = list(tasks.only(*TASK_STATE_FIELDS).order_by("pk")[:chunk_size])
+            if not batch:
+                return
+            deleted = purge_tasks(tasks, batch)
+            UserDeletion.objects.filter(pk=deletion.pk).update(
+                deleted_tasks=F("deleted_tasks") + deleted
+            )
+
+
+def _delete_archived_tasks(deletion, chunk_size):
+    while True:
+        with transaction.atomic():
+            archived = ArchivedTask.objects.filter(assigned_to_id=deletion.user_id)
+            ids = archived.order_by("pk").values_list("pk", flat=True)[:chunk_size]
+            ids = list(ids)
+            if not ids:
+                return
+            deleted, _ = ArchivedTask.objects.filter(pk__in=ids).delete()
+            UserDeletion.objects.filter(pk=deletion.pk).update(
+                deleted_tasks=F("deleted_tasks") + deleted
+            )
+
+
+def _release_managed_users(deletion, chunk_size):
+    while True:
+        with transaction.atomic():
+            managed = CustomUser.objects.filter(assigned_admin_id=deletion.user_id)
+            ids = managed.order_by("pk").values_list("pk", flat=True)[:chunk_size]
+            ids = list(ids)
+            if not ids:
+                return
+            released = CustomUser.objects.filter(pk__in=ids).update(
+                assigned_admin=None
+            )
+            invalidate_cached_user(*ids)
+            UserDeletion.objects.filter(pk=deletion.pk).update(
+                released_users=F("released_users") + released
+            )
+
+
+def run_deletion(deletion_id, chunk_size=None):
+    """
+    Delete the user behind ``deletion_id`` a chunk at a time: their tasks,
+    their archived tasks, then (for admins) unassign their users, and only
+    then the user row itself. Every chunk is its own short transaction, so
+    memory stays bounded, SQLite is never locked for long and a deletion
+    interrupted part way can simply be run again.
+    """
+    chunk_size = chunk_size or settings.USER_DELETION_CHUNK_SIZE
+    deletion = UserDeletion.objects.get(pk=deletion_id)
+    if deletion.status == UserDeletion.Status.DONE:
+        return deletion
+    UserDeletion.objects.filter(pk=deletion.pk).update(
+        status=UserDeletion.Status.RUNNING, error=""
+    )
+
+    try:
+        _delete_tasks(deletion, chunk_size)
+        _delete_archived_tasks(deletion, chunk_size)
+        _release_managed_users(deletion, chunk_size)
+        user = CustomUser.objects.filter(pk=deletion.user_id).first()
+        if user is not None:
+            # Whatever is left (stats rows, tasks created meanwhile) is small.
+            user.delete()
+        invalidate_role_scope(deletion.user_id)
+    except Exception as exc:
+        UserDeletion.objects.filter(pk=deletion.pk).update(
+            status=UserDeletion.Status.FAILED, error=str(exc)
+        )
+        raise
+
+    UserDeletion.objects.filter(pk=deletion.pk).update(
+        status=UserDeletion.Status.DONE
+    )
+    deletion.refresh_from_db()
+    return deletion
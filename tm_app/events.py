@@ -0,0 +1,183 @@
+import asyncio
+import functools
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+# Queued instead of an event when a subscriber falls too far behind.
+OVERFLOW = None
+
+
+class Subscription:
+    """
+    One listener's queue. It is bound to the event loop it was created on,
+    so publishers on other threads hand events over with
+    ``call_soon_threadsafe`` and an idle subscriber costs no thread at all.
+    """
+
+    def __init__(self, broker, user_ids=None, maxsize=0):
+        self.broker = broker
+        self.user_ids = user_ids
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def wants(self, event):
+        if self.user_ids is None:
+            return True
+        return any(user_id in self.user_ids for user_id in event["users"])
+
+    def deliver(self, event):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop the backlog; the client resyncs from its last event id.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+            self.closed = True
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.closed = True
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    """
+    Pub/sub for task change events. Set ``TASK_EVENT_BROKER`` to the dotted
+    path of a subclass to fan events out across processes.
+    """
+
+    def has_subscribers(self):
+        return True
+
+    def publish(self, event):
+        raise NotImplementedError
+
+    def subscribe(self, user_ids=None, maxsize=0):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        pass
+
+
+class InMemoryBroker(BaseBroker):
+    """
+    Delivers events to subscribers in this process only. Enough for a
+    single ASGI worker and for tests; writes made in other processes are
+    not seen.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = [sub for sub in self._subscribers if sub.wants(event)]
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down.
+                self.unsubscribe(subscription)
+
+    def subscribe(self, user_ids=None, maxsize=0):
+        subscription = Subscription(self, user_ids, maxsize)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+@functools.cache
+def get_broker():
+    return import_string(settings.TASK_EVENT_BROKER)()
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    if setting == "TASK_EVENT_BROKER":
+        get_broker.cache_clear()
+
+
+def task_event(kind, version, task, previous_user_id=None):
+    """
+    Build an event for ``task`` (serialized data, or ``{"id", "assigned_to"}``
+    for deletes). ``users`` lists every owner the change is visible to, so
+    a previous owner hears about a reassignment too.
+    """
+    users = [task["assigned_to"]]
+    if previous_user_id is not None and previous_user_id != task["assigned_to"]:
+        users.append(previous_user_id)
+    return {"id": version, "type": kind, "task": task, "users": users}
+
+
+def publish_task_event(kind, instance, previous_user_id=None):
+    """Publish a change to one task once the current transaction commits."""
+    from .serializers import TaskSerializer
+
+    broker = get_broker()
+    if not broker.has_subscribers():
+        return
+    if kind == "deleted":
+        data = {"id": instance.pk, "assigned_to": instance.assigned_to_id}
+    else:
+        data = TaskSerializer(instance).data
+    event = task_event(kind, instance.version, data, previous_user_id)
+    transaction.on_commit(lambda: broker.publish(event))
+
+
+def publish_task_deletions(version, pairs):
+    """Publish removals of ``(task_id, user_id)`` pairs after commit."""
+    broker = get_broker()
+    if not broker.has_subscribers():
+        return
+    events = [
+        task_event("deleted", version, {"id": task_id, "assigned_to": user_id})
+        for task_id, user_id in pairs
+    ]
+
+    def publish():
+        for event in events:
+            broker.publish(event)
+
+    transaction.on_commit(publish)
+
+
+def publish_bulk_events(kind, version, previous_owners=None, using=None):
+    """
+    Publish the rows a bulk write stamped with ``version`` after commit.
+    ``previous_owners`` maps reassigned task ids to their old owners.
+    """
+    from .models import Task
+    from .serializers import TaskSerializer
+
+    previous_owners = previous_owners or {}
+
+    def publish():
+        broker = get_broker()
+        if not broker.has_subscribers():
+            return
+        for task in Task.objects.using(using).filter(version=version).iterator():
+            data = TaskSerializer(task).data
+            broker.publish(
+                task_event(kind, version, data, previous_owners.get(task.pk))
+            )
+
+    transaction.on_commit(publish, using=using)
@@ -2,6 +2,8 @@ from django import forms
 from django.contrib.auth import authenticate, get_user_model
 
 from .models import Task
+from .provisioning import DEFAULT_PASSWORD
+from .search import RANK_ORDERING, search_tasks, search_terms
 
 User = get_user_model()
 
@@ -17,12 +19,36 @@ class CreateUserForm(forms.ModelForm):
 
     def save(self, commit=True):
         user = super().save(commit=False)
-        user.set_password("Testpassword@123")
+        user.set_password(DEFAULT_PASSWORD)
         if commit:
             user.save()
         return user
 
 
+class UserUploadForm(forms.Form):
+    FORMAT_CHOICES = [("", "Detect from file name"), ("csv", "CSV"), ("json", "JSON")]
+
+    file = forms.FileField(widget=forms.ClearableFileInput(attrs={"class": "form-control"}))
+    format = forms.ChoiceField(
+        choices=FORMAT_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload = cleaned_data.get("file")
+        if upload and not cleaned_data.get("format"):
+            name = upload.name.lower()
+            if name.endswith(".json"):
+                cleaned_data["format"] = "json"
+            elif name.endswith(".csv"):
+                cleaned_data["format"] = "csv"
+            else:
+                self.add_error("format", "Choose the file format.")
+        return cleaned_data
+
+
 class LoginForm(forms.Form):
     username = forms.CharField(
         widget=forms.TextInput(
@@ -82,3 +108,94 @@ class TaskUpdateForm(forms.ModelForm):
                 self.add_error(
                     "worked_hours", "This field is required if the task is completed."
                 )
+
+
+class TaskFilterForm(forms.Form):
+    q = forms.CharField(
+        required=False,
+        label="Search",
+        widget=forms.TextInput(
+            attrs={"placeholder": "Title, description or report", "type": "search"}
+        ),
+    )
+    status = forms.ChoiceField(
+        choices=[("", "Any status"), *Task.Status.choices], required=False
+    )
+    due_from = forms.DateField(
+        required=False, widget=forms.DateInput(attrs={"type": "date"})
+    )
+    due_to = forms.DateField(
+        required=False, widget=forms.DateInput(attrs={"type": "date"})
+    )
+    assignee = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={"placeholder": "Assignee username"}),
+    )
+    admin = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={"placeholder": "Admin username"}),
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is None or user.user_type != User.UserType.SUPERADMIN:
+            self.fields.pop("admin", None)
+        for field in self.fields.values():
+            field.widget.attrs["class"] = "form-control"
+
+    def get_ordering(self):
+        if search_terms(self.cleaned_data.get("q")):
+            return RANK_ORDERING
+        return None
+
+    def filter_queryset(self, queryset):
+        data = self.cleaned_data
+        if search_terms(data.get("q")):
+            queryset = search_tasks(queryset, data["q"])
+        if data.get("status"):
+            queryset = queryset.filter(status=data["status"])
+        if data.get("due_from"):
+            queryset = queryset.filter(due_date__gte=data["due_from"])
+        if data.get("due_to"):
+            queryset = queryset.filter(due_date__lte=data["due_to"])
+        if data.get("assignee"):
+            queryset = queryset.filter(assigned_to__username=data["assignee"])
+        if data.get("admin"):
+            queryset = queryset.filter(
+                assigned_to__assigned_admin__username=data["admin"]
+            )
+        return queryset
+
+
+class TaskReportFilterForm(TaskFilterForm):
+    status = None
+
+
+class UserFilterForm(forms.Form):
+    username = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={"placeholder": "Username starts with"}),
+    )
+    admin = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={"placeholder": "Admin username"}),
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is None or user.user_type != User.UserType.SUPERADMIN:
+            self.fields.pop("admin", None)
+        for field in self.fields.values():
+            field.widget.attrs["class"] = "form-control"
+
+    def filter_queryset(self, queryset):
+        data = self.cleaned_data
+        if data.get("username"):
+            queryset = queryset.filter(username__startswith=data["username"])
+        if data.get("admin"):
+            queryset = queryset.filter(assigned_admin__username=data["admin"])
+        return queryset
+
+
+class AdminFilterForm(UserFilterForm):
+    admin = None
@@ -0,0 +1,271 @@
+import datetime
+import functools
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import (
+    DatabaseError,
+    close_old_connections,
+    connection,
+    connections,
+    transaction,
+)
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job kinds and the functions that run them. A handler takes the ``Job``,
+# returns a JSON-serializable result and must be safe to run again: a job
+# is retried after a failure and requeued if its worker dies.
+JOB_HANDLERS = {
+    "delete_user": "tm_app.deletion.delete_user_job",
+    "reassign_users": "tm_app.assignment.reassign_users_job",
+    "export_task_report": "tm_app.views.tasks.export_task_report_job",
+    "provision_users": "tm_app.provisioning.provision_users_job",
+}
+
+
+@functools.cache
+def get_handler(kind):
+    return import_string(JOB_HANDLERS[kind])
+
+
+@functools.cache
+def result_storage():
+    """Where handlers keep files their results point to, e.g. exports."""
+    return FileSystemStorage(location=settings.JOB_RESULTS_ROOT)
+
+
+def enqueue(kind, payload=None, requested_by=None, max_attempts=None):
+    """
+    Queue a ``kind`` job and return it. Inside a transaction the job only
+    becomes visible to workers when it commits, together with the rest of
+    the request's writes. With ``JOBS_RUN_INLINE`` it runs in this process
+    right after commit instead.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+    job = Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        requested_by=requested_by,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    if settings.JOBS_RUN_INLINE:
+        transaction.on_commit(lambda: run_job(job.pk, worker="inline"))
+    return job
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def _lock(job, worker):
+    """Mark a queued ``job`` as running under ``worker``; False if beaten to it."""
+    # The status check keeps the claim atomic even where SELECT ... FOR
+    # UPDATE does nothing (SQLite): only one worker's UPDATE matches.
+    claimed = Job.objects.filter(pk=job.pk, status=Job.Status.QUEUED).update(
+        status=Job.Status.RUNNING,
+        attempts=F("attempts") + 1,
+        locked_by=worker,
+        locked_at=timezone.now(),
+    )
+    if claimed:
+        job.refresh_from_db()
+    return bool(claimed)
+
+
+def claim_next(worker):
+    """The next due job, now marked as running under ``worker``, or None."""
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    while True:
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=skip_locked)
+                .filter(status=Job.Status.QUEUED, run_after__lte=timezone.now())
+                .order_by("run_after", "pk")
+                .first()
+            )
+            if job is None:
+                return None
+            if _lock(job, worker):
+                return job
+
+
+def retry_delay(attempts):
+    return datetime.timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def execute(job):
+    """
+    Run a claimed ``job`` and record the outcome: done with its result,
+    queued again after a back-off while attempts remain, otherwise failed.
+
+    The outcome is only written while this claim still holds the lock. A
+    worker whose lock went stale and whose job was claimed again leaves it
+    to the new claim and gets None.
+    """
+    try:
+        result = get_handler(job.kind)(job)
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        update = {"error": str(exc) or exc.__class__.__name__, "locked_by": ""}
+        if job.attempts < job.max_attempts:
+            update.update(
+                status=Job.Status.QUEUED,
+                run_after=timezone.now() + retry_delay(job.attempts),
+            )
+        else:
+            update.update(status=Job.Status.FAILED, finished_at=timezone.now())
+    else:
+        update = {
+            "status": Job.Status.DONE,
+            "result": result,
+            "error": "",
+            "locked_by": "",
+            "finished_at": timezone.now(),
+        }
+    # locked_by and attempts identify this claim; a new one changes both.
+    recorded = Job.objects.filter(
+        pk=job.pk,
+        status=Job.Status.RUNNING,
+        locked_by=job.locked_by,
+        attempts=job.attempts,
+    ).update(updated_at=timezone.now(), **update)
+    if not recorded:
+        logger.warning(
+            "Job %s (%s) lost its lock to another worker; its outcome is dropped",
+            job.pk,
+            job.kind,
+        )
+        return None
+    for name, value in update.items():
+        setattr(job, name, value)
+    return job
+
+
+def run_job(job_id, worker=None):
+    """
+    Claim and run one job now, whether or not it is due. Returns None if
+    another worker has it.
+    """
+    job = Job.objects.filter(pk=job_id, status=Job.Status.QUEUED).first()
+    if job is None or not _lock(job, worker or worker_name()):
+        return None
+    return execute(job)
+
+
+def work(stop, poll_interval=None, burst=False):
+    """
+    Claim and run jobs until ``stop`` (a ``threading.Event``) is set, or,
+    with ``burst``, until the queue has nothing due.
+    """
+    poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+    worker = worker_name()
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                job = claim_next(worker)
+            except DatabaseError:
+                # E.g. a locked database; try again after the poll interval.
+                logger.exception("Job worker %s could not claim a job", worker)
+                stop.wait(poll_interval)
+                continue
+            if job is not None:
+                execute(job)
+            elif burst:
+                return
+            else:
+                stop.wait(poll_interval)
+    finally:
+        connections.close_all()
+
+
+def run_workers(threads=1, poll_interval=None, burst=False, stop=None):
+    """
+    Run ``work`` in ``threads`` threads of this process until ``stop`` is
+    set (or, with ``burst``, the queue is drained). Meanwhile this thread
+    keeps the locks of their jobs fresh and requeues jobs of dead workers.
+    """
+    stop = stop or threading.Event()
+    workers = [
+        threading.Thread(
+            target=work, args=(stop, poll_interval, burst), name=f"jobs-{index}"
+        )
+        for index in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}:"
+    interval = settings.JOB_LOCK_TIMEOUT / 3
+    try:
+        while any(thread.is_alive() for thread in workers):
+            wait = interval
+            try:
+                requeue_stale()
+                heartbeat(prefix)
+            except DatabaseError:
+                logger.exception("Could not refresh job locks; retrying")
+                wait = settings.JOB_POLL_INTERVAL
+            deadline = time.monotonic() + wait
+            for thread in workers:
+                thread.join(max(0, deadline - time.monotonic()))
+    finally:
+        stop.set()
+        for thread in workers:
+            thread.join()
+        connections.close_all()
+
+
+def heartbeat(prefix):
+    """Refresh the lock of every job run by workers named ``prefix*``."""
+    return Job.objects.filter(
+        status=Job.Status.RUNNING, locked_by__startswith=prefix
+    ).update(locked_at=timezone.now())
+
+
+def requeue_stale():
+    """
+    Put jobs back in the queue whose worker stopped refreshing their lock,
+    e.g. because it was killed, or fail them when they are out of attempts.
+    Returns how many were requeued.
+    """
+    now = timezone.now()
+    cutoff = now - datetime.timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=cutoff)
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED,
+        error="The worker running this job stopped responding.",
+        locked_by="",
+        finished_at=now,
+        updated_at=now,
+    )
+    return stale.update(
+        status=Job.Status.QUEUED, locked_by="", run_after=now, updated_at=now
+    )
+
+
+def describe(job):
+    """Job status for polling clients."""
+    return {
+        "id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
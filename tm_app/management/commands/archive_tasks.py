@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tm_app.archive import archive_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "Move completed tasks not written for --days into the archive table in "
+        "batches. Safe to interrupt; run it again to continue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TASK_ARCHIVE_AFTER_DAYS,
+            help="Archive completed tasks last written more than this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TASK_ARCHIVE_BATCH_SIZE,
+            help="Tasks moved per transaction.",
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Resume after this task id (printed by an earlier run).",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Stop after this many batches, e.g. to spread the work out.",
+        )
+        parser.add_argument(
+            "--compress",
+            action="store_true",
+            default=settings.TASK_ARCHIVE_COMPRESS,
+            help="zlib-compress long completion reports.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 0 or options["batch_size"] <= 0:
+            raise CommandError("--days must be >= 0 and --batch-size positive.")
+
+        before = timezone.now() - timedelta(days=options["days"])
+        total = batches = 0
+        for moved, last_id in archive_tasks(
+            before,
+            after_id=options["after_id"],
+            batch_size=options["batch_size"],
+            compress=options["compress"],
+        ):
+            total += moved
+            batches += 1
+            self.stdout.write(f"Archived {total} tasks (up to id {last_id}).")
+            if options["max_batches"] and batches >= options["max_batches"]:
+                self.stdout.write(f"Stopping; resume with --after-id {last_id}.")
+                break
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} tasks."))
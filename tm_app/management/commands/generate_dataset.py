@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tm_app.dataset import DEFAULT_STATUS_MIX, generate_dataset, parse_status_mix
+from tm_app.models import CustomUser
+from tm_app.provisioning import DEFAULT_PASSWORD
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a reproducible synthetic dataset (admins, users "
+        "and tasks with realistic skew) for load tests and benchmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--admins", type=int, default=10)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tasks", type=int, default=100_000)
+        parser.add_argument(
+            "--seed", type=int, default=0, help="The same seed gives the same data."
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent for users per admin and tasks per user.",
+        )
+        parser.add_argument(
+            "--status-mix",
+            default=",".join(f"{k}={v}" for k, v in DEFAULT_STATUS_MIX.items()),
+            help="Relative weights, e.g. pending=35,in_progress=15,completed=50.",
+        )
+        parser.add_argument(
+            "--prefix", default="load", help="Username prefix for generated accounts."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Rows per INSERT batch."
+        )
+
+    def handle(self, *args, **options):
+        if min(options["admins"], options["users"], options["tasks"]) < 0:
+            raise CommandError("Counts cannot be negative.")
+        if options["batch_size"] <= 0 or options["skew"] < 0:
+            raise CommandError("--batch-size must be positive and --skew >= 0.")
+        if options["tasks"] and not options["users"]:
+            raise CommandError("Tasks need at least one user to be assigned to.")
+        try:
+            status_mix = parse_status_mix(options["status_mix"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        prefix = options["prefix"]
+        if CustomUser.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(
+                f"Users named '{prefix}_*' already exist; pick another --prefix."
+            )
+
+        admins, users, tasks = generate_dataset(
+            options["admins"],
+            options["users"],
+            options["tasks"],
+            seed=options["seed"],
+            skew=options["skew"],
+            status_mix=status_mix,
+            prefix=prefix,
+            batch_size=options["batch_size"],
+            progress=lambda done: self.stdout.write(f"Created {done} tasks."),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(admins)} admins, {len(users)} users and {tasks} "
+                f"tasks. Password for all of them: {DEFAULT_PASSWORD}"
+            )
+        )
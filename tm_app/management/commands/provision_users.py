@@ -0,0 +1,43 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from tm_app.provisioning import load_records, provision_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users and admins in bulk from a CSV or JSON file, hashing "
+        "passwords across a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with header row) or JSON file.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "json"],
+            help="File format; detected from the extension when omitted.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Hashing processes (defaults to USER_PROVISIONING_WORKERS).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or (
+            "json" if path.lower().endswith(".json") else "csv"
+        )
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as stream:
+                records = load_records(stream, file_format)
+        except (OSError, ValidationError, ValueError) as exc:
+            raise CommandError(f"Could not read {path}: {exc}")
+
+        users, errors = provision_users(records, workers=options["workers"])
+        if errors:
+            for row, row_errors in errors:
+                self.stderr.write(f"Row {row}: {' '.join(row_errors)}")
+            raise CommandError(f"{len(errors)} invalid rows; no users were created.")
+
+        self.stdout.write(self.style.SUCCESS(f"Created {len(users)} users."))
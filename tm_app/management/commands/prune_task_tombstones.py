@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tm_app.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete task tombstones older than the retention period. Clients "
+        "syncing from before the pruned range get 410 and must resync."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TASK_TOMBSTONE_RETENTION_DAYS,
+            help="Keep tombstones newer than this many days.",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+        deleted = prune_tombstones(before)
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} task tombstones."))
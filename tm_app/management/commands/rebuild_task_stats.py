@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from tm_app.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user task statistics tables from the Task table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            type=int,
+            dest="user_ids",
+            help="Only rebuild statistics for this user id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_user_stats(options["user_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt task statistics for {rows} users."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from tm_app.deletion import active_deletions, run_deletion
+from tm_app.models import UserDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        "Finish user deletions left pending or running here instead of "
+        "waiting for the job worker. Pass --failed to retry failed ones too."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--failed", action="store_true", help="Also retry failed deletions."
+        )
+        parser.add_argument("--chunk-size", type=int, help="Rows per transaction.")
+
+    def handle(self, *args, **options):
+        deletions = active_deletions()
+        if options["failed"]:
+            deletions = deletions | UserDeletion.objects.filter(
+                status=UserDeletion.Status.FAILED
+            )
+        finished = 0
+        for deletion_id in deletions.order_by("pk").values_list("pk", flat=True):
+            deletion = run_deletion(deletion_id, chunk_size=options["chunk_size"])
+            self.stdout.write(
+                f"Deleted {deletion.username} ({deletion.deleted_tasks} tasks)."
+            )
+            finished += 1
+        self.stdout.write(self.style.SUCCESS(f"Finished {finished} user deletions."))
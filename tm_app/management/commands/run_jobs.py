@@ -0,0 +1,79 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def _stop_on_signals(stop, processes=()):
+    def handler(signum, frame):
+        stop.set()
+        for process in processes:
+            process.terminate()
+
+    signal.signal(signal.SIGINT, handler)
+    signal.signal(signal.SIGTERM, handler)
+
+
+def _run_process(threads, poll_interval, burst):
+    import django
+    from django.apps import apps
+
+    # Spawned (rather than forked) children start without Django set up.
+    if not apps.ready:
+        django.setup()
+    from tm_app.jobs import run_workers
+
+    stop = threading.Event()
+    _stop_on_signals(stop)
+    run_workers(threads, poll_interval, burst, stop)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (user deletes, admin reassignments, report "
+        "exports). Stops after the running jobs on SIGINT or SIGTERM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes", type=int, default=1, help="Worker processes to start."
+        )
+        parser.add_argument(
+            "--threads", type=int, default=1, help="Worker threads per process."
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            help="Seconds between checks of an empty queue (JOB_POLL_INTERVAL).",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for more.",
+        )
+
+    def handle(self, *args, **options):
+        processes, threads = options["processes"], options["threads"]
+        if processes < 1 or threads < 1:
+            raise CommandError("--processes and --threads must be positive.")
+        arguments = (threads, options["poll_interval"], options["burst"])
+        self.stdout.write(
+            f"Running jobs in {processes} process(es) x {threads} thread(s)."
+        )
+        if processes == 1:
+            _run_process(*arguments)
+        else:
+            # Children must open their own database connections.
+            connections.close_all()
+            workers = [
+                multiprocessing.Process(target=_run_process, args=arguments)
+                for _ in range(processes)
+            ]
+            for process in workers:
+                process.start()
+            _stop_on_signals(threading.Event(), workers)
+            for process in workers:
+                process.join()
+        self.stdout.write(self.style.SUCCESS("Job workers stopped."))
@@ -1,4 +1,6 @@
 from django.contrib.auth.models import BaseUserManager
+from django.db import models, transaction
+from django.utils import timezone
 
 
 class CustomUserManager(BaseUserManager):
@@ -32,3 +34,67 @@ class CustomUserManager(BaseUserManager):
             raise ValueError(_("Superuser must have a password."))
 
         return self.create_user(username, password, **extra_fields)
+
+
+class TaskQuerySet(models.QuerySet):
+    """
+    Bulk writes skip model signals, so bump the change version, record
+    tombstones for reassigned tasks, publish change events and refresh the
+    task statistics of every user they touch. ``bulk_update`` goes through
+    ``update`` and is covered.
+    """
+
+    def update(self, **kwargs):
+        from .events import publish_bulk_events
+        from .stats import rebuild_user_stats
+        from .sync import next_version, record_tombstones
+
+        reassigning = "assigned_to" in kwargs or "assigned_to_id" in kwargs
+        with transaction.atomic(using=self.db):
+            if reassigning:
+                # Owners change, so collect them again once the rows are written.
+                previous = dict(self.values_list("pk", "assigned_to_id"))
+                user_ids = set(previous.values())
+            else:
+                user_ids = set(self.values_list("assigned_to_id", flat=True).distinct())
+            kwargs.setdefault("updated_at", timezone.now())
+            kwargs.setdefault("version", next_version())
+            rows = super().update(**kwargs)
+            if rows:
+                if reassigning:
+                    current = dict(
+                        self.model._base_manager.filter(pk__in=previous).values_list(
+                            "pk", "assigned_to_id"
+                        )
+                    )
+                    user_ids.update(current.values())
+                    moved = {
+                        pk: user_id
+                        for pk, user_id in previous.items()
+                        if current.get(pk) != user_id
+                    }
+                    record_tombstones(moved.items(), version=kwargs["version"])
+                else:
+                    moved = None
+                rebuild_user_stats(user_ids)
+                publish_bulk_events("updated", kwargs["version"], moved, using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .events import publish_bulk_events
+        from .stats import rebuild_user_stats
+        from .sync import next_version
+
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            version = next_version()
+            for obj in objs:
+                obj.version = version
+            objs = super().bulk_create(objs, *args, **kwargs)
+            rebuild_user_stats({obj.assigned_to_id for obj in objs})
+            publish_bulk_events("created", version, using=self.db)
+        return objs
+
+    bulk_create.alters_data = True
@@ -0,0 +1,252 @@
+import bisect
+import contextvars
+import functools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = tuple(256 * 4**power for power in range(8))  # 256 B to 4 MiB
+
+# Label used for requests that did not resolve to a named route, so 404 probes
+# cannot blow up the number of series.
+UNMATCHED = "<unmatched>"
+
+# Methods with a label of their own; clients choose the method, so anything
+# else shares one label instead of adding series without bound.
+KNOWN_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT")
+)
+OTHER_METHOD = "other"
+
+_recorder = contextvars.ContextVar("request_metrics", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram for one label set."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class Registry:
+    """
+    In-memory request metrics for this process, rendered in the Prometheus
+    text format. Each worker process keeps its own, so scrape every worker
+    (or run one per host) when serving with several.
+    """
+
+    histograms = {
+        "http_request_duration_seconds": (
+            "Time until the response headers were ready.",
+            DURATION_BUCKETS,
+        ),
+        "http_request_db_queries": ("SQL queries run per request.", QUERY_BUCKETS),
+        "http_request_db_seconds": ("Time spent in SQL per request.", DURATION_BUCKETS),
+        "http_response_render_seconds": (
+            "Time spent rendering templates and serialized API responses.",
+            DURATION_BUCKETS,
+        ),
+        "http_response_size_bytes": ("Response body size on the wire.", SIZE_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._requests = {}
+
+    def observe(self, name, labels, value):
+        buckets = self.histograms[name][1]
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = Histogram(buckets)
+            histogram.counts[index] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def count_request(self, labels):
+        with self._lock:
+            self._requests[labels] = self._requests.get(labels, 0) + 1
+
+    def render(self):
+        with self._lock:
+            histograms = {
+                key: (list(h.counts), h.sum, h.count)
+                for key, h in self._histograms.items()
+            }
+            requests = dict(self._requests)
+
+        lines = [
+            "# HELP http_requests_total Requests handled, by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for labels, value in sorted(requests.items()):
+            lines.append(f"http_requests_total{format_labels(labels)} {value}")
+        for name, (help_text, buckets) in self.histograms.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    le = format_labels(labels + (("le", str(bound)),))
+                    lines.append(f"{name}_bucket{le} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+@functools.cache
+def get_registry():
+    return Registry()
+
+
+@receiver(setting_changed)
+def reset_registry(setting, **kwargs):
+    if setting == "METRICS_ENABLED":
+        get_registry.cache_clear()
+
+
+class RequestMetrics:
+    """What one request cost; collected while it is current."""
+
+    __slots__ = (
+        "started",
+        "queries",
+        "db_time",
+        "sql",
+        "render_started",
+        "render_time",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.sql = []
+        self.render_started = None
+        self.render_time = 0.0
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if len(self.sql) < settings.METRICS_SLOW_REQUEST_MAX_QUERIES:
+            self.sql.append((sql, duration))
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def end_render(self):
+        if self.render_started is not None:
+            self.render_time += time.perf_counter() - self.render_started
+            self.render_started = None
+
+    @staticmethod
+    def current():
+        return _recorder.get()
+
+    def activate(self):
+        return _recorder.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _recorder.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper that charges queries to the current request.
+    Outside an instrumented request it costs one context variable lookup.
+    """
+    metrics = _recorder.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - start)
+
+
+def instrument(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def instrument_connections():
+    """Hook every open connection of this thread; new ones hook themselves."""
+    for connection in connections.all(initialized_only=True):
+        instrument(connection)
+
+
+@receiver(connection_created)
+def instrument_new_connection(sender, connection, **kwargs):
+    if settings.METRICS_ENABLED:
+        instrument(connection)
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.url_name:
+        return UNMATCHED
+    return match.url_name
+
+
+def method_label(request):
+    method = request.method
+    return method if method in KNOWN_METHODS else OTHER_METHOD
+
+
+def record_request(request, response, metrics, size=None):
+    duration = time.perf_counter() - metrics.started
+    view = view_label(request)
+    labels = (("view", view), ("method", method_label(request)))
+    registry = get_registry()
+    registry.count_request(labels + (("status", str(response.status_code)),))
+    registry.observe("http_request_duration_seconds", labels, duration)
+    registry.observe("http_request_db_queries", labels, metrics.queries)
+    registry.observe("http_request_db_seconds", labels, metrics.db_time)
+    registry.observe("http_response_render_seconds", labels, metrics.render_time)
+    if size is not None:
+        registry.observe("http_response_size_bytes", labels, size)
+
+    slow_ms = settings.METRICS_SLOW_REQUEST_MS
+    if slow_ms and duration * 1000 >= slow_ms:
+        logger.warning(
+            "Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms, "
+            "render %.0f ms\n%s",
+            request.method,
+            request.get_full_path(),
+            view,
+            duration * 1000,
+            metrics.queries,
+            metrics.db_time * 1000,
+            metrics.render_time * 1000,
+            "\n".join(f"  {took * 1000:.1f} ms: {sql}" for sql, took in metrics.sql),
+        )
+
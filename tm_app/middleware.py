@@ -0,0 +1,204 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .compression import (
+    PaddedGzipCodec,
+    acompress_stream,
+    compress_stream,
+    negotiate,
+)
+from .metrics import RequestMetrics, instrument_connections, record_request
+from .replicas import ReadRouting, is_pinned, pick_replica, pin_to_primary, uses_replica
+
+# Media types that are already compressed or must reach the client unbuffered.
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "font/")
+
+# Pages that mix secrets such as CSRF tokens with reflected input. They are
+# only sent as padded gzip, so their compressed length leaks less (BREACH).
+PADDED_CONTENT_TYPES = ("text/html",)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    ``GZipMiddleware`` with negotiation: picks the best of
+    ``RESPONSE_COMPRESSION_ENCODINGS`` the client accepts (zstd and brotli
+    when their packages are installed), leaves bodies under
+    ``RESPONSE_COMPRESSION_MIN_SIZE`` alone and compresses streaming
+    responses as they are produced, as a single stream rather than one
+    member per chunk. HTML only gets gzip, padded with random bytes as
+    ``GZipMiddleware`` does. Place it above anything that reads the response
+    body.
+    """
+
+    padded_codec = PaddedGzipCodec()
+
+    def should_compress(self, response):
+        if response.has_header("Content-Encoding"):
+            return False
+        if "no-transform" in response.get("Cache-Control", "").lower():
+            return False
+        if response.get("Content-Type", "").lower().startswith(SKIP_CONTENT_TYPES):
+            return False
+        if response.streaming:
+            return True
+        return len(response.content) >= settings.RESPONSE_COMPRESSION_MIN_SIZE
+
+    def process_response(self, request, response):
+        if not self.should_compress(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encodings = settings.RESPONSE_COMPRESSION_ENCODINGS
+        padded = (
+            response.get("Content-Type", "").lower().startswith(PADDED_CONTENT_TYPES)
+        )
+        if padded:
+            encodings = [name for name in encodings if name == self.padded_codec.name]
+        codec = negotiate(request.META.get("HTTP_ACCEPT_ENCODING"), encodings)
+        if codec is None:
+            return response
+        if padded:
+            codec = self.padded_codec
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(
+                    codec, response.streaming_content
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    codec, response.streaming_content
+                )
+            # The compressed size is only known once the stream ends.
+            del response.headers["Content-Length"]
+        else:
+            compressed = codec.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # A strong ETag names exact bytes; the compressed body only matches
+        # weakly (RFC 9110, 8.8.1).
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = codec.name
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Records each request's duration, SQL query count and time, render time
+    and response size per route name (see ``tm_app.metrics``) when
+    ``METRICS_ENABLED``; otherwise it removes itself from the stack. Put it
+    first so its timings cover the other middleware and sizes are what went
+    over the wire. Streaming bodies are not sized.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = metrics.activate()
+        instrument_connections()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        record_request(request, response, metrics, self.response_size(response))
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = metrics.activate()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        record_request(request, response, metrics, self.response_size(response))
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = RequestMetrics.current()
+        if metrics is not None:
+            metrics.start_render()
+            response.add_post_render_callback(lambda rendered: metrics.end_render())
+        return response
+
+    def response_size(self, response):
+        if response.streaming:
+            return None
+        return len(response.content)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe requests to views with ``use_replica`` (``ReplicaReadMixin``)
+    read from one of ``DATABASE_REPLICAS`` through ``ReplicaRouter``. A
+    successful write pins the client to the primary with a short-lived
+    cookie, so it reads its own writes while the replicas catch up. Not
+    used when no replicas are configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        request.read_routing = ReadRouting()
+        token = request.read_routing.activate()
+        try:
+            response = self.get_response(request)
+        finally:
+            request.read_routing.deactivate(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        request.read_routing = ReadRouting()
+        token = request.read_routing.activate()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request.read_routing.deactivate(token)
+        return self.finish(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ("GET", "HEAD", "OPTIONS")
+            and uses_replica(view_func)
+            and not is_pinned(request)
+        ):
+            # Set on the shared state object: in async stacks this method runs
+            # in a worker thread with a copy of the request's context.
+            request.read_routing.alias = pick_replica()
+
+    def finish(self, request, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE") and (
+            response.status_code < 400
+        ):
+            pin_to_primary(response)
+        return response
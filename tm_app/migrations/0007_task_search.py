@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from tm_app.search import install_sqlite_index, uninstall_sqlite_index
+
+
+def create_search_index(apps, schema_editor):
+    install_sqlite_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    uninstall_sqlite_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tm_app", "0006_task_sync"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
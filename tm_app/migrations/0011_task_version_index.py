@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tm_app', '0010_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['version'], name='task_version_idx'),
+        ),
+    ]
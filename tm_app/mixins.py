@@ -1,19 +1,33 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.settings import api_settings
 
 CustomUser = get_user_model()
+from django.contrib import messages
 from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin
-from django.http import HttpResponseForbidden
+from django.http import Http404, HttpResponseForbidden, JsonResponse
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    quote_etag,
+)
+from django.utils.http import http_date
+
+from .pagination import KeysetPage, decode_cursor, encode_cursor, keyset_page
 
 
 class JWTAuthMixin:
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
     permission_classes = [IsAuthenticated]
 
 
 class NoAuthMixin:
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
     permission_classes = [AllowAny]
 
 
@@ -31,6 +45,72 @@ class AllowAnyForListMixin:
         return super().get_permissions()
 
 
+def change_etag(request, version, media_type):
+    """
+    ETag for ``version`` of the resource at ``request``'s URL, as seen by
+    its user in ``media_type``.
+    """
+    variant = "|".join((str(request.user.pk), request.get_full_path(), media_type))
+    digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+    return quote_etag(f"{version}-{digest}")
+
+
+def not_modified_response(request, etag, last_modified):
+    """304 (or 412) when the client's copy is current, otherwise ``None``."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def add_validators(response, etag, last_modified):
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(int(last_modified.timestamp()))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional GETs from a cheap change marker before the handler
+    runs, so an unchanged resource costs one lookup instead of a query and
+    a render.
+
+    Views return ``(version, last_modified)`` from ``get_change_marker`` and
+    wrap their handler in ``conditional_get``. The ETag also covers the
+    user, URL and media type, so the same version never matches a
+    different body.
+    """
+
+    def get_change_marker(self):
+        return None
+
+    def get_etag(self, version):
+        return change_etag(self.request, version, self.request.accepted_media_type)
+
+    def conditional_get(self, handler, *args, **kwargs):
+        marker = self.get_change_marker()
+        if marker is None:
+            return handler(*args, **kwargs)
+
+        version, last_modified = marker
+        etag = self.get_etag(version)
+        response = not_modified_response(self.request, etag, last_modified)
+        if response is None:
+            response = handler(*args, **kwargs)
+            if not 200 <= response.status_code < 300:
+                return response
+        return add_validators(response, etag, last_modified)
+
+
+class ReplicaReadMixin:
+    """
+    Mark a view as read-only so its GET/HEAD requests may read from a
+    replica (see ``ReplicaRoutingMiddleware``).
+    """
+
+    use_replica = True
+
+
 class SuperAdminRequiredMixin(LoginRequiredMixin, AccessMixin):
     """Allow only SuperAdmin users to access the view."""
 
@@ -54,3 +134,112 @@ class Admin_or_SuperAdminRequiredMixin(LoginRequiredMixin, AccessMixin):
         }:
             return HttpResponseForbidden("You are not authorized to access this page.")
         return super().dispatch(request, *args, **kwargs)
+
+
+class AcceptedResponseMixin:
+    """
+    Answer a request whose work carries on in the background: ``202
+    Accepted`` with a link to poll for clients that ask for JSON, otherwise
+    a redirect with a flash message, as the HTML forms expect.
+    """
+
+    def accepted(self, status_url, message, redirect_url, **data):
+        preferred = self.request.get_preferred_type(["text/html", "application/json"])
+        if preferred == "application/json":
+            response = JsonResponse({**data, "status_url": status_url}, status=202)
+            response["Location"] = status_url
+            return response
+        messages.info(self.request, message)
+        return redirect(redirect_url)
+
+    def job_accepted(self, job, message, redirect_url):
+        # With JOBS_RUN_INLINE the job may already have run since it was queued.
+        job.refresh_from_db()
+        return self.accepted(
+            reverse("job-status", args=[job.pk]),
+            message,
+            redirect_url,
+            job=job.pk,
+            status=job.status,
+        )
+
+
+class KeysetPaginationMixin:
+    """Paginate a ListView with keyset cursors instead of LIMIT/OFFSET."""
+
+    keyset_ordering = ("id",)
+    paginate_by = settings.LIST_PAGE_SIZE
+    max_paginate_by = settings.LIST_MAX_PAGE_SIZE
+    page_kwarg = "cursor"
+    page_size_kwarg = "page_size"
+
+    def get_paginate_by(self, queryset):
+        try:
+            page_size = int(self.request.GET[self.page_size_kwarg])
+        except (KeyError, ValueError):
+            return self.paginate_by
+        if page_size <= 0:
+            return self.paginate_by
+        return min(page_size, self.max_paginate_by)
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_keyset_ordering()
+        cursor = self.request.GET.get(self.page_kwarg)
+        if cursor:
+            try:
+                cursor = decode_cursor(cursor, ordering, queryset.model)
+            except ValueError:
+                raise Http404("Invalid cursor")
+
+        rows, next_position, previous_position = keyset_page(
+            queryset, ordering, cursor, page_size
+        )
+        page = KeysetPage(
+            rows,
+            next_url=self.get_page_url(next_position),
+            previous_url=self.get_page_url(previous_position, reverse=True),
+        )
+        return (None, page, rows, page.has_other_pages())
+
+    def get_page_url(self, position, reverse=False):
+        if position is None:
+            return None
+        params = self.request.GET.copy()
+        params[self.page_kwarg] = encode_cursor(position, reverse=reverse)
+        return f"?{params.urlencode()}"
+
+
+class FilterFormMixin:
+    """Narrow a ListView's queryset in SQL from a GET filter form."""
+
+    filter_form_class = None
+
+    def get_filter_form(self):
+        if not hasattr(self, "_filter_form"):
+            self._filter_form = self.filter_form_class(
+                self.request.GET or None, user=self.request.user
+            )
+        return self._filter_form
+
+    def filter_queryset(self, queryset):
+        form = self.get_filter_form()
+        if form.is_bound and form.is_valid():
+            return form.filter_queryset(queryset)
+        return queryset
+
+    def get_keyset_ordering(self):
+        # Forms that rank results (e.g. a search box) decide the ordering.
+        form = self.get_filter_form()
+        if form.is_bound and form.is_valid():
+            ordering = getattr(form, "get_ordering", lambda: None)()
+            if ordering:
+                return ordering
+        return super().get_keyset_ordering()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["filter_form"] = self.get_filter_form()
+        return context
@@ -1,7 +1,10 @@
+import zlib
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
-from .managers import CustomUserManager
+from .managers import CustomUserManager, TaskQuerySet
 
 
 class CustomUser(AbstractUser):
@@ -50,6 +53,304 @@ class Task(models.Model):
     worked_hours = models.DecimalField(
         max_digits=5, decimal_places=2, null=True, blank=True
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Value of the global task change counter at this task's last write.
+    version = models.PositiveBigIntegerField(default=0, editable=False)
+
+    objects = TaskQuerySet.as_manager()
+
+    # Fields the denormalized statistics in UserTaskStats are derived from.
+    TRACKED_FIELDS = ("assigned_to_id", "status", "worked_hours", "due_date")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["assigned_to", "status", "due_date"],
+                name="task_assignee_status_due_idx",
+            ),
+            models.Index(
+                fields=["assigned_to", "due_date", "id"],
+                name="task_assignee_due_idx",
+            ),
+            models.Index(fields=["status", "due_date"], name="task_status_due_idx"),
+            models.Index(fields=["due_date", "id"], name="task_due_idx"),
+            models.Index(
+                fields=["assigned_to", "version"], name="task_assignee_version_idx"
+            ),
+            models.Index(fields=["version"], name="task_version_idx"),
+            models.Index(
+                fields=["assigned_to", "due_date"],
+                name="task_completed_assignee_idx",
+                condition=models.Q(status="completed"),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.assigned_to.username})"
+
+    def save(self, *args, **kwargs):
+        from .sync import next_version
+
+        # Keep the change-counter bump and the row write in one transaction
+        # so versions become visible in the order they were handed out.
+        with transaction.atomic(using=kwargs.get("using")):
+            self.version = next_version()
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {
+                    *kwargs["update_fields"],
+                    "version",
+                    "updated_at",
+                }
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_state = instance.tracked_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_state = self.tracked_state()
+
+    def tracked_state(self):
+        """
+        Return the current values of ``TRACKED_FIELDS``, or None when any of
+        them is deferred and would need a query to read.
+        """
+        if self.get_deferred_fields().intersection(self.TRACKED_FIELDS):
+            return None
+        return {field: getattr(self, field) for field in self.TRACKED_FIELDS}
+
+
+class UserTaskStats(models.Model):
+    """
+    Per-user task counters kept in step with ``Task`` writes by the signal
+    handlers and ``TaskQuerySet`` overrides in ``tm_app.stats``.
+    """
+
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="task_stats",
+    )
+    pending_count = models.PositiveIntegerField(default=0)
+    in_progress_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    worked_task_count = models.PositiveIntegerField(default=0)
+    total_worked_hours = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0
+    )
+
+    @property
+    def task_count(self):
+        return self.pending_count + self.in_progress_count + self.completed_count
+
+    @property
+    def average_worked_hours(self):
+        if not self.worked_task_count:
+            return None
+        return self.total_worked_hours / self.worked_task_count
+
+    def __str__(self):
+        return f"Task stats for user {self.user_id}"
+
+
+class OpenTaskDueCount(models.Model):
+    """
+    Number of not-yet-completed tasks per user and due date.
+
+    Overdue counts depend on today's date, so they can't be stored as a
+    single counter; summing the buckets before today gives the overdue count
+    without scanning ``Task``.
+    """
+
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="open_task_due_counts"
+    )
+    due_date = models.DateField()
+    open_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "due_date"], name="unique_open_task_due_count"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.open_count} open tasks due {self.due_date} for user {self.user_id}"
+
+
+class ArchivedTask(models.Model):
+    """
+    Cold storage for completed tasks moved out of ``Task`` by the
+    ``archive_tasks`` command. Rows keep their original id; long reports may
+    be stored zlib-compressed in ``compressed_report`` instead of
+    ``completion_report``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    assigned_to = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="archived_tasks"
+    )
+    due_date = models.DateField()
+    status = models.CharField(
+        max_length=20, choices=Task.Status.choices, default=Task.Status.COMPLETED
+    )
+    completion_report = models.TextField(blank=True, null=True)
+    compressed_report = models.BinaryField(null=True, editable=False)
+    worked_hours = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True
+    )
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["assigned_to", "due_date", "id"],
+                name="archived_assignee_due_idx",
+            ),
+            models.Index(fields=["due_date", "id"], name="archived_due_idx"),
+        ]
+
+    @property
+    def report(self):
+        if self.compressed_report is not None:
+            return zlib.decompress(self.compressed_report).decode()
+        return self.completion_report
+
+    def __str__(self):
+        return self.title
+
+
+class UserDeletion(models.Model):
+    """
+    Progress of a chunked background delete of a user or admin. Kept after
+    the user row is gone, so it refers to the user by id and username.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    user_id = models.BigIntegerField()
+    username = models.CharField(max_length=150)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    total_tasks = models.PositiveIntegerField(default=0)
+    deleted_tasks = models.PositiveIntegerField(default=0)
+    total_users = models.PositiveIntegerField(default=0)
+    released_users = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "user_id"], name="user_deletion_status_idx")
+        ]
+
+    @property
+    def progress(self):
+        """Percentage of tasks removed and managed users released so far."""
+        if self.status == self.Status.DONE:
+            return 100
+        total = self.total_tasks + self.total_users
+        if not total:
+            return 0
+        return min(99, 100 * (self.deleted_tasks + self.released_users) // total)
+
+    def __str__(self):
+        return f"Deletion of {self.username} ({self.status})"
+
+
+class Job(models.Model):
+    """
+    A unit of work queued for the ``run_jobs`` worker. ``kind`` names the
+    handler in ``tm_app.jobs.JOB_HANDLERS`` and ``payload`` is its input;
+    ``result`` holds what the handler returned once it is done.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=1)
+    # Not picked up before this time; pushed back between retries.
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=200, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "run_after"], name="job_status_run_after_idx"
+            )
+        ]
+
+    @property
+    def finished(self):
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+    def __str__(self):
+        return f"{self.kind} job {self.pk} ({self.status})"
+
+
+class ChangeCounter(models.Model):
+    """Named monotonic counters, e.g. the task change version."""
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}={self.value}"
+
+
+class TaskTombstone(models.Model):
+    """
+    Marks a task that left a user's list (deleted or reassigned) at a given
+    change version, so delta sync can tell clients to drop it.
+    """
+
+    task_id = models.BigIntegerField()
+    user_id = models.BigIntegerField()
+    version = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user_id", "version"], name="tombstone_user_version_idx"
+            ),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} removed for user {self.user_id} at {self.version}"
@@ -0,0 +1,253 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(position, reverse=False):
+    payload = {"p": position}
+    if reverse:
+        payload["r"] = 1
+    raw = json.dumps(payload, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, fields, model=None):
+    """
+    Return ``(position, reverse)`` for an encoded cursor.
+
+    Raises ``ValueError`` when the cursor is malformed or does not match the
+    ordering ``fields``. With ``model`` each value is also converted by its
+    field, so a tampered cursor never reaches the query.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position = payload["p"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, list) or len(position) != len(fields):
+        raise ValueError("Invalid cursor")
+    if model is not None:
+        position = [
+            _position_value(model, field, value)
+            for field, value in zip(fields, position)
+        ]
+    return position, bool(payload.get("r"))
+
+
+def _ordering_field(model, path):
+    field = None
+    for name in path.split("__"):
+        if field is not None:
+            model = field.related_model
+        field = model._meta.get_field(name)
+    return field
+
+
+def _position_value(model, path, value):
+    if value is None:
+        raise ValueError("Invalid cursor")
+    try:
+        field = _ordering_field(model, path)
+    except FieldDoesNotExist:
+        # An annotation, e.g. the search rank; those are all numbers.
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("Invalid cursor")
+        return value
+    try:
+        return field.to_python(value)
+    except (ValidationError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_q(fields, position, reverse=False):
+    """
+    Build the row-comparison filter ``(f1, f2, ...) > (v1, v2, ...)``
+    (or ``<`` when ``reverse``) as an OR of equality prefixes.
+    """
+    lookup = "lt" if reverse else "gt"
+    condition = Q()
+    for index, field in enumerate(fields):
+        step = Q(**{f"{field}__{lookup}": position[index]})
+        for prev_field, prev_value in zip(fields[:index], position[:index]):
+            step &= Q(**{prev_field: prev_value})
+        condition |= step
+    return condition
+
+
+def _keyset_slice(queryset, fields, cursor, page_size):
+    position, reverse = cursor if cursor else (None, False)
+    ordering = [f"-{field}" for field in fields] if reverse else list(fields)
+    queryset = queryset.order_by(*ordering)
+    if position is not None:
+        queryset = queryset.filter(keyset_q(fields, position, reverse))
+    return queryset[: page_size + 1]
+
+
+def _keyset_result(rows, fields, cursor, page_size):
+    position, reverse = cursor if cursor else (None, False)
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+
+    def key(row):
+        if isinstance(row, dict):
+            return [row[field] for field in fields]
+        return [getattr(row, field) for field in fields]
+
+    next_position = previous_position = None
+    if rows:
+        if has_more or reverse:
+            next_position = key(rows[-1])
+        if position is not None and (has_more or not reverse):
+            previous_position = key(rows[0])
+    return rows, next_position, previous_position
+
+
+def keyset_page(queryset, fields, cursor, page_size):
+    """
+    Slice one page out of ``queryset`` ordered by ``fields``.
+
+    Returns ``(rows, next_position, previous_position)`` where the positions
+    are ``None`` when there is nothing further in that direction. Every page
+    is a single indexed range scan, so deep pages cost the same as the first.
+    """
+    rows = list(_keyset_slice(queryset, fields, cursor, page_size))
+    return _keyset_result(rows, fields, cursor, page_size)
+
+
+async def akeyset_page(queryset, fields, cursor, page_size):
+    """``keyset_page`` for async views, fetching with the async ORM."""
+    rows = [row async for row in _keyset_slice(queryset, fields, cursor, page_size)]
+    return _keyset_result(rows, fields, cursor, page_size)
+
+
+class KeysetPage:
+    """Template-facing page for keyset-paginated ``ListView``s."""
+
+    def __init__(self, object_list, next_url=None, previous_url=None):
+        self.object_list = object_list
+        self.next_url = next_url
+        self.previous_url = previous_url
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_url is not None
+
+    def has_previous(self):
+        return self.previous_url is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique, stable ordering.
+
+    Unlike ``CursorPagination`` the cursor carries the full ordering tuple, so
+    ties on the leading field never fall back to an offset scan.
+    """
+
+    ordering = ("id",)
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 100
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor, page_size = self.start(request, queryset.model)
+        rows, self.next_position, self.previous_position = keyset_page(
+            queryset, self.ordering, cursor, page_size
+        )
+        return rows
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        cursor, page_size = self.start(request, queryset.model)
+        rows, self.next_position, self.previous_position = await akeyset_page(
+            queryset, self.ordering, cursor, page_size
+        )
+        return rows
+
+    def start(self, request, model):
+        """Remember the request and return its ``(cursor, page_size)``."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                cursor = decode_cursor(cursor, self.ordering, model)
+            except ValueError:
+                raise NotFound("Invalid cursor")
+        return cursor, self.get_page_size(request)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encode_cursor(self.next_position)
+        )
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            encode_cursor(self.previous_position, reverse=True),
+        )
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class TaskCursorPagination(KeysetPagination):
+    ordering = ("due_date", "id")
+    page_size = settings.TASK_API_PAGE_SIZE
+    max_page_size = settings.TASK_API_MAX_PAGE_SIZE
+
+
+class TaskSearchPagination(TaskCursorPagination):
+    # Best matches first; see tm_app.search.RANK_ORDERING.
+    ordering = ("search_rank", "id")
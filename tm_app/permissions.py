@@ -1,5 +1,7 @@
 from rest_framework.permissions import BasePermission
 
+from .scopes import get_role_scope
+
 
 class IsAdminOrSuperAdmin(BasePermission):
     def has_permission(self, request, view):
@@ -16,19 +18,9 @@ class IsSuperUserAssignedUserOrAdminOfAssignedUser(BasePermission):
         return request.user and request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
-        user = request.user
-        if user.user_type == 1:
-            return True
-        if obj.assigned_to == user:
+        if obj.assigned_to_id == request.user.pk:
             return True
-        if (
-            user.user_type == 2
-            and getattr(obj.assigned_to, "assigned_admin", None) == user
-        ):
-            print("Admin has access to the task.")
-            return True
-
-        return False
+        return get_role_scope(request).allows(obj.assigned_to_id)
 
     def has_delete_permission(self, request, view, obj):
         user = request.user
@@ -0,0 +1,189 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Job
+from .scopes import invalidate_role_scope
+
+CustomUser = get_user_model()
+
+DEFAULT_PASSWORD = "Testpassword@123"
+
+USER_TYPES = {
+    "admin": CustomUser.UserType.ADMIN,
+    "user": CustomUser.UserType.USER,
+    str(CustomUser.UserType.ADMIN.value): CustomUser.UserType.ADMIN,
+    str(CustomUser.UserType.USER.value): CustomUser.UserType.USER,
+}
+
+
+def load_records(stream, file_format):
+    """
+    Parse a CSV (with a header row) or JSON (a list of objects) upload into
+    a list of dicts with ``username``, ``email``, ``user_type``, ``password``
+    and ``assigned_admin`` keys; only ``username`` is required.
+    """
+    if isinstance(stream, (bytes, bytearray)):
+        stream = stream.decode("utf-8-sig")
+    if isinstance(stream, str):
+        stream = io.StringIO(stream)
+
+    if file_format == "json":
+        records = json.load(stream)
+        if not isinstance(records, list) or not all(
+            isinstance(record, dict) for record in records
+        ):
+            raise ValidationError("Expected a JSON list of user objects.")
+        return records
+    return list(csv.DictReader(stream))
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hash ``passwords`` with the configured hasher, spreading the work over a
+    process pool. The hashes are as strong as ``set_password`` would make
+    them; only the wall-clock time changes.
+    """
+    passwords = list(passwords)
+    workers = workers or settings.USER_PROVISIONING_WORKERS or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def _clean(records):
+    username_field = CustomUser._meta.get_field("username")
+    usernames = [str(record.get("username") or "").strip() for record in records]
+    existing = set(
+        CustomUser.objects.filter(username__in=usernames).values_list(
+            "username", flat=True
+        )
+    )
+    admin_names = {
+        str(record.get("assigned_admin") or "").strip() for record in records
+    } - {""}
+    admins = dict(
+        CustomUser.objects.filter(
+            username__in=admin_names, user_type=CustomUser.UserType.ADMIN
+        ).values_list("username", "pk")
+    )
+
+    cleaned, errors, seen = [], [], set()
+    batch_admins = {
+        username
+        for username, record in zip(usernames, records)
+        if USER_TYPES.get(str(record.get("user_type") or "user").strip().lower())
+        == CustomUser.UserType.ADMIN
+    }
+    for row, (username, record) in enumerate(zip(usernames, records), start=1):
+        row_errors = []
+        try:
+            username_field.clean(username, None)
+        except ValidationError as exc:
+            row_errors.extend(exc.messages)
+        if username in existing or username in seen:
+            row_errors.append(f"Username '{username}' already exists.")
+        seen.add(username)
+
+        user_type = USER_TYPES.get(
+            str(record.get("user_type") or "user").strip().lower()
+        )
+        if user_type is None:
+            row_errors.append(f"Unknown user type '{record.get('user_type')}'.")
+
+        admin = str(record.get("assigned_admin") or "").strip()
+        if admin and user_type == CustomUser.UserType.ADMIN:
+            row_errors.append("Admins cannot have an assigned admin.")
+        elif admin and admin not in admins and admin not in batch_admins:
+            row_errors.append(f"Admin '{admin}' does not exist.")
+
+        if row_errors:
+            errors.append((row, row_errors))
+            continue
+        cleaned.append(
+            {
+                "username": username,
+                "email": str(record.get("email") or "").strip(),
+                "user_type": user_type,
+                "password": str(record.get("password") or "") or DEFAULT_PASSWORD,
+                "assigned_admin": admin or None,
+            }
+        )
+    return cleaned, errors, admins
+
+
+def check_records(records):
+    """
+    The ``(row_number, messages)`` errors ``provision_users`` would report
+    for ``records``, without hashing any password.
+    """
+    return _clean(records)[1]
+
+
+def provision_users(records, workers=None):
+    """
+    Validate and create ``records`` (see ``load_records``) in one
+    transaction. Returns ``(created_users, errors)`` where ``errors`` is a
+    list of ``(row_number, messages)``; nothing is written if any row fails.
+    """
+    cleaned, errors, admins = _clean(records)
+    if errors:
+        return [], errors
+
+    hashes = hash_passwords([record.pop("password") for record in cleaned], workers)
+    new_admins, new_users, admin_names = [], [], []
+    for record, password in zip(cleaned, hashes):
+        admin_name = record.pop("assigned_admin")
+        user = CustomUser(password=password, **record)
+        if user.user_type == CustomUser.UserType.ADMIN:
+            new_admins.append(user)
+        else:
+            new_users.append(user)
+            admin_names.append(admin_name)
+
+    with transaction.atomic():
+        # Admins first, so users in the same upload can point at them.
+        for admin in CustomUser.objects.bulk_create(new_admins, batch_size=1000):
+            admins[admin.username] = admin.pk
+        for user, admin_name in zip(new_users, admin_names):
+            if admin_name:
+                user.assigned_admin_id = admins[admin_name]
+        CustomUser.objects.bulk_create(new_users, batch_size=1000)
+    invalidate_role_scope(*{user.assigned_admin_id for user in new_users})
+    return new_admins + new_users, []
+
+
+def provision_users_job(job):
+    """
+    Create the users of an upload ``BulkUserUploadView`` queued. The rows
+    are checked again, since usernames may have been taken meanwhile. The
+    payload holds the uploaded passwords, so it is emptied before anything
+    can fail; such jobs get one attempt, as a retry would find no rows.
+    """
+    Job.objects.filter(pk=job.pk).update(payload={})
+    users, errors = provision_users(job.payload.get("records", []))
+    return {
+        "created": len(users),
+        "errors": [
+            f"Row {row}: {' '.join(row_errors)}" for row, row_errors in errors
+        ],
+    }
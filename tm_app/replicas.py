@@ -0,0 +1,93 @@
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Clients carrying this cookie wrote recently and read from the primary.
+PIN_COOKIE = "db_primary_pin"
+
+# Apps whose rows say who the client is. A replica that has not seen a new
+# session yet would log the client out, so these are always read from the
+# primary, as is the user model.
+PRIMARY_APP_LABELS = frozenset(["sessions"])
+
+_routing = contextvars.ContextVar("replica_routing", default=None)
+
+
+class ReadRouting:
+    """Where the current request's reads go; ``None`` means the primary."""
+
+    __slots__ = ("alias",)
+
+    def __init__(self):
+        self.alias = None
+
+    def activate(self):
+        return _routing.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _routing.reset(token)
+
+
+def pick_replica():
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def is_pinned(request):
+    return PIN_COOKIE in request.COOKIES
+
+
+def pin_to_primary(response):
+    """Send the client's reads to the primary until replicas have caught up."""
+    response.set_cookie(
+        PIN_COOKIE,
+        "1",
+        max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+        httponly=True,
+        samesite="Lax",
+    )
+
+
+def uses_replica(view_func):
+    view_class = getattr(view_func, "view_class", None) or getattr(
+        view_func, "cls", None
+    )
+    return getattr(view_class, "use_replica", False)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica ``ReplicaRoutingMiddleware`` picked for the
+    current request, if any, and everything else to the primary. Reads
+    inside a transaction on the primary stay there, so a view never mixes
+    its own uncommitted writes with a replica's older snapshot. Sessions
+    and users are never read from a replica (see ``PRIMARY_APP_LABELS``).
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or routing.alias is None:
+            return DEFAULT_DB_ALIAS
+        if (
+            model._meta.app_label in PRIMARY_APP_LABELS
+            or model._meta.label_lower == settings.AUTH_USER_MODEL.lower()
+        ):
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return routing.alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary and get its schema with its data.
+        return db not in settings.DATABASE_REPLICAS
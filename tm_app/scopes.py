@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+CustomUser = get_user_model()
+
+
+def _cache_key(user_id):
+    return f"tm_app:role-scope:{user_id}"
+
+
+class RoleScope:
+    """
+    The set of user ids whose tasks ``user`` may see: everyone for a
+    superadmin (``user_ids is None``), their managed users for an admin and
+    themselves for a user.
+    """
+
+    def __init__(self, user, user_ids):
+        self.user = user
+        self.user_ids = user_ids
+
+    @property
+    def unrestricted(self):
+        return self.user_ids is None
+
+    def allows(self, user_id):
+        return self.user_ids is None or user_id in self.user_ids
+
+    def filter_users(self, queryset, field="pk"):
+        """Restrict ``queryset`` to rows whose ``field`` is a visible user id."""
+        if self.user_ids is None:
+            return queryset
+        if len(self.user_ids) <= settings.ROLE_SCOPE_INLINE_IDS:
+            return queryset.filter(**{f"{field}__in": self.user_ids})
+        # Very large scopes only happen for admins; let the database join
+        # rather than binding tens of thousands of parameters.
+        managed = CustomUser.objects.filter(assigned_admin=self.user.pk).values("pk")
+        return queryset.filter(**{f"{field}__in": managed})
+
+    def filter_tasks(self, queryset):
+        return self.filter_users(queryset, field="assigned_to")
+
+    def users(self):
+        """Visible users as a queryset, or None when unrestricted."""
+        if self.user_ids is None:
+            return None
+        return self.filter_users(CustomUser.objects.all())
+
+
+def _resolve_user_ids(user):
+    if user.user_type == CustomUser.UserType.SUPERADMIN:
+        return None
+    if user.user_type != CustomUser.UserType.ADMIN:
+        return frozenset([user.pk])
+
+    timeout = settings.ROLE_SCOPE_CACHE_TIMEOUT
+    user_ids = cache.get(_cache_key(user.pk)) if timeout else None
+    if user_ids is None:
+        user_ids = frozenset(
+            CustomUser.objects.filter(assigned_admin=user.pk).values_list(
+                "pk", flat=True
+            )
+        )
+        if timeout:
+            cache.set(_cache_key(user.pk), user_ids, timeout)
+    return user_ids
+
+
+async def _aresolve_user_ids(user):
+    if user.user_type == CustomUser.UserType.SUPERADMIN:
+        return None
+    if user.user_type != CustomUser.UserType.ADMIN:
+        return frozenset([user.pk])
+
+    timeout = settings.ROLE_SCOPE_CACHE_TIMEOUT
+    user_ids = await cache.aget(_cache_key(user.pk)) if timeout else None
+    if user_ids is None:
+        managed = CustomUser.objects.filter(assigned_admin=user.pk)
+        user_ids = frozenset([pk async for pk in managed.values_list("pk", flat=True)])
+        if timeout:
+            await cache.aset(_cache_key(user.pk), user_ids, timeout)
+    return user_ids
+
+
+def get_role_scope(request):
+    """
+    Return the requester's ``RoleScope``, resolving it at most once per
+    request (and, with ``ROLE_SCOPE_CACHE_TIMEOUT``, once per timeout).
+    """
+    request = getattr(request, "_request", request)
+    scope = getattr(request, "_role_scope", None)
+    if scope is None or scope.user.pk != request.user.pk:
+        scope = RoleScope(request.user, _resolve_user_ids(request.user))
+        request._role_scope = scope
+    return scope
+
+
+async def aget_role_scope(request):
+    """``get_role_scope`` for async views, with the same per-request reuse."""
+    request = getattr(request, "_request", request)
+    scope = getattr(request, "_role_scope", None)
+    if scope is None or scope.user.pk != request.user.pk:
+        scope = RoleScope(request.user, await _aresolve_user_ids(request.user))
+        request._role_scope = scope
+    return scope
+
+
+def invalidate_role_scope(*user_ids):
+    """Drop cached scopes, e.g. for admins whose managed users changed."""
+    keys = [_cache_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
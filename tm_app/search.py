@@ -0,0 +1,166 @@
+import functools
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+SEARCH_FIELDS = ("title", "description", "completion_report")
+# bm25 column weights, in SEARCH_FIELDS order: title hits count the most.
+SEARCH_WEIGHTS = (5.0, 1.0, 1.0)
+# Ordering for ranked results; lower ranks are better matches.
+RANK_ORDERING = ("search_rank", "id")
+
+FTS_TABLE = f"{Task._meta.db_table}_fts"
+
+_COLUMNS = ", ".join(SEARCH_FIELDS)
+_OLD = ", ".join(f"old.{field}" for field in SEARCH_FIELDS)
+_NEW = ", ".join(f"new.{field}" for field in SEARCH_FIELDS)
+
+SQLITE_INDEX_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_COLUMNS},
+        content='{Task._meta.db_table}',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON {Task._meta.db_table} BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, {_COLUMNS}) VALUES (new.id, {_NEW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON {Task._meta.db_table} BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {_COLUMNS})
+        VALUES ('delete', old.id, {_OLD});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF {_COLUMNS} ON {Task._meta.db_table} BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {_COLUMNS})
+        VALUES ('delete', old.id, {_OLD});
+        INSERT INTO {FTS_TABLE} (rowid, {_COLUMNS}) VALUES (new.id, {_NEW});
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install_sqlite_index(schema_editor):
+    """
+    Create (or repair) the FTS5 index and its sync triggers and rebuild its
+    contents. Django's SQLite schema editor recreates ``Task``'s table for
+    some ALTERs, which drops the triggers, so migrations that alter ``Task``
+    should call this again.
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in SQLITE_INDEX_SQL:
+        schema_editor.execute(statement)
+
+
+def uninstall_sqlite_index(schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in SQLITE_DROP_SQL:
+        schema_editor.execute(statement)
+
+
+def search_terms(query):
+    """Split user input into plain words; search syntax is not exposed."""
+    return re.findall(r"\w+", query or "")
+
+
+class BaseSearchBackend:
+    """
+    Filters a ``Task`` queryset to the rows matching ``query`` and annotates
+    ``search_rank`` (lower is better) so callers can order by
+    ``RANK_ORDERING``.
+    """
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Portable fallback: every word must appear in one of the fields. It
+    scans the table and does not rank, so results come back in id order.
+    """
+
+    def search(self, queryset, query):
+        for term in search_terms(query):
+            match = Q()
+            for field in SEARCH_FIELDS:
+                match |= Q(**{f"{field}__icontains": term})
+            queryset = queryset.filter(match)
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    FTS5 index kept in step by triggers. The MATCH drives the query, so only
+    matching rows are read, and bm25 weights title hits over the rest. The
+    last word matches as a prefix for search-as-you-type.
+    """
+
+    def match_expression(self, query):
+        terms = [f'"{term}"' for term in search_terms(query)]
+        if terms:
+            terms[-1] += "*"
+        return " ".join(terms)
+
+    def search(self, queryset, query):
+        weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f"{FTS_TABLE}.rowid = {Task._meta.db_table}.id",
+                f"{FTS_TABLE} MATCH %s",
+            ],
+            params=[self.match_expression(query)],
+        ).annotate(
+            search_rank=RawSQL(
+                f"bm25({FTS_TABLE}, {weights})", (), output_field=FloatField()
+            )
+        )
+
+
+@functools.cache
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_search_backend(using="default"):
+    """``TASK_SEARCH_BACKEND`` if set, otherwise the best one for ``using``."""
+    if settings.TASK_SEARCH_BACKEND:
+        return _load_backend(settings.TASK_SEARCH_BACKEND)
+    if connections[using].vendor == "sqlite":
+        return _load_backend("tm_app.search.SQLiteFTSBackend")
+    return _load_backend("tm_app.search.SimpleSearchBackend")
+
+
+def search_tasks(queryset, query):
+    """Ranked matches for ``query`` within ``queryset``."""
+    if not search_terms(query):
+        return queryset.none().annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+    return get_search_backend(queryset.db).search(queryset, query)
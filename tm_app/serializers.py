@@ -1,12 +1,44 @@
+import decimal
+import functools
+
 from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Task
+from .models import ArchivedTask, Task
 
 User = get_user_model()
 
 
-class TaskSerializer(serializers.ModelSerializer):
+def completion_errors(status_val, data):
+    """
+    Completing a task must come with its report and worked hours in the same
+    write.
+    """
+    errors = {}
+    if status_val == "completed":
+        if "completion_report" not in data:
+            errors["completion_report"] = ["This field is required."]
+        if "worked_hours" not in data:
+            errors["worked_hours"] = ["This field is required."]
+    return errors
+
+
+class SparseFieldsMixin:
+    """
+    Takes a ``fields`` keyword and drops every other field, so a ``?fields=``
+    sparse fieldset only costs the fields that are rendered.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = "__all__"
@@ -14,19 +46,165 @@ class TaskSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         status_val = validated_data.get("status", instance.status)
-        if status_val == "completed":
-            errors = {}
-            if "completion_report" not in validated_data:
-                errors["completion_report"] = ["This field is required."]
-            if "worked_hours" not in validated_data:
-                errors["worked_hours"] = ["This field is required."]
-
-            if errors:
-                raise serializers.ValidationError(errors)
+        errors = completion_errors(status_val, validated_data)
+        if errors:
+            raise serializers.ValidationError(errors)
 
         return super().update(instance, validated_data)
 
 
+@functools.cache
+def task_field_names():
+    """Output fields of ``TaskSerializer``, in order."""
+    return tuple(TaskSerializer().fields)
+
+
+def _date(value):
+    return value.isoformat()
+
+
+def _datetime(value):
+    value = timezone.localtime(value) if timezone.is_aware(value) else value
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _decimal(places):
+    exponent = decimal.Decimal(1).scaleb(-places)
+
+    def convert(value):
+        return f"{value.quantize(exponent):f}"
+
+    return convert
+
+
+def _converter(field):
+    if isinstance(field, models.DateTimeField):
+        return _datetime
+    if isinstance(field, models.DateField):
+        return _date
+    if isinstance(field, models.DecimalField):
+        return _decimal(field.decimal_places)
+    return None
+
+
+class TaskValuesSerializer:
+    """
+    Read-only fast path for task lists. Reads ``.values()`` rows and converts
+    only the dates and decimals, so no model instances or field tree are
+    built; the output matches ``TaskSerializer``'s for the same rows.
+    ``fields`` limits the output to a sparse fieldset.
+    """
+
+    def __init__(self, fields=None):
+        self.fields = tuple(fields or task_field_names())
+        self.converters = [
+            (name, _converter(Task._meta.get_field(name))) for name in self.fields
+        ]
+
+    def values(self, queryset, *extra):
+        """``queryset`` as rows of the output fields plus ``extra`` columns."""
+        return queryset.values(*dict.fromkeys(self.fields + extra))
+
+    def to_representation(self, row):
+        data = {}
+        for name, convert in self.converters:
+            value = row[name]
+            data[name] = value if convert is None or value is None else convert(value)
+        return data
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+def parse_fields(value, allowed):
+    """
+    Split a comma-separated ``?fields=`` value, raising ``ValidationError``
+    for names not in ``allowed``. Empty input means every field.
+    """
+    fields = [name.strip() for name in (value or "").split(",") if name.strip()]
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise serializers.ValidationError(
+            {"fields": [f"Unknown field(s): {', '.join(unknown)}."]}
+        )
+    return tuple(dict.fromkeys(fields)) or None
+
+
+class TaskBulkCreateSerializer(serializers.ModelSerializer):
+    """
+    One item of a bulk create. ``assigned_to`` defaults to the requester and
+    is checked against ``context["assignable_user_ids"]``, which the view
+    loads once for the whole batch.
+    """
+
+    assigned_to = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = Task
+        exclude = ["id"]
+
+    def validate_assigned_to(self, value):
+        if value not in self.context["assignable_user_ids"]:
+            raise serializers.ValidationError("You cannot assign tasks to this user.")
+        return value
+
+    def validate(self, data):
+        if "assigned_to" not in data:
+            data["assigned_to"] = self.context["request"].user.pk
+            # Admins and superadmins have no tasks of their own.
+            if data["assigned_to"] not in self.context["assignable_user_ids"]:
+                raise serializers.ValidationError(
+                    {"assigned_to": ["You cannot assign tasks to yourself."]}
+                )
+        errors = completion_errors(data.get("status"), data)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
+
+
+class TaskBulkPatchListSerializer(serializers.ListSerializer):
+    def validate(self, data):
+        ids = [item["id"] for item in data]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each task may only appear once.")
+        return data
+
+
+class TaskBulkPatchSerializer(serializers.Serializer):
+    """
+    One ``{id, status, completion_report, worked_hours}`` patch of a bulk
+    update, validated against ``context["tasks"]`` (tasks by id, loaded once
+    for the whole batch).
+    """
+
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Task.Status.choices, required=False)
+    completion_report = serializers.CharField(
+        required=False, allow_blank=True, allow_null=True
+    )
+    worked_hours = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False, allow_null=True
+    )
+
+    class Meta:
+        list_serializer_class = TaskBulkPatchListSerializer
+
+    def validate_id(self, value):
+        if value not in self.context["tasks"]:
+            raise serializers.ValidationError("Task not found.")
+        return value
+
+    def validate(self, data):
+        task = self.context["tasks"][data["id"]]
+        errors = completion_errors(data.get("status", task.status), data)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
+
+
 class TaskReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
@@ -41,6 +219,26 @@ class TaskReportSerializer(serializers.ModelSerializer):
         return data
 
 
+class ArchivedTaskSerializer(serializers.ModelSerializer):
+    completion_report = serializers.CharField(source="report", read_only=True)
+
+    class Meta:
+        model = ArchivedTask
+        fields = [
+            "id",
+            "title",
+            "description",
+            "assigned_to",
+            "due_date",
+            "status",
+            "completion_report",
+            "worked_hours",
+            "updated_at",
+            "archived_at",
+        ]
+        read_only_fields = fields
+
+
 class UserSerializer(serializers.ModelSerializer):
     password1 = serializers.CharField(write_only=True, required=True)
     password2 = serializers.CharField(write_only=True, required=True)
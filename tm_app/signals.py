@@ -0,0 +1,95 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .events import publish_task_event
+from .models import CustomUser, Task
+from .scopes import invalidate_role_scope
+from .stats import apply_task_change
+from .sync import record_tombstones
+
+
+def _stored_state(instance):
+    state = getattr(instance, "_loaded_state", None)
+    if state is None and instance.pk is not None:
+        state = (
+            Task._base_manager.filter(pk=instance.pk)
+            .values(*Task.TRACKED_FIELDS)
+            .first()
+        )
+    return state
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_state(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if instance._state.adding:
+        instance._previous_state = None
+    else:
+        instance._previous_state = _stored_state(instance)
+
+
+@receiver(post_save, sender=Task)
+def update_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new_state = instance.tracked_state() or _stored_state(instance)
+    previous_state = getattr(instance, "_previous_state", None)
+    apply_task_change(previous_state, new_state)
+    instance._loaded_state = new_state
+
+    previous_user_id = previous_state and previous_state["assigned_to_id"]
+    if previous_user_id and previous_user_id != new_state["assigned_to_id"]:
+        record_tombstones([(instance.pk, previous_user_id)], version=instance.version)
+    publish_task_event(
+        "created" if created else "updated", instance, previous_user_id or None
+    )
+
+
+@receiver(post_delete, sender=Task)
+def update_stats_on_delete(sender, instance, **kwargs):
+    state = getattr(instance, "_loaded_state", None) or instance.tracked_state()
+    apply_task_change(state, None, create_missing=False)
+    if state:
+        instance.version = record_tombstones([(instance.pk, state["assigned_to_id"])])
+        publish_task_event("deleted", instance)
+
+
+SCOPE_FIELDS = {"assigned_admin", "assigned_admin_id", "user_type"}
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_user_scope(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_admin_id = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not SCOPE_FIELDS.intersection(update_fields):
+        return
+    instance._previous_admin_id = (
+        CustomUser._base_manager.filter(pk=instance.pk)
+        .values_list("assigned_admin_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_scope_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not SCOPE_FIELDS.intersection(update_fields):
+        return
+    invalidate_role_scope(
+        instance.pk,
+        instance.assigned_admin_id,
+        getattr(instance, "_previous_admin_id", None),
+    )
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_scope_on_delete(sender, instance, **kwargs):
+    invalidate_role_scope(instance.pk, instance.assigned_admin_id)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_jwt_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
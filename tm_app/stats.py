@@ -0,0 +1,209 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import OpenTaskDueCount, Task, UserTaskStats
+
+CustomUser = get_user_model()
+
+STATUS_COUNTERS = {
+    Task.Status.PENDING: "pending_count",
+    Task.Status.IN_PROGRESS: "in_progress_count",
+    Task.Status.COMPLETED: "completed_count",
+}
+
+SUMMARY_FIELDS = (
+    "pending_count",
+    "in_progress_count",
+    "completed_count",
+    "worked_task_count",
+    "total_worked_hours",
+)
+
+
+def _contribution(state, sign):
+    deltas = defaultdict(int)
+    counter = STATUS_COUNTERS.get(state["status"])
+    if counter:
+        deltas[counter] += sign
+    if state["worked_hours"] is not None:
+        deltas["worked_task_count"] += sign
+        deltas["total_worked_hours"] += sign * Decimal(str(state["worked_hours"]))
+    return deltas
+
+
+def apply_task_change(old, new, create_missing=True):
+    """
+    Move the statistics from a task's ``old`` tracked state to its ``new``
+    one. Either state may be None for creates and deletes.
+
+    Users without a stats row yet are rebuilt from scratch when
+    ``create_missing`` is set; deletes pass False so a cascading user delete
+    doesn't recreate rows for the user being removed.
+    """
+    apply_task_changes([(old, new)], create_missing=create_missing)
+
+
+def apply_task_changes(changes, create_missing=True):
+    """
+    ``apply_task_change`` for many ``(old, new)`` pairs, with one counter
+    update per affected user rather than per task.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    due_changes = defaultdict(lambda: defaultdict(int))
+    for old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            user_id = state["assigned_to_id"]
+            for field, value in _contribution(state, sign).items():
+                deltas[user_id][field] += value
+            if state["status"] != Task.Status.COMPLETED:
+                due_changes[user_id][state["due_date"]] += sign
+
+    for user_id in set(deltas) | set(due_changes):
+        changes = {field: value for field, value in deltas[user_id].items() if value}
+        due = {day: value for day, value in due_changes[user_id].items() if value}
+        if not changes and not due:
+            continue
+
+        stats = UserTaskStats.objects.filter(user_id=user_id)
+        if changes:
+            exists = stats.update(
+                **{field: F(field) + value for field, value in changes.items()}
+            )
+        else:
+            exists = stats.exists()
+        if not exists:
+            if create_missing:
+                rebuild_user_stats([user_id])
+            continue
+
+        for due_date, value in due.items():
+            updated = OpenTaskDueCount.objects.filter(
+                user_id=user_id, due_date=due_date
+            ).update(open_count=F("open_count") + value)
+            if not updated and value > 0:
+                OpenTaskDueCount.objects.create(
+                    user_id=user_id, due_date=due_date, open_count=value
+                )
+
+
+def rebuild_user_stats(user_ids=None):
+    """
+    Recompute statistics from ``Task`` for ``user_ids``, or for every user
+    when None. Returns the number of stats rows written.
+    """
+    tasks = Task.objects.all()
+    users = CustomUser.objects.all()
+    if user_ids is not None:
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if not user_ids:
+            return 0
+        tasks = tasks.filter(assigned_to_id__in=user_ids)
+        users = users.filter(pk__in=user_ids)
+    else:
+        users = users.filter(tasks__isnull=False).distinct()
+
+    totals = tasks.values("assigned_to_id").annotate(
+        pending_count=Count("pk", filter=Q(status=Task.Status.PENDING)),
+        in_progress_count=Count("pk", filter=Q(status=Task.Status.IN_PROGRESS)),
+        completed_count=Count("pk", filter=Q(status=Task.Status.COMPLETED)),
+        worked_task_count=Count("worked_hours"),
+        total_worked_hours=Sum("worked_hours"),
+    )
+    due_counts = (
+        tasks.exclude(status=Task.Status.COMPLETED)
+        .values("assigned_to_id", "due_date")
+        .annotate(open_count=Count("pk"))
+    )
+
+    with transaction.atomic():
+        existing_users = set(users.values_list("pk", flat=True))
+        totals_by_user = {row.pop("assigned_to_id"): row for row in totals}
+        stats = []
+        for user_id in existing_users:
+            row = totals_by_user.get(user_id, {})
+            row["total_worked_hours"] = row.get("total_worked_hours") or 0
+            stats.append(UserTaskStats(user_id=user_id, **row))
+        due = [
+            OpenTaskDueCount(
+                user_id=row["assigned_to_id"],
+                due_date=row["due_date"],
+                open_count=row["open_count"],
+            )
+            for row in due_counts
+            if row["assigned_to_id"] in existing_users
+        ]
+
+        if user_ids is None:
+            UserTaskStats.objects.all().delete()
+            OpenTaskDueCount.objects.all().delete()
+        else:
+            UserTaskStats.objects.filter(user_id__in=user_ids).delete()
+            OpenTaskDueCount.objects.filter(user_id__in=user_ids).delete()
+        UserTaskStats.objects.bulk_create(stats, batch_size=1000)
+        OpenTaskDueCount.objects.bulk_create(due, batch_size=1000)
+    return len(stats)
+
+
+def _with_averages(row):
+    for field in SUMMARY_FIELDS:
+        row[field] = row.get(field) or 0
+    row["task_count"] = (
+        row["pending_count"] + row["in_progress_count"] + row["completed_count"]
+    )
+    row["average_worked_hours"] = (
+        row["total_worked_hours"] / row["worked_task_count"]
+        if row["worked_task_count"]
+        else None
+    )
+    return row
+
+
+def _summary_annotations():
+    return {field: Sum(field) for field in SUMMARY_FIELDS}
+
+
+def task_summary(users=None):
+    """
+    Totals over the stats rows of ``users`` (a ``CustomUser`` queryset, or
+    None for everyone), including tasks overdue as of today.
+    """
+    stats = UserTaskStats.objects.all()
+    due = OpenTaskDueCount.objects.filter(due_date__lt=timezone.localdate())
+    if users is not None:
+        stats = stats.filter(user__in=users)
+        due = due.filter(user__in=users)
+
+    summary = _with_averages(stats.aggregate(**_summary_annotations()))
+    summary["overdue_count"] = due.aggregate(total=Sum("open_count"))["total"] or 0
+    return summary
+
+
+def task_breakdown(group_by, users=None):
+    """
+    Per-group totals, where ``group_by`` is a lookup from the stats row such
+    as ``"user__username"`` or ``"user__assigned_admin__username"``.
+    """
+    stats = UserTaskStats.objects.all()
+    due = OpenTaskDueCount.objects.filter(due_date__lt=timezone.localdate())
+    if users is not None:
+        stats = stats.filter(user__in=users)
+        due = due.filter(user__in=users)
+
+    overdue = dict(
+        due.values_list(group_by).annotate(total=Sum("open_count")).order_by()
+    )
+    rows = stats.values(group_by).annotate(**_summary_annotations()).order_by(group_by)
+    breakdown = []
+    for row in rows:
+        row = _with_averages(row)
+        row["group"] = row.pop(group_by)
+        row["overdue_count"] = overdue.get(row["group"]) or 0
+        breakdown.append(row)
+    return breakdown
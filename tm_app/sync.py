@@ -0,0 +1,228 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery
+
+from .models import ChangeCounter, CustomUser, Task, TaskTombstone
+
+TASK_COUNTER = "task"
+TOMBSTONES_PRUNED_COUNTER = "task_tombstones_pruned"
+
+# Response header of the first full-list page: the version to pass as
+# ``since`` on the first delta sync after it.
+SYNC_VERSION_HEADER = "X-Sync-Version"
+
+
+def current_version(name=TASK_COUNTER):
+    return (
+        ChangeCounter.objects.filter(name=name).values_list("value", flat=True).first()
+        or 0
+    )
+
+
+async def acurrent_version(name=TASK_COUNTER):
+    """``current_version`` for async views."""
+    return (
+        await ChangeCounter.objects.filter(name=name)
+        .values_list("value", flat=True)
+        .afirst()
+        or 0
+    )
+
+
+def pruned_counter(user_id):
+    """Counter holding the newest pruned tombstone version of ``user_id``."""
+    return f"{TOMBSTONES_PRUNED_COUNTER}:{user_id}"
+
+
+def pruned_version(scope):
+    """Newest tombstone version pruned from any list ``scope`` covers."""
+    counters = ChangeCounter.objects.filter(
+        name__startswith=pruned_counter("")
+    ).order_by()
+    user_ids = scope.user_ids
+    # Very large scopes check every user's counter, which can only err
+    # towards an early 410.
+    if user_ids is not None and len(user_ids) <= settings.ROLE_SCOPE_INLINE_IDS:
+        counters = counters.filter(
+            name__in=[pruned_counter(user_id) for user_id in user_ids]
+        )
+    return counters.aggregate(value=Max("value"))["value"] or 0
+
+
+def next_version(count=1, name=TASK_COUNTER):
+    """
+    Reserve ``count`` versions and return the last one.
+
+    The counter row stays locked until the caller's transaction commits, so
+    concurrent writers are serialized and versions become visible in order.
+    """
+    with transaction.atomic():
+        updated = ChangeCounter.objects.filter(name=name).update(
+            value=F("value") + count
+        )
+        if not updated:
+            ChangeCounter.objects.get_or_create(name=name)
+            ChangeCounter.objects.filter(name=name).update(value=F("value") + count)
+        return ChangeCounter.objects.values_list("value", flat=True).get(name=name)
+
+
+def record_tombstones(pairs, version=None):
+    """
+    Record ``(task_id, user_id)`` pairs as removed from those users' lists
+    and return the version they were recorded at.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return version
+    version = version or next_version()
+    TaskTombstone.objects.bulk_create(
+        TaskTombstone(task_id=task_id, user_id=user_id, version=version)
+        for task_id, user_id in pairs
+    )
+    return version
+
+
+def _list_marker_query(user_id):
+    latest_task = Task.objects.filter(assigned_to=OuterRef("pk")).order_by("-version")
+    latest_tombstone = TaskTombstone.objects.filter(user_id=OuterRef("pk")).order_by(
+        "-version"
+    )
+    return CustomUser.objects.filter(pk=user_id).values_list(
+        Subquery(latest_task.values("version")[:1]),
+        Subquery(latest_task.values("updated_at")[:1]),
+        Subquery(latest_tombstone.values("version")[:1]),
+        Subquery(latest_tombstone.values("deleted_at")[:1]),
+        Subquery(
+            ChangeCounter.objects.filter(name=pruned_counter(user_id)).values(
+                "value"
+            )
+        ),
+    )
+
+
+def _list_marker(row):
+    if row is None:
+        return None
+    task_version, updated_at, tombstone_version, deleted_at, pruned = row
+    candidates = [
+        (version, modified)
+        for version, modified in (
+            (task_version, updated_at),
+            (tombstone_version, deleted_at),
+        )
+        if version is not None
+    ]
+    version, last_modified = max(candidates, default=(0, None))
+    return f"{version}.{pruned or 0}", last_modified
+
+
+def list_marker(user_id):
+    """
+    Return ``(version, last_modified)`` of the newest write to ``user_id``'s
+    task list, or None for an unknown user. One query made of index seeks on
+    ``(assigned_to, version)`` and ``(user_id, version)``; the pruned
+    tombstone version is folded in so pruning never resurrects an old value.
+    """
+    return _list_marker(_list_marker_query(user_id).first())
+
+
+async def alist_marker(user_id):
+    """``list_marker`` for async views."""
+    return _list_marker(await _list_marker_query(user_id).afirst())
+
+
+def changes_since(tasks, scope, since, limit):
+    """
+    Return ``(changed_tasks, deleted_task_ids, version, has_more)`` for the
+    tasks in ``tasks`` written after ``since`` and the tombstones of the
+    users ``scope`` (a ``RoleScope``) covers. ``since=0`` is a full sync:
+    every task, and no tombstones since the client holds nothing yet.
+    Returns None when ``since`` predates tombstones pruned from those
+    users' lists and the client has to start over with a full sync.
+    """
+    if since and since < pruned_version(scope):
+        return None
+
+    version = current_version()
+    tombstones = scope.filter_users(TaskTombstone.objects.all(), field="user_id")
+    if since:
+        tasks = tasks.filter(version__gt=since)
+        tombstones = tombstones.filter(version__gt=since)
+    else:
+        tombstones = tombstones.none()
+    changed = list(
+        tasks.filter(version__lte=version).order_by("version", "id")[: limit + 1]
+    )
+    deleted = list(
+        tombstones.filter(version__lte=version)
+        .order_by("version", "id")
+        .values_list("version", "task_id")[: limit + 1]
+    )
+
+    items = sorted(
+        [(task.version, "changed", task) for task in changed]
+        + [(task_version, "deleted", task_id) for task_version, task_id in deleted],
+        key=lambda item: item[0],
+    )
+    has_more = len(items) > limit
+    if has_more:
+        # The next cursor is "> version", so never split rows sharing one.
+        boundary = items[limit][0]
+        items = [item for item in items[:limit] if item[0] != boundary]
+        if not items:
+            # A single bulk write larger than a page: return all of it.
+            items = [
+                (boundary, "changed", task) for task in tasks.filter(version=boundary)
+            ]
+            items += [
+                (boundary, "deleted", task_id)
+                for task_id in tombstones.filter(version=boundary).values_list(
+                    "task_id", flat=True
+                )
+            ]
+        version = items[-1][0]
+
+    changed_tasks = [item[2] for item in items if item[1] == "changed"]
+    changed_ids = {task.pk for task in changed_tasks}
+    # A task reassigned away and back shows up in both lists; the live row
+    # wins. Across several users' lists one task can also leave twice.
+    deleted_ids = list(
+        dict.fromkeys(
+            item[2]
+            for item in items
+            if item[1] == "deleted" and item[2] not in changed_ids
+        )
+    )
+    return changed_tasks, deleted_ids, version, has_more
+
+
+def prune_tombstones(before):
+    """Delete tombstones older than ``before``; returns the number removed."""
+    with transaction.atomic():
+        stale = TaskTombstone.objects.filter(deleted_at__lt=before)
+        newest = {
+            pruned_counter(user_id): version
+            for user_id, version in stale.order_by()
+            .values("user_id")
+            .annotate(newest=Max("version"))
+            .values_list("user_id", "newest")
+        }
+        if not newest:
+            return 0
+        deleted, _ = stale.delete()
+        # Only the users who lost tombstones have to start over; never move
+        # a counter backwards.
+        pruned = dict(
+            ChangeCounter.objects.filter(name__in=newest).values_list("name", "value")
+        )
+        ChangeCounter.objects.bulk_create(
+            [
+                ChangeCounter(name=name, value=version)
+                for name, version in newest.items()
+                if version > pruned.get(name, 0)
+            ],
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["value"],
+        )
+    return deleted
@@ -0,0 +1,47 @@
+from contextlib import ContextDecorator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class query_budget(ContextDecorator):
+    """
+    Fail when the wrapped block runs more than ``max_queries`` SQL queries.
+
+    Usable as a context manager or as a decorator on a test method::
+
+        with query_budget(3):
+            self.client.get(reverse("all-tasks"))
+
+        @query_budget(3)
+        def test_all_tasks(self):
+            ...
+
+    Unlike ``assertNumQueries`` this is an upper bound, so it keeps passing
+    when a view gets cheaper and only trips on regressions such as an N+1.
+    """
+
+    def __init__(self, max_queries, using=DEFAULT_DB_ALIAS):
+        self.max_queries = max_queries
+        self.using = using
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        executed = len(self.context)
+        if executed > self.max_queries:
+            queries = "\n".join(
+                f"{i}. {query['sql']}"
+                for i, query in enumerate(self.context.captured_queries, start=1)
+            )
+            raise AssertionError(
+                f"{executed} queries executed, budget was {self.max_queries}:\n"
+                f"{queries}"
+            )
+        return False
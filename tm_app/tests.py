@@ -1,3 +1,1621 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import zlib
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .archive import archive_tasks
+from .assignment import reassign_users
+from .authentication import CachedJWTAuthentication
+from .dataset import generate_dataset, parse_status_mix
+from .deletion import request_deletion, run_deletion
+from .events import BaseBroker, get_broker, task_event
+from .jobs import (
+    JOB_HANDLERS,
+    claim_next,
+    enqueue,
+    execute,
+    requeue_stale,
+    result_storage,
+    run_job,
+)
+from .metrics import get_registry
+from .models import (
+    ArchivedTask,
+    CustomUser,
+    Job,
+    OpenTaskDueCount,
+    Task,
+    TaskTombstone,
+    UserDeletion,
+    UserTaskStats,
+)
+from .pagination import TaskCursorPagination, decode_cursor, encode_cursor
+from .replicas import PIN_COOKIE
+from .scopes import RoleScope
+from .serializers import TaskSerializer, TaskValuesSerializer, task_field_names
+from .stats import SUMMARY_FIELDS, rebuild_user_stats
+from .sync import (
+    SYNC_VERSION_HEADER,
+    current_version,
+    prune_tombstones,
+)
+from .testing import query_budget
+from .urls import async_task_urls
+from .views.events import stream_events
+from .views.tasks import TaskReportExportView
+
+TAMPERED_CURSORS = (
+    ["notadate", 1],
+    [None, None],
+    ["2026-01-01", "x"],
+    [["2026-01-01"], 1],
+)
+
+
+def create_tasks(user, count, start=datetime.date(2026, 1, 1)):
+    return [
+        Task.objects.create(
+            title=f"Task {index}",
+            description="",
+            assigned_to=user,
+            due_date=start + datetime.timedelta(days=index % 7),
+        )
+        for index in range(count)
+    ]
+
+
+class KeysetCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        create_tasks(cls.user, 5)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_decode_cursor_converts_values_by_field(self):
+        cursor = encode_cursor(["2026-01-02", "3"])
+        position, reverse = decode_cursor(cursor, ("due_date", "id"), Task)
+        self.assertEqual(position, [datetime.date(2026, 1, 2), 3])
+        self.assertFalse(reverse)
+
+    def test_pages_follow_next_links(self):
+        seen = []
+        url = "/api/tasks/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [task["id"] for task in response.json()["results"]]
+            url = response.json()["next"]
+        expected = self.user.tasks.values_list("id", flat=True)
+        self.assertEqual(sorted(seen), sorted(expected))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_tampered_cursor_is_not_found(self):
+        for position in TAMPERED_CURSORS:
+            with self.subTest(position=position):
+                response = self.client.get(
+                    "/api/tasks/", {"cursor": encode_cursor(position)}
+                )
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json()["detail"], "Invalid cursor")
+
+    def test_tampered_cursor_is_not_found_async(self):
+        factory = APIRequestFactory()
+        queryset = Task.objects.filter(assigned_to=self.user).values("id", "due_date")
+        for position in TAMPERED_CURSORS:
+            with self.subTest(position=position):
+                request = Request(
+                    factory.get("/api/tasks/", {"cursor": encode_cursor(position)})
+                )
+                with self.assertRaises(NotFound):
+                    async_to_sync(TaskCursorPagination().apaginate_queryset)(
+                        queryset, request
+                    )
+
+
+class KeysetListViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = CustomUser.objects.create_user(
+            "boss", password="pw", user_type=CustomUser.UserType.SUPERADMIN
+        )
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        for task in create_tasks(cls.user, 5):
+            task.status = Task.Status.COMPLETED
+            task.worked_hours = 1
+            task.completion_report = "Done"
+            task.save()
+
+    def setUp(self):
+        self.client.force_login(self.superadmin)
+
+    def test_pages_follow_next_links(self):
+        for url in ("/all-tasks/", "/task-report/"):
+            with self.subTest(url=url):
+                response = self.client.get(url, {"page_size": 2})
+                self.assertEqual(response.status_code, 200)
+                page = response.context["page_obj"]
+                self.assertEqual(len(page), 2)
+                response = self.client.get(url + page.next_url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_tampered_cursor_is_not_found(self):
+        for url in ("/all-tasks/", "/task-report/"):
+            for position in TAMPERED_CURSORS:
+                with self.subTest(url=url, position=position):
+                    response = self.client.get(
+                        url, {"cursor": encode_cursor(position)}
+                    )
+                    self.assertEqual(response.status_code, 404)
+
+
+class ListViewQueryBudgetTests(TestCase):
+    """The admin lists run a fixed number of queries however many rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = CustomUser.objects.create_user(
+            "boss", password="pw", user_type=CustomUser.UserType.SUPERADMIN
+        )
+        cls.admin = CustomUser.objects.create_user(
+            "lead", password="pw", user_type=CustomUser.UserType.ADMIN
+        )
+        cls.users = [
+            CustomUser.objects.create_user(
+                f"worker{index}", password="pw", assigned_admin=cls.admin
+            )
+            for index in range(4)
+        ]
+        for user in cls.users:
+            for task in create_tasks(user, 6):
+                if task.pk % 2:
+                    task.status = Task.Status.COMPLETED
+                    task.worked_hours = 2
+                    task.completion_report = "Done"
+                    task.save()
+
+    def assertWithinBudget(self, user, url, budget):
+        self.client.force_login(user)
+        # The session and role scope lookups are part of the budget.
+        with query_budget(budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_all_tasks(self):
+        for user in (self.superadmin, self.admin):
+            with self.subTest(user=user.username):
+                response = self.assertWithinBudget(user, "/all-tasks/", 4)
+                self.assertEqual(len(response.context["tasks"]), 24)
+
+    def test_user_tasks(self):
+        url = f"/user-tasks/{self.users[0].pk}/"
+        for user in (self.superadmin, self.admin):
+            with self.subTest(user=user.username):
+                response = self.assertWithinBudget(user, url, 5)
+                self.assertEqual(len(response.context["tasks"]), 6)
+
+    def test_task_report(self):
+        for user in (self.superadmin, self.admin):
+            with self.subTest(user=user.username):
+                response = self.assertWithinBudget(user, "/task-report/", 6)
+                completed = Task.objects.filter(status=Task.Status.COMPLETED)
+                self.assertEqual(len(response.context["tasks"]), completed.count())
+                self.assertEqual(
+                    response.context["task_summary"]["completed_count"],
+                    completed.count(),
+                )
+
+
+class TaskValuesSerializerTests(TestCase):
+    """The list fast path renders exactly what ``TaskSerializer`` does."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        pending, in_progress, completed = create_tasks(cls.user, 3)
+        in_progress.status = Task.Status.IN_PROGRESS
+        in_progress.description = "Half done: ünïcode & <markup>"
+        in_progress.save()
+        completed.status = Task.Status.COMPLETED
+        completed.worked_hours = Decimal("7.5")
+        completed.completion_report = "Done"
+        completed.save()
+
+    def assertSameOutput(self, rows, expected):
+        self.assertEqual(len(rows), len(expected))
+        for row, item in zip(rows, expected):
+            self.assertEqual(list(row), list(item))
+            for name in item:
+                with self.subTest(task=item["id"], field=name):
+                    self.assertEqual(row[name], item[name])
+
+    def test_every_field_matches(self):
+        # Fields TaskValuesSerializer cannot read from a row, e.g. nested or
+        # method fields added to TaskSerializer, must fail here.
+        self.assertEqual(
+            set(task_field_names()),
+            {field.name for field in Task._meta.concrete_fields},
+        )
+        tasks = Task.objects.order_by("pk")
+        serializer = TaskValuesSerializer()
+        self.assertSameOutput(
+            serializer.serialize(serializer.values(tasks)),
+            TaskSerializer(tasks, many=True).data,
+        )
+
+    def test_api_list_matches(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        tasks = Task.objects.order_by("due_date", "pk")
+        for fields in (None, "id,worked_hours,updated_at"):
+            with self.subTest(fields=fields):
+                params = {"fields": fields} if fields else {}
+                rows = client.get("/api/tasks/", params).json()["results"]
+                expected = TaskSerializer(
+                    tasks, many=True, fields=fields and fields.split(",")
+                ).data
+                self.assertSameOutput(rows, json.loads(json.dumps(expected)))
+
+
+class TaskReportExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            "lead", password="pw", user_type=CustomUser.UserType.ADMIN
+        )
+        cls.users = [
+            CustomUser.objects.create_user(
+                f"worker{index}", password="pw", assigned_admin=cls.admin
+            )
+            for index in range(2)
+        ]
+        stranger = CustomUser.objects.create_user("stranger", password="pw")
+        for user in (*cls.users, stranger):
+            tasks = create_tasks(user, 3)
+            for task in tasks[:2]:
+                task.status = Task.Status.COMPLETED
+                task.worked_hours = Decimal("1.25")
+                task.completion_report = 'Done, with "quotes"\nand a newline'
+                task.save()
+        cls.expected = list(
+            Task.objects.filter(
+                status=Task.Status.COMPLETED, assigned_to__in=cls.users
+            )
+            .order_by("due_date", "id")
+            .values_list("id", flat=True)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def export(self, **params):
+        response = self.client.get("/task-report/export/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_csv_streams_the_scoped_report(self):
+        response, content = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="task-report.csv"', response["Content-Disposition"])
+        header, *rows = csv.reader(io.StringIO(content))
+        self.assertEqual(header, list(TaskReportExportView.export_headers))
+        self.assertEqual([int(row[0]) for row in rows], self.expected)
+        self.assertEqual(rows[0][4:], ["1.25", 'Done, with "quotes"\nand a newline'])
+
+    def test_ndjson_applies_the_report_filters(self):
+        response, content = self.export(format="ndjson", assignee="worker1")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual({row["assigned_to"] for row in rows}, {"worker1"})
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["worked_hours"], "1.25")
+
+    def test_job_writes_the_same_export(self):
+        self.client.post("/task-report/export/?format=csv")
+        job = Job.objects.get(kind="export_task_report")
+        with tempfile.TemporaryDirectory() as root:
+            with override_settings(JOB_RESULTS_ROOT=root):
+                result_storage.cache_clear()
+                self.addCleanup(result_storage.cache_clear)
+                self.assertEqual(run_job(job.pk).status, Job.Status.DONE)
+                response = self.client.get(f"/jobs/{job.pk}/download/")
+                content = b"".join(response.streaming_content).decode()
+                response.close()
+        self.assertEqual(content, self.export()[1])
+
+
+class BulkTaskCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            "lead", password="pw", user_type=CustomUser.UserType.ADMIN
+        )
+        cls.managed = CustomUser.objects.create_user(
+            "worker", password="pw", assigned_admin=cls.admin
+        )
+        cls.stranger = CustomUser.objects.create_user("stranger", password="pw")
+
+    def post(self, user, items):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post("/api/tasks/bulk/", items, format="json")
+
+    def item(self, **fields):
+        return {
+            "title": "Bulk",
+            "description": "Imported",
+            "due_date": "2026-03-01",
+            **fields,
+        }
+
+    def test_tasks_are_created_in_one_version(self):
+        titles = [f"Bulk {index}" for index in range(3)]
+        response = self.post(
+            self.admin,
+            [self.item(assigned_to=self.managed.pk, title=title) for title in titles],
+        )
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual([item["title"] for item in body], titles)
+        self.assertEqual({item["version"] for item in body}, {current_version()})
+        self.assertEqual(self.managed.tasks.count(), 3)
+
+        # A user's items default to themselves.
+        response = self.post(self.stranger, [self.item()])
+        self.assertEqual(response.json()[0]["assigned_to"], self.stranger.pk)
+
+    def test_errors_are_reported_per_item(self):
+        response = self.post(
+            self.admin,
+            [
+                self.item(assigned_to=self.managed.pk),
+                self.item(assigned_to=self.stranger.pk),
+                self.item(assigned_to=self.managed.pk, status="completed"),
+                self.item(),
+            ],
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            [
+                {},
+                {"assigned_to": ["You cannot assign tasks to this user."]},
+                {
+                    "completion_report": ["This field is required."],
+                    "worked_hours": ["This field is required."],
+                },
+                {"assigned_to": ["You cannot assign tasks to yourself."]},
+            ],
+        )
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASK_BULK_MAX_ITEMS=2)
+    def test_batch_size_is_limited(self):
+        response = self.post(self.stranger, [self.item()] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {"non_field_errors": ["At most 2 items per request."]}
+        )
+
+
+# Serves the async task views in front of the usual routes, as
+# TASK_API_ASYNC does; AsyncTaskAPITests switch ROOT_URLCONF to it.
+urlpatterns = [*async_task_urls, path("", include("tm_app.urls"))]
+
+
+class AsyncTaskAPITests(TestCase):
+    """The async task views answer exactly as the viewset they stand in for."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            "lead", password="pw", user_type=CustomUser.UserType.ADMIN
+        )
+        cls.user = CustomUser.objects.create_user(
+            "worker", password="pw", assigned_admin=cls.admin
+        )
+        cls.other = CustomUser.objects.create_user("other", password="pw")
+        cls.task, cls.completed = create_tasks(cls.user, 2)
+        cls.completed.status = Task.Status.COMPLETED
+        cls.completed.worked_hours = 3
+        cls.completed.completion_report = "Done"
+        cls.completed.save()
+        cls.foreign = create_tasks(cls.other, 1)[0]
+
+    def auth_headers(self, user):
+        return {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+    def request(self, method, url, user=None, **kwargs):
+        """``(sync, async)`` responses, each with its writes rolled back."""
+        headers = kwargs.pop("headers", {})
+        if user is not None:
+            headers.update(self.auth_headers(user))
+        responses = []
+        for urlconf in (settings.ROOT_URLCONF, __name__):
+            with override_settings(ROOT_URLCONF=urlconf), transaction.atomic():
+                response = getattr(self.client, method)(url, headers=headers, **kwargs)
+                # resolver_match is lazy; check the view before the urlconf changes.
+                self.assertEqual(
+                    iscoroutinefunction(response.resolver_match.func),
+                    urlconf == __name__,
+                )
+                responses.append(response)
+                transaction.set_rollback(True)
+        return responses
+
+    def assertSameResponse(self, method, url, user=None, ignore=(), **kwargs):
+        sync, async_ = self.request(method, url, user, **kwargs)
+        self.assertEqual(sync.status_code, async_.status_code)
+        for header in ("ETag", "WWW-Authenticate", SYNC_VERSION_HEADER):
+            self.assertEqual(sync.get(header), async_.get(header), header)
+        if sync.content:
+            sync_body, async_body = sync.json(), async_.json()
+            for name in ignore:
+                sync_body.pop(name, None), async_body.pop(name, None)
+            self.assertEqual(sync_body, async_body)
+        return sync
+
+    def test_list(self):
+        url = "/api/tasks/"
+        for params in ({}, {"page_size": 1}, {"fields": "id,title,worked_hours"}):
+            with self.subTest(params=params):
+                response = self.assertSameResponse("get", url, self.user, data=params)
+                self.assertEqual(response.status_code, 200)
+        next_url = self.client.get(
+            url, {"page_size": 1}, headers=self.auth_headers(self.user)
+        ).json()["next"]
+        self.assertSameResponse("get", next_url, self.user)
+        # The admin's own list is empty and carries no sync version.
+        self.assertSameResponse("get", url, self.admin)
+
+    def test_detail_and_report(self):
+        cases = [
+            (f"/api/tasks/{self.task.pk}/", self.user, 200),
+            (f"/api/tasks/{self.task.pk}/?fields=id,status", self.user, 200),
+            (f"/api/tasks/{self.foreign.pk}/", self.user, 404),
+            (f"/api/tasks/{self.completed.pk}/report/", self.user, 200),
+            (f"/api/tasks/{self.completed.pk}/report/", self.admin, 200),
+            (f"/api/tasks/{self.completed.pk}/report/", self.other, 403),
+            ("/api/tasks/0/report/", self.user, 404),
+        ]
+        for url, user, status in cases:
+            with self.subTest(url=url, user=user.username):
+                response = self.assertSameResponse("get", url, user)
+                self.assertEqual(response.status_code, status)
+
+    def test_conditional_get(self):
+        url = f"/api/tasks/{self.task.pk}/"
+        etag = self.client.get(url, headers=self.auth_headers(self.user))["ETag"]
+        response = self.assertSameResponse(
+            "get", url, self.user, headers={"if-none-match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_patch(self):
+        url = f"/api/tasks/{self.task.pk}/"
+        for data, status in (
+            ({"status": "in_progress", "title": "Renamed"}, 200),
+            ({"status": "completed"}, 400),
+            ({"due_date": "soon"}, 400),
+        ):
+            with self.subTest(data=data):
+                response = self.assertSameResponse(
+                    "patch",
+                    url,
+                    self.user,
+                    ignore=("updated_at",),
+                    data=data,
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, status)
+        response = self.assertSameResponse(
+            "patch",
+            f"/api/tasks/{self.foreign.pk}/",
+            self.user,
+            data={"title": "Mine now"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_authentication_errors(self):
+        for url in (
+            "/api/tasks/",
+            f"/api/tasks/{self.task.pk}/",
+            f"/api/tasks/{self.completed.pk}/report/",
+        ):
+            for headers in ({}, {"authorization": "Bearer not-a-token"}):
+                with self.subTest(url=url, headers=headers):
+                    response = self.assertSameResponse("get", url, headers=headers)
+                    self.assertEqual(response.status_code, 401)
+                    self.assertTrue(response["WWW-Authenticate"].startswith("Bearer"))
+
+    def test_fallbacks(self):
+        response = self.assertSameResponse(
+            "get", "/api/tasks/", self.user, data={"since": 0}
+        )
+        self.assertEqual(len(response.json()["changed"]), 2)
+        url = f"/api/tasks/{self.task.pk}/"
+        response = self.assertSameResponse("delete", url, self.admin)
+        self.assertEqual(response.status_code, 204)
+        response = self.assertSameResponse("delete", url, self.user)
+        self.assertEqual(response.status_code, 403)
+
+
+class BulkTaskUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = CustomUser.objects.create_user(
+            "boss", password="pw", user_type=CustomUser.UserType.SUPERADMIN
+        )
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        cls.tasks = create_tasks(cls.user, 3)
+
+    def test_response_carries_the_stamped_version(self):
+        client = APIClient()
+        client.force_authenticate(self.superadmin)
+        response = client.patch(
+            "/api/tasks/bulk/",
+            [{"id": task.pk, "status": "in_progress"} for task in self.tasks],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        stored = Task.objects.in_bulk([task.pk for task in self.tasks])
+        for item in response.json():
+            task = stored[item["id"]]
+            self.assertEqual(item["status"], "in_progress")
+            self.assertEqual(item["version"], task.version)
+            self.assertGreater(task.version, self.tasks[-1].version)
+            self.assertEqual(item, TaskSerializer(task).data)
+
+
+class BulkUserUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = CustomUser.objects.create_user(
+            "boss", password="pw", user_type=CustomUser.UserType.SUPERADMIN
+        )
+
+    def setUp(self):
+        self.client.force_login(self.superadmin)
+
+    def upload(self, content):
+        upload = SimpleUploadedFile("users.csv", content.encode(), "text/csv")
+        return self.client.post(
+            "/create-users/bulk/", {"file": upload, "format": "csv"}
+        )
+
+    def test_users_are_created_by_a_job(self):
+        response = self.upload(
+            "username,user_type,password,assigned_admin\n"
+            "lead,admin,,\n"
+            "worker,user,s3cret-pass,lead\n"
+        )
+        self.assertRedirects(
+            response, "/manage-users/", fetch_redirect_response=False
+        )
+        self.assertFalse(CustomUser.objects.filter(username="worker").exists())
+
+        job = Job.objects.get(kind="provision_users")
+        self.assertEqual(run_job(job.pk).status, Job.Status.DONE)
+        job.refresh_from_db()
+        self.assertEqual(job.result, {"created": 2, "errors": []})
+        self.assertEqual(job.payload, {})
+        worker = CustomUser.objects.get(username="worker")
+        self.assertEqual(worker.assigned_admin.username, "lead")
+        self.assertTrue(worker.check_password("s3cret-pass"))
+
+    def test_failed_job_does_not_keep_the_passwords(self):
+        self.upload("username,password\nworker,s3cret-pass\n")
+        job = Job.objects.get(kind="provision_users")
+        self.assertEqual(job.max_attempts, 1)
+        with (
+            mock.patch(
+                "tm_app.provisioning.provision_users",
+                side_effect=DatabaseError("disk I/O error"),
+            ),
+            self.assertLogs("tm_app.jobs", "ERROR"),
+        ):
+            run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.payload, {})
+        self.assertNotIn("s3cret-pass", json.dumps(job.result))
+
+    def test_invalid_rows_are_reported_without_a_job(self):
+        response = self.upload("username,user_type\nboss,user\n")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Row 1: Username &#x27;boss&#x27; already")
+        self.assertFalse(Job.objects.exists())
+
+
+def stored_stats():
+    """The maintained task statistics, leaving out empty counters."""
+    counters = ("user_id", *SUMMARY_FIELDS)
+    stats = {
+        row[0]: row[1:]
+        for row in UserTaskStats.objects.values_list(*counters)
+        if any(row[1:])
+    }
+    due = set(
+        OpenTaskDueCount.objects.exclude(open_count=0).values_list(
+            "user_id", "due_date", "open_count"
+        )
+    )
+    return stats, due
+
+
+class TaskStatsTests(TestCase):
+    """Every kind of task write keeps the counters equal to a rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        cls.other = CustomUser.objects.create_user("other", password="pw")
+        cls.tasks = create_tasks(cls.user, 4)
+
+    def assertStatsRebuilt(self):
+        maintained = stored_stats()
+        rebuild_user_stats()
+        self.assertEqual(maintained, stored_stats())
+        return maintained
+
+    def complete(self, task, hours=2):
+        task.status = Task.Status.COMPLETED
+        task.worked_hours = hours
+        task.completion_report = "Done"
+        task.save()
+
+    def test_create_and_save(self):
+        stats, due = self.assertStatsRebuilt()
+        self.assertEqual(stats[self.user.pk][:2], (4, 0))
+        self.complete(self.tasks[0], hours=1.5)
+        self.tasks[1].status = Task.Status.IN_PROGRESS
+        self.tasks[1].save()
+        stats, due = self.assertStatsRebuilt()
+        self.assertEqual(stats[self.user.pk], (2, 1, 1, 1, Decimal("1.50")))
+
+    def test_reassignment_by_save(self):
+        task = self.tasks[0]
+        task.assigned_to = self.other
+        task.save()
+        stats, due = self.assertStatsRebuilt()
+        self.assertEqual(stats[self.other.pk][0], 1)
+
+    def test_queryset_update(self):
+        Task.objects.filter(pk__in=[task.pk for task in self.tasks[:2]]).update(
+            status=Task.Status.COMPLETED, worked_hours=3
+        )
+        self.assertStatsRebuilt()
+        Task.objects.filter(pk=self.tasks[2].pk).update(assigned_to=self.other)
+        self.assertStatsRebuilt()
+
+    def test_bulk_create(self):
+        Task.objects.bulk_create(
+            Task(
+                title="Bulk",
+                description="",
+                assigned_to=self.other,
+                due_date=datetime.date(2026, 2, 1),
+            )
+            for _ in range(3)
+        )
+        stats, due = self.assertStatsRebuilt()
+        self.assertIn((self.other.pk, datetime.date(2026, 2, 1), 3), due)
+
+    def test_deletes(self):
+        self.complete(self.tasks[0])
+        self.tasks[0].delete()
+        self.tasks[1].delete()
+        self.assertStatsRebuilt()
+        Task.objects.filter(assigned_to=self.user).delete()
+        stats, due = self.assertStatsRebuilt()
+        self.assertNotIn(self.user.pk, stats)
+
+    def test_archive(self):
+        for task in self.tasks[:2]:
+            self.complete(task)
+        list(archive_tasks(timezone.now() + datetime.timedelta(seconds=1)))
+        stats, due = self.assertStatsRebuilt()
+        self.assertEqual(stats[self.user.pk][2], 0)
+
+    @override_settings(USER_DELETION_IN_BACKGROUND=False, USER_DELETION_CHUNK_SIZE=3)
+    def test_user_deletion(self):
+        self.complete(self.tasks[0])
+        create_tasks(self.other, 2)
+        request_deletion(self.user)
+        stats, due = self.assertStatsRebuilt()
+        self.assertEqual(list(stats), [self.other.pk])
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            "lead", password="pw", user_type=CustomUser.UserType.ADMIN
+        )
+        cls.managed = CustomUser.objects.create_user(
+            "worker", password="pw", assigned_admin=cls.admin
+        )
+        cls.stranger = CustomUser.objects.create_user("stranger", password="pw")
+        due_date = datetime.date(2026, 1, 1)
+        cls.in_description = Task.objects.create(
+            title="Quarterly paperwork",
+            description="Send the invoice to accounting",
+            assigned_to=cls.managed,
+            due_date=due_date,
+        )
+        cls.in_title = Task.objects.create(
+            title="Invoice reminders",
+            description="Chase late payers",
+            assigned_to=cls.managed,
+            due_date=due_date,
+        )
+        cls.hidden = Task.objects.create(
+            title="Invoice archive",
+            description="",
+            assigned_to=cls.stranger,
+            due_date=due_date,
+        )
+
+    def search(self, user, query):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get("/api/tasks/search/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [task["id"] for task in response.json()["results"]]
+
+    def test_results_are_ranked_within_the_scope(self):
+        self.assertEqual(
+            self.search(self.admin, "invoice"),
+            [self.in_title.pk, self.in_description.pk],
+        )
+        self.assertEqual(self.search(self.stranger, "invoice"), [self.hidden.pk])
+        # The last word matches as a prefix.
+        self.assertEqual(self.search(self.stranger, "invoice arch"), [self.hidden.pk])
+
+    def test_html_list_searches_within_the_scope(self):
+        self.client.force_login(self.admin)
+        response = self.client.get("/all-tasks/", {"q": "invoice"})
+        self.assertEqual(
+            [task.pk for task in response.context["tasks"]],
+            [self.in_title.pk, self.in_description.pk],
+        )
+
+    def test_index_follows_updates_and_deletes(self):
+        self.in_title.title = "Payment reminders"
+        self.in_title.save()
+        self.assertEqual(self.search(self.admin, "invoice"), [self.in_description.pk])
+        self.assertEqual(self.search(self.admin, "payment"), [self.in_title.pk])
+
+        Task.objects.filter(pk=self.in_description.pk).update(
+            description="Send the bill to accounting"
+        )
+        self.assertEqual(self.search(self.admin, "invoice"), [])
+
+        self.in_title.delete()
+        self.assertEqual(self.search(self.admin, "payment"), [])
+
+    def test_query_without_words_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get("/api/tasks/search/", {"q": "*?"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        cls.open_task, *cls.completed = create_tasks(cls.user, 4)
+        for index, task in enumerate(cls.completed):
+            task.status = Task.Status.COMPLETED
+            task.worked_hours = 1
+            task.completion_report = "Long report. " * 100 if index else "Short"
+            task.save()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def archive(self, **kwargs):
+        before = timezone.now() + datetime.timedelta(seconds=1)
+        return list(archive_tasks(before, **kwargs))
+
+    def test_completed_tasks_move_in_batches(self):
+        ids = [task.pk for task in self.completed]
+        self.assertEqual(self.archive(batch_size=2), [(2, ids[1]), (1, ids[2])])
+        self.assertEqual(
+            list(Task.objects.values_list("pk", flat=True)), [self.open_task.pk]
+        )
+        self.assertEqual(sorted(ArchivedTask.objects.values_list("pk", flat=True)), ids)
+        # Nothing is left, so a second run moves nothing.
+        self.assertEqual(self.archive(), [])
+
+    def test_long_reports_round_trip_compressed(self):
+        self.archive(compress=True)
+        short, *long = ArchivedTask.objects.order_by("pk")
+        self.assertEqual(short.completion_report, "Short")
+        self.assertIsNone(short.compressed_report)
+        for task in long:
+            self.assertIsNone(task.completion_report)
+            self.assertLess(len(task.compressed_report), len(task.report))
+            self.assertEqual(task.report, "Long report. " * 100)
+
+        response = self.client.get(f"/api/tasks/archive/{long[0].pk}/")
+        self.assertEqual(response.json()["completion_report"], "Long report. " * 100)
+
+    def test_delta_sync_sees_archived_tasks_as_deleted(self):
+        version = current_version()
+        self.archive()
+        self.assertGreater(current_version(), version)
+        body = self.client.get("/api/tasks/", {"since": version}).json()
+        self.assertEqual(body["changed"], [])
+        self.assertEqual(sorted(body["deleted"]), [task.pk for task in self.completed])
+        self.assertEqual(body["version"], current_version())
+
+
+@override_settings(USER_DELETION_CHUNK_SIZE=2)
+class UserDeletionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = CustomUser.objects.create_user(
+            "boss", password="pw", user_type=CustomUser.UserType.SUPERADMIN
+        )
+        cls.admin = CustomUser.objects.create_user(
+            "lead", password="pw", user_type=CustomUser.UserType.ADMIN
+        )
+        cls.user = CustomUser.objects.create_user(
+            "worker", password="pw", assigned_admin=cls.admin
+        )
+        cls.managed = [
+            CustomUser.objects.create_user(
+                f"managed{index}", password="pw", assigned_admin=cls.admin
+            )
+            for index in range(3)
+        ]
+        cls.tasks = create_tasks(cls.user, 5)
+        for task in cls.tasks[:2]:
+            task.status = Task.Status.COMPLETED
+            task.worked_hours = 1
+            task.completion_report = "Done"
+            task.save()
+        list(archive_tasks(timezone.now() + datetime.timedelta(seconds=1)))
+
+    def test_chunked_deletion_removes_everything(self):
+        version = current_version()
+        deletion = request_deletion(self.user, requested_by=self.superadmin)
+        self.assertEqual(deletion.status, UserDeletion.Status.PENDING)
+        self.assertEqual((deletion.total_tasks, deletion.progress), (5, 0))
+        self.assertFalse(CustomUser.objects.get(pk=self.user.pk).is_active)
+
+        job = Job.objects.get(kind="delete_user")
+        self.assertEqual(run_job(job.pk).status, Job.Status.DONE)
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.status, UserDeletion.Status.DONE)
+        self.assertEqual((deletion.deleted_tasks, deletion.progress), (5, 100))
+        self.assertFalse(CustomUser.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertFalse(UserTaskStats.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(OpenTaskDueCount.objects.filter(user_id=self.user.pk).exists())
+        # The live tasks left a tombstone each for delta sync.
+        self.assertEqual(
+            sorted(
+                TaskTombstone.objects.filter(version__gt=version).values_list(
+                    "task_id", flat=True
+                )
+            ),
+            [task.pk for task in self.tasks[2:]],
+        )
+
+    def test_progress_is_reported_part_way(self):
+        deletion = request_deletion(self.admin)
+        with mock.patch(
+            "tm_app.deletion._release_managed_users",
+            side_effect=DatabaseError("database is locked"),
+        ):
+            with self.assertRaises(DatabaseError):
+                run_deletion(deletion.pk)
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.status, UserDeletion.Status.FAILED)
+        self.assertEqual(deletion.error, "database is locked")
+
+        # Running it again continues where it stopped.
+        deletion = run_deletion(deletion.pk)
+        self.assertEqual(deletion.status, UserDeletion.Status.DONE)
+        self.assertEqual((deletion.total_users, deletion.released_users), (4, 4))
+        self.assertFalse(
+            CustomUser.objects.filter(assigned_admin__isnull=False).exists()
+        )
+
+
+
+@override_settings(JOBS_RUN_INLINE=True)
+class InlineJobResponseTests(TransactionTestCase):
+    """Inline jobs run on commit, which only a ``TransactionTestCase`` sees."""
+
+    def setUp(self):
+        self.superadmin = CustomUser.objects.create_user(
+            "boss", password="pw", user_type=CustomUser.UserType.SUPERADMIN
+        )
+        self.user = CustomUser.objects.create_user("worker", password="pw")
+        create_tasks(self.user, 5)
+
+    def test_status_responses_are_current(self):
+        self.client.force_login(self.superadmin)
+        response = self.client.post(
+            f"/delete-user/{self.user.pk}/", headers={"accept": "application/json"}
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], UserDeletion.Status.DONE)
+
+        status = self.client.get(response["Location"]).json()
+        self.assertEqual(status["status"], UserDeletion.Status.DONE)
+        self.assertEqual((status["progress"], status["deleted_tasks"]), (100, 5))
+
+    def test_job_responses_are_current(self):
+        self.client.force_login(self.superadmin)
+        upload = SimpleUploadedFile("users.csv", b"username\nnewcomer\n", "text/csv")
+        response = self.client.post(
+            "/create-users/bulk/",
+            {"file": upload, "format": "csv"},
+            headers={"accept": "application/json"},
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], Job.Status.DONE)
+        self.assertTrue(CustomUser.objects.filter(username="newcomer").exists())
+
+
+class AdminReassignmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superadmin = CustomUser.objects.create_user(
+            "boss", password="pw", user_type=CustomUser.UserType.SUPERADMIN
+        )
+        cls.admin = CustomUser.objects.create_user(
+            "lead", password="pw", user_type=CustomUser.UserType.ADMIN
+        )
+        cls.rival = CustomUser.objects.create_user(
+            "rival", password="pw", user_type=CustomUser.UserType.ADMIN
+        )
+        cls.kept = [
+            CustomUser.objects.create_user(
+                f"kept{index}", password="pw", assigned_admin=cls.admin
+            )
+            for index in range(3)
+        ]
+        cls.dropped = CustomUser.objects.create_user(
+            "dropped", password="pw", assigned_admin=cls.admin
+        )
+        cls.free = [
+            CustomUser.objects.create_user(f"free{index}", password="pw")
+            for index in range(3)
+        ]
+        cls.taken = CustomUser.objects.create_user(
+            "taken", password="pw", assigned_admin=cls.rival
+        )
+
+    def setUp(self):
+        self.client.force_login(self.superadmin)
+
+    def post(self, data):
+        """Save the admin form with ``data`` and run the queued job."""
+        response = self.client.post(
+            f"/update-admin/{self.admin.pk}/",
+            {"username": "lead", "user_type": CustomUser.UserType.ADMIN, **data},
+        )
+        self.assertRedirects(response, "/manage-admins/", fetch_redirect_response=False)
+        job = Job.objects.get(kind="reassign_users")
+        self.assertEqual(run_job(job.pk).status, Job.Status.DONE)
+        job.refresh_from_db()
+        return job
+
+    def assertManaged(self, users):
+        self.assertEqual(set(self.admin.assigned_users.all()), set(users))
+
+    def test_full_selection_is_applied_as_a_diff(self):
+        selected = [*self.kept, self.free[0], self.taken]
+        job = self.post({"assigned_users": [user.pk for user in selected]})
+        self.assertEqual(job.payload["add"], sorted([self.free[0].pk, self.taken.pk]))
+        self.assertEqual(job.payload["remove"], [self.dropped.pk])
+        # Only the changed rows were written; another admin's user stays put.
+        self.assertEqual(job.result, {"added": 1, "removed": 1})
+        self.assertManaged([*self.kept, self.free[0]])
+        self.assertEqual(
+            CustomUser.objects.get(pk=self.taken.pk).assigned_admin, self.rival
+        )
+
+    def test_picker_posts_only_the_changes(self):
+        job = self.post(
+            {
+                "add_users": [self.free[1].pk, self.free[2].pk],
+                "listed_users": [self.kept[0].pk, self.dropped.pk],
+                "keep_users": [self.kept[0].pk],
+            }
+        )
+        self.assertEqual(job.result, {"added": 2, "removed": 1})
+        self.assertManaged([*self.kept, self.free[1], self.free[2]])
+
+    @override_settings(USER_PICKER_PAGE_SIZE=2)
+    def test_picker_pages_and_filters(self):
+        url = f"/update-admin/{self.admin.pk}/users/"
+        seen, params = [], {}
+        while True:
+            body = self.client.get(url, params).json()
+            seen += [user["username"] for user in body["results"]]
+            if not body["next"]:
+                break
+            params = {"cursor": body["next"]}
+        self.assertEqual(seen, ["free0", "free1", "free2"])
+
+        body = self.client.get(url, {"assigned": "1", "q": "kept"}).json()
+        self.assertEqual(
+            [user["username"] for user in body["results"]], ["kept0", "kept1"]
+        )
+        response = self.client.get(url, {"cursor": encode_cursor([None])})
+        self.assertEqual(response.status_code, 404)
+
+
+class CachedJWTUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        cls.admin = CustomUser.objects.create_user(
+            "lead", password="pw", user_type=CustomUser.UserType.ADMIN
+        )
+
+    def setUp(self):
+        caches[settings.JWT_USER_CACHE_ALIAS].clear()
+        token = str(AccessToken.for_user(self.user))
+        self.request = APIRequestFactory().get(
+            "/api/tasks/", headers={"authorization": f"Bearer {token}"}
+        )
+
+    def authenticate(self):
+        return CachedJWTAuthentication().authenticate(Request(self.request))[0]
+
+    def aauthenticate(self):
+        authenticator = CachedJWTAuthentication()
+        return async_to_sync(authenticator.aauthenticate)(self.request)[0]
+
+    def test_cache_hit_makes_no_queries(self):
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), user)
+        self.assertEqual(self.aauthenticate().pk, self.user.pk)
+
+    def test_saving_the_user_drops_the_entry(self):
+        self.authenticate()
+        self.user.user_type = CustomUser.UserType.ADMIN
+        self.user.save()
+        self.assertEqual(self.authenticate().user_type, CustomUser.UserType.ADMIN)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+            self.aauthenticate()
+
+    def test_deletion_and_reassignment_drop_the_entry(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            reassign_users(self.admin, add_ids=[self.user.pk])
+        self.assertEqual(self.authenticate().assigned_admin_id, self.admin.pk)
+
+        request_deletion(self.user)
+        with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+            self.authenticate()
+
+
+class DatasetTests(TestCase):
+    def generate(self, prefix, **kwargs):
+        generate_dataset(2, 6, 50, seed=7, prefix=prefix, batch_size=20, **kwargs)
+        tasks = Task.objects.filter(assigned_to__username__startswith=prefix)
+        return list(
+            tasks.order_by("pk").values_list(
+                "title", "assigned_to__username", "status", "worked_hours"
+            )
+        )
+
+    def test_same_seed_gives_the_same_data(self):
+        first = self.generate("first")
+        second = self.generate("second")
+        self.assertEqual(len(first), 50)
+        self.assertEqual(
+            [(title, owner[len("first"):]) for title, owner, *_ in first],
+            [(title, owner[len("second"):]) for title, owner, *_ in second],
+        )
+        # Statistics and versions stay consistent with the bulk writes.
+        maintained = stored_stats()
+        rebuild_user_stats()
+        self.assertEqual(maintained, stored_stats())
+        self.assertEqual(Task.objects.filter(version=0).count(), 0)
+
+    def test_status_mix(self):
+        rows = self.generate("mix", status_mix=parse_status_mix("completed=1"))
+        self.assertEqual({status for _, _, status, _ in rows}, {"completed"})
+        self.assertNotIn(None, [hours for *_, hours in rows])
+        for value in ("done=1", "pending=x", "pending=0"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_status_mix(value)
+
+
+class DeltaSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        cls.other = CustomUser.objects.create_user("other", password="pw")
+        cls.tasks = create_tasks(cls.user, 3)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since):
+        response = self.client.get("/api/tasks/", {"since": since})
+        return response.status_code, response.json()
+
+    def test_full_list_carries_the_sync_version(self):
+        response = self.client.get("/api/tasks/")
+        self.assertEqual(int(response[SYNC_VERSION_HEADER]), current_version())
+        page = self.client.get("/api/tasks/", {"page_size": 1})
+        next_page = self.client.get(page.json()["next"])
+        self.assertNotIn(SYNC_VERSION_HEADER, next_page)
+
+    def test_since_zero_is_a_full_sync(self):
+        self.tasks[0].delete()
+        status, body = self.sync(0)
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            {task["id"] for task in body["changed"]},
+            {task.pk for task in self.tasks[1:]},
+        )
+        self.assertEqual(body["deleted"], [])
+        self.assertEqual(body["version"], current_version())
+
+    def test_changes_and_deletions_since_a_version(self):
+        version = int(self.client.get("/api/tasks/")[SYNC_VERSION_HEADER])
+        changed, removed = self.tasks[0], self.tasks[1]
+        removed_id = removed.pk
+        changed.title = "Renamed"
+        changed.save()
+        removed.delete()
+
+        status, body = self.sync(version)
+        self.assertEqual(status, 200)
+        self.assertEqual([task["id"] for task in body["changed"]], [changed.pk])
+        self.assertEqual(body["changed"][0]["title"], "Renamed")
+        self.assertEqual(body["deleted"], [removed_id])
+        self.assertFalse(body["has_more"])
+
+        status, body = self.sync(body["version"])
+        self.assertEqual((body["changed"], body["deleted"]), ([], []))
+
+    def test_pruned_tombstones_expire_older_cursors(self):
+        version = current_version()
+        self.tasks[0].delete()
+        prune_tombstones(timezone.now() + datetime.timedelta(seconds=1))
+
+        status, body = self.sync(version)
+        self.assertEqual(status, 410)
+        # Starting over from a full sync works again.
+        status, body = self.sync(0)
+        self.assertEqual(status, 200)
+        self.assertEqual(self.sync(body["version"])[0], 200)
+
+    def test_pruning_another_users_tombstones_keeps_the_cursor(self):
+        version = current_version()
+        create_tasks(self.other, 1)[0].delete()
+        prune_tombstones(timezone.now() + datetime.timedelta(seconds=1))
+        status, body = self.sync(version)
+        self.assertEqual(status, 200)
+
+
+class ScopedSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(
+            "lead", password="pw", user_type=CustomUser.UserType.ADMIN
+        )
+        cls.managed = CustomUser.objects.create_user(
+            "worker", password="pw", assigned_admin=cls.admin
+        )
+        cls.stranger = CustomUser.objects.create_user("stranger", password="pw")
+
+    def test_admin_bootstraps_from_since_zero(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        tasks = create_tasks(self.managed, 3)
+        create_tasks(self.stranger, 1)
+
+        # The admin's own list is empty and covers none of the tasks a
+        # sync would, so it offers no version to sync from.
+        response = client.get("/api/tasks/")
+        self.assertEqual(response.json()["results"], [])
+        self.assertNotIn(SYNC_VERSION_HEADER, response)
+
+        body = client.get("/api/tasks/", {"since": 0}).json()
+        self.assertEqual(
+            sorted(task["id"] for task in body["changed"]),
+            [task.pk for task in tasks],
+        )
+        self.assertEqual(body["version"], current_version())
+
+    def test_admin_catches_up_on_managed_users(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        create_tasks(self.managed, 1)
+        version = current_version()
+        kept, removed = create_tasks(self.managed, 2)
+        removed_id = removed.pk
+        removed.delete()
+        create_tasks(self.stranger, 1)
+
+        response = client.get("/api/tasks/", {"since": version})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+        body = response.json()
+        self.assertEqual([task["id"] for task in body["changed"]], [kept.pk])
+        self.assertEqual(body["deleted"], [removed_id])
+
+        # Moving a task out of the admin's scope reads as a deletion.
+        Task.objects.filter(pk=kept.pk).update(assigned_to=self.stranger)
+        body = client.get("/api/tasks/", {"since": body["version"]}).json()
+        self.assertEqual((body["changed"], body["deleted"]), ([], [kept.pk]))
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        create_tasks(cls.user, 20)
+
+    def test_html_is_gzip_with_random_padding(self):
+        sizes = set()
+        for _ in range(10):
+            response = self.client.get("/", headers={"accept-encoding": "gzip"})
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertIn(b"<html", gzip.decompress(response.content))
+            sizes.add(len(response.content))
+        self.assertGreater(len(sizes), 1)
+
+    def test_html_is_not_sent_without_padding(self):
+        response = self.client.get("/", headers={"accept-encoding": "deflate"})
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_api_uses_the_negotiated_codec(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get("/api/tasks/", headers={"accept-encoding": "deflate"})
+        self.assertEqual(response["Content-Encoding"], "deflate")
+        body = json.loads(zlib.decompress(response.content))
+        self.assertEqual(len(body["results"]), 20)
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsTests(TestCase):
+    def test_unknown_methods_share_one_label(self):
+        for method in ("BREW", "PROPFIND", "GET"):
+            self.client.generic(method, "/no-such-page/")
+        metrics = get_registry().render()
+        self.assertIn('method="other"', metrics)
+        self.assertIn('method="GET"', metrics)
+        self.assertNotIn("BREW", metrics)
+        self.assertNotIn("PROPFIND", metrics)
+
+
+STALE_REPLICA = "stale_replica"
+
+
+@override_settings(
+    DATABASE_REPLICAS=[STALE_REPLICA],
+    DATABASE_ROUTERS=["tm_app.replicas.ReplicaRouter"],
+)
+class StaleReplicaTests(TransactionTestCase):
+    """
+    Replica-routed views against a replica file copied from the primary
+    before any test data existed. Reads inside a transaction stay on the
+    primary, hence no ``TestCase``.
+    """
+
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, "replica.sqlite3")
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+        connections.settings[STALE_REPLICA] = {
+            **connections.settings[DEFAULT_DB_ALIAS],
+            "NAME": path,
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[STALE_REPLICA].close()
+        del connections[STALE_REPLICA]
+        del connections.settings[STALE_REPLICA]
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.superadmin = CustomUser.objects.create_user(
+            "boss", password="pw", user_type=CustomUser.UserType.SUPERADMIN
+        )
+        create_tasks(CustomUser.objects.create_user("worker", password="pw"), 2)
+
+    def test_login_newer_than_the_replica_is_kept(self):
+        self.client.force_login(self.superadmin)
+        response = self.client.get("/all-tasks/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, self.superadmin)
+        self.assertNotIn("sessionid", response.cookies)
+        # The tasks themselves come from the stale copy.
+        self.assertEqual(len(response.context["tasks"]), 0)
+
+    def test_pinned_client_reads_the_primary(self):
+        self.client.force_login(self.superadmin)
+        self.client.cookies[PIN_COOKIE] = "1"
+        response = self.client.get("/all-tasks/")
+        self.assertEqual(len(response.context["tasks"]), 2)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        cls.task = create_tasks(cls.user, 2)[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_and_detail_answer_304_until_a_write(self):
+        for url in ("/api/tasks/", f"/api/tasks/{self.task.pk}/"):
+            with self.subTest(url=url):
+                etag = self.client.get(url)["ETag"]
+                response = self.client.get(url, headers={"if-none-match": etag})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+
+                self.task.title = f"Changed for {url}"
+                self.task.save()
+                response = self.client.get(url, headers={"if-none-match": etag})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etag)
+
+    def test_deletion_changes_the_list_etag(self):
+        etag = self.client.get("/api/tasks/")["ETag"]
+        create_tasks(self.user, 1)[0].delete()
+        response = self.client.get("/api/tasks/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_is_per_user(self):
+        etag = self.client.get(f"/api/tasks/{self.task.pk}/report/")["ETag"]
+        superadmin = CustomUser.objects.create_user(
+            "boss", password="pw", user_type=CustomUser.UserType.SUPERADMIN
+        )
+        self.client.force_authenticate(superadmin)
+        response = self.client.get(
+            f"/api/tasks/{self.task.pk}/report/", headers={"if-none-match": etag}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class RecordingBroker(BaseBroker):
+    """Stand-in for a cross-process broker: keeps what was published."""
+
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event):
+        self.events.append(event)
+
+
+@override_settings(TASK_EVENT_BROKER="tm_app.tests.RecordingBroker")
+class TaskEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user("worker", password="pw")
+        cls.other = CustomUser.objects.create_user("other", password="pw")
+
+    def setUp(self):
+        get_broker.cache_clear()
+
+    def test_writes_publish_after_commit(self):
+        broker = get_broker()
+        with self.captureOnCommitCallbacks(execute=True):
+            task = create_tasks(self.user, 1)[0]
+            self.assertEqual(broker.events, [])
+        task_id = task.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+
+        created, deleted = broker.events
+        self.assertEqual(created["type"], "created")
+        self.assertEqual(created["task"]["id"], task_id)
+        self.assertEqual(created["users"], [self.user.pk])
+        self.assertEqual(deleted["type"], "deleted")
+        self.assertEqual(deleted["task"], {"id": task_id, "assigned_to": self.user.pk})
+
+    def test_bulk_reassignment_tells_both_owners(self):
+        tasks = create_tasks(self.user, 2)
+        broker = get_broker()
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(pk__in=[task.pk for task in tasks]).update(
+                assigned_to=self.other
+            )
+        self.assertEqual(
+            sorted(event["task"]["id"] for event in broker.events),
+            [task.pk for task in tasks],
+        )
+        for event in broker.events:
+            self.assertEqual(event["type"], "updated")
+            self.assertEqual(event["users"], [self.other.pk, self.user.pk])
+            self.assertEqual(event["id"], current_version())
+
+
+class InMemoryBrokerTests(SimpleTestCase):
+    def stream(self, scope, publish):
+        """The first frames ``stream_events`` sends while ``publish`` runs."""
+
+        async def collect():
+            stream = stream_events(scope)
+            frames = [await anext(stream)]
+            await asyncio.to_thread(publish)
+            frames.append(await anext(stream))
+            await stream.aclose()
+            return frames
+
+        return async_to_sync(collect)()
+
+    def event(self, user_id, previous_user_id=None):
+        task = {"id": 7, "assigned_to": user_id, "title": "Task"}
+        return task_event("updated", 42, task, previous_user_id)
+
+    def test_subscribers_only_get_events_in_their_scope(self):
+        broker = get_broker()
+        scope = RoleScope(None, frozenset([1]))
+
+        def publish():
+            broker.publish(self.event(2))
+            broker.publish(self.event(1))
+
+        frames = self.stream(scope, publish)
+        self.assertEqual(frames[0], "retry: 5000\n\n")
+        self.assertTrue(frames[1].startswith("id: 42\nevent: updated\n"))
+        self.assertFalse(broker.has_subscribers())
+
+    def test_task_moved_out_of_scope_reads_as_deleted(self):
+        scope = RoleScope(None, frozenset([1]))
+        frames = self.stream(
+            scope, lambda: get_broker().publish(self.event(2, previous_user_id=1))
+        )
+        self.assertEqual(frames[1], 'id: 42\nevent: deleted\ndata: {"id":7}\n\n')
+
+    @override_settings(TASK_EVENT_QUEUE_SIZE=1)
+    def test_slow_subscriber_is_told_to_resync(self):
+        def publish():
+            for _ in range(3):
+                get_broker().publish(self.event(1))
+
+        frames = self.stream(RoleScope(None, None), publish)
+        self.assertEqual(frames[1], "event: resync\ndata: {}\n\n")
+
+
+def flaky_job(job):
+    if job.attempts < job.payload["succeed_on"]:
+        raise RuntimeError(f"attempt {job.attempts} failed")
+    return {"attempts": job.attempts}
+
+
+@mock.patch.dict(JOB_HANDLERS, {"flaky": "tm_app.tests.flaky_job"})
+class JobQueueTests(TestCase):
+    def test_claim_takes_due_jobs_in_order(self):
+        later = enqueue("flaky", {"succeed_on": 1})
+        first = enqueue("flaky", {"succeed_on": 1})
+        Job.objects.filter(pk=later.pk).update(
+            run_after=timezone.now() + datetime.timedelta(minutes=1)
+        )
+        claimed = claim_next("worker-1")
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, Job.Status.RUNNING)
+        self.assertEqual((claimed.attempts, claimed.locked_by), (1, "worker-1"))
+        # Running jobs and jobs not due yet are left alone.
+        self.assertIsNone(claim_next("worker-2"))
+
+    def test_failures_are_retried_with_back_off(self):
+        job = enqueue("flaky", {"succeed_on": 2})
+        with self.assertLogs("tm_app.jobs", "ERROR"):
+            job = execute(claim_next("worker"))
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertEqual(job.error, "attempt 1 failed")
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(claim_next("worker"))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = execute(claim_next("worker"))
+        self.assertEqual(job.status, Job.Status.DONE)
+        job.refresh_from_db()
+        self.assertEqual(job.result, {"attempts": 2})
+        self.assertEqual(job.error, "")
+
+    def test_job_fails_when_out_of_attempts(self):
+        job = enqueue("flaky", {"succeed_on": 5}, max_attempts=1)
+        with self.assertLogs("tm_app.jobs", "ERROR"):
+            execute(claim_next("worker"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_jobs_of_dead_workers_are_requeued(self):
+        job = enqueue("flaky", {"succeed_on": 1})
+        claim_next("dead-worker")
+        stale = timezone.now() - datetime.timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(execute(claim_next("worker")).status, Job.Status.DONE)
+
+    def test_stale_worker_does_not_overwrite_the_new_claim(self):
+        job = enqueue("flaky", {"succeed_on": 2})
+        stale_claim = claim_next("stalled-worker")
+        stale = timezone.now() - datetime.timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        requeue_stale()
+        new_claim = claim_next("worker")
+
+        # The stalled worker wakes up while the job runs elsewhere...
+        with self.assertLogs("tm_app.jobs", "WARNING"):
+            self.assertIsNone(execute(stale_claim))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.Status.RUNNING, "worker"))
+
+        # ...and after it finished there.
+        self.assertEqual(execute(new_claim).status, Job.Status.DONE)
+        with self.assertLogs("tm_app.jobs", "WARNING"):
+            self.assertIsNone(execute(stale_claim))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (Job.Status.DONE, {"attempts": 2}))
+
+    def test_job_runs_once(self):
+        job = enqueue("flaky", {"succeed_on": 1})
+        self.assertEqual(run_job(job.pk).status, Job.Status.DONE)
+        self.assertIsNone(run_job(job.pk))
@@ -1,20 +1,38 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (TokenObtainPairView,
                                             TokenRefreshView)
 
 from tm_app.views.admin_dashboard import (AdminDeleteView, AdminPanelView,
-                                AdminUpdateView, CreateUserView,
+                                AdminUpdateView, AdminUserPickerView, BulkUserUploadView,
+                                CreateUserView,
                                 CustomLoginView, ManageAdminUsersListView,
                                 ManageUsersListView, UserDeleteView,
-                                UserUpdateView, logout_view)
+                                UserDeletionStatusView, UserUpdateView,
+                                logout_view)
+from tm_app.views.async_api import (TaskDetailAsyncView, TaskListAsyncView,
+                                    TaskReportAsyncView)
 from tm_app.views.api import LoginView, RegisterView, TaskViewSet
+from tm_app.views.events import task_events
+from tm_app.views.jobs import JobDownloadView, JobStatusView
+from tm_app.views.metrics import MetricsView
 from tm_app.views.tasks import (AllTasksView, TaskCreateView, TaskDeleteView,
-                                TaskReportView, TaskUpdateView, UserTasksView)
+                                TaskReportExportView, TaskReportView,
+                                TaskUpdateView, UserTasksView)
 
 router = DefaultRouter()
 router.register(r"tasks", TaskViewSet, basename="tasks")
 
+# Async replacements for the router's hottest task routes, see TASK_API_ASYNC.
+async_task_urls = [
+    path("api/tasks/", TaskListAsyncView.as_view(), name="tasks-list"),
+    path("api/tasks/<int:pk>/", TaskDetailAsyncView.as_view(), name="tasks-detail"),
+    path(
+        "api/tasks/<int:pk>/report/", TaskReportAsyncView.as_view(), name="tasks-report"
+    ),
+]
+
 urlpatterns = [
     #AUTH
     path("", CustomLoginView.as_view(), name="login-dashboard"),
@@ -24,10 +42,20 @@ urlpatterns = [
     path("manage-users/", ManageUsersListView.as_view(), name="manage-users"),
     path("manage-admins/", ManageAdminUsersListView.as_view(), name="manage-admins"),
     path("create-users/", CreateUserView.as_view(), name="create-users"),
+    path("create-users/bulk/", BulkUserUploadView.as_view(), name="bulk-create-users"),
     path("update-user/<int:pk>/", UserUpdateView.as_view(), name="update-user"),
     path("update-admin/<int:pk>/", AdminUpdateView.as_view(), name="update-admin"),
+    path(
+        "update-admin/<int:pk>/users/",
+        AdminUserPickerView.as_view(),
+        name="admin-user-picker",
+    ),
     path("delete-user/<int:pk>/", UserDeleteView.as_view(), name="delete-user"),
     path("delete-admin/<int:pk>/", AdminDeleteView.as_view(), name="delete-admin"),
+    path("deletions/<int:pk>/", UserDeletionStatusView.as_view(), name="user-deletion"),
+    #BACKGROUND JOBS
+    path("jobs/<int:pk>/", JobStatusView.as_view(), name="job-status"),
+    path("jobs/<int:pk>/download/", JobDownloadView.as_view(), name="job-download"),
     #TASKS MANAGEMENT
     path("create-tasks/", TaskCreateView.as_view(), name="create-tasks"),
     path("all-tasks/", AllTasksView.as_view(), name="all-tasks"),
@@ -35,10 +63,15 @@ urlpatterns = [
     path("task/<int:pk>/edit/", TaskUpdateView.as_view(), name="edit-task"),
     path("task/<int:pk>/delete/", TaskDeleteView.as_view(), name="delete-task"),
     path("task-report/", TaskReportView.as_view(), name="task-report"),
+    path("task-report/export/", TaskReportExportView.as_view(), name="task-report-export"),
     # APIS
     path("api/register/", RegisterView.as_view(), name="register"),
     path("api/login/", LoginView.as_view(), name="login"),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("api/tasks/events/", task_events, name="task-events"),
+    *(async_task_urls if settings.TASK_API_ASYNC else []),
     path("api/", include(router.urls)),
+    # MONITORING
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
@@ -1,15 +1,30 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model, login, logout
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Q
-from django.http import HttpResponse
-from django.shortcuts import redirect
-from django.urls import reverse_lazy
-from django.views.generic import DeleteView, ListView, TemplateView
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse, reverse_lazy
+from django.views.generic import DeleteView, ListView, TemplateView, View
 from django.views.generic.edit import CreateView, FormView, UpdateView
 
 from tm_app.forms import CreateUserForm
 
-from ..forms import LoginForm
-from ..mixins import Admin_or_SuperAdminRequiredMixin, SuperAdminRequiredMixin
+from ..assignment import (PICKER_ORDERING, assignment_diff, parse_ids,
+                          picker_page)
+from ..deletion import active_deletions, request_deletion
+
+from ..forms import AdminFilterForm, LoginForm, UserFilterForm, UserUploadForm
+from ..jobs import enqueue
+from ..mixins import (AcceptedResponseMixin, Admin_or_SuperAdminRequiredMixin,
+                      FilterFormMixin, KeysetPaginationMixin, ReplicaReadMixin,
+                      SuperAdminRequiredMixin)
+from ..models import UserDeletion
+from ..pagination import decode_cursor
+from ..provisioning import check_records, load_records
+from ..scopes import get_role_scope
+from ..stats import task_breakdown, task_summary
 
 CustomUser = get_user_model()
 
@@ -18,6 +33,21 @@ class AdminPanelView(Admin_or_SuperAdminRequiredMixin, TemplateView):
     template_name = "admin/admin_dashboard.html"
     login_url = reverse_lazy("login-dashboard")
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        user = self.request.user
+
+        if user.user_type == CustomUser.UserType.ADMIN:
+            managed_users = get_role_scope(self.request).users()
+            context["task_summary"] = task_summary(managed_users)
+            context["breakdown_label"] = "User"
+            context["task_breakdown"] = task_breakdown("user__username", managed_users)
+        else:
+            context["task_summary"] = task_summary()
+            context["breakdown_label"] = "Admin"
+            context["task_breakdown"] = task_breakdown("user__assigned_admin__username")
+        return context
+
 
 class CustomLoginView(FormView):
     template_name = "auth/login.html"
@@ -52,32 +82,94 @@ class CreateUserView(SuperAdminRequiredMixin, CreateView):
             return reverse_lazy("manage-users")
 
 
-class ManageUsersListView(Admin_or_SuperAdminRequiredMixin, ListView):
+class BulkUserUploadView(SuperAdminRequiredMixin, AcceptedResponseMixin, FormView):
+    """
+    Check an upload's rows right away, then create the users in a background
+    job: hashing a large file's passwords is too slow for a web worker.
+    """
+
+    template_name = "admin/bulk_upload_users.html"
+    form_class = UserUploadForm
+    success_url = reverse_lazy("manage-users")
+
+    def form_valid(self, form):
+        try:
+            records = load_records(
+                form.cleaned_data["file"].read(), form.cleaned_data["format"]
+            )
+        except (ValidationError, ValueError) as exc:
+            form.add_error("file", f"Could not read the file: {exc}")
+            return self.form_invalid(form)
+
+        errors = check_records(records)
+        if errors:
+            for row, row_errors in errors:
+                form.add_error(None, f"Row {row}: {' '.join(row_errors)}")
+            return self.form_invalid(form)
+
+        # The job drops the passwords before it runs, so it cannot be retried.
+        job = enqueue(
+            "provision_users",
+            {"records": records},
+            requested_by=self.request.user,
+            max_attempts=1,
+        )
+        return self.job_accepted(
+            job,
+            f"Creating {len(records)} users; they will appear once the job "
+            "finishes.",
+            self.get_success_url(),
+        )
+
+
+class ManageUsersListView(
+    ReplicaReadMixin,
+    Admin_or_SuperAdminRequiredMixin,
+    FilterFormMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     model = CustomUser
     template_name = "admin/manage_users.html"
     context_object_name = "users"
+    filter_form_class = UserFilterForm
 
     def get_queryset(self):
-        queryset = CustomUser.objects.exclude(
-            Q(is_superuser=True) | Q(user_type=CustomUser.UserType.ADMIN)
+        queryset = self.filter_queryset(
+            CustomUser.objects.select_related("assigned_admin")
+            .exclude(Q(is_superuser=True) | Q(user_type=CustomUser.UserType.ADMIN))
+            .exclude(pk__in=active_deletions().values("user_id"))
         )
 
-        if self.request.user.user_type == CustomUser.UserType.ADMIN:
-            queryset = queryset.filter(assigned_admin=self.request.user)
+        return get_role_scope(self.request).filter_users(queryset)
 
-        return queryset
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.request.user.user_type == CustomUser.UserType.SUPERADMIN:
+            context["deletions"] = active_deletions().order_by("pk")
+        return context
 
 
-class ManageAdminUsersListView(SuperAdminRequiredMixin, ListView):
+class ManageAdminUsersListView(
+    SuperAdminRequiredMixin, FilterFormMixin, KeysetPaginationMixin, ListView
+):
     model = CustomUser
     template_name = "admin/manage_admins.html"
     context_object_name = "users"
+    filter_form_class = AdminFilterForm
 
     def get_queryset(self):
-        return CustomUser.objects.exclude(
-            Q(is_superuser=True) | Q(user_type=CustomUser.UserType.USER)
+        return self.filter_queryset(
+            CustomUser.objects.exclude(
+                Q(is_superuser=True) | Q(user_type=CustomUser.UserType.USER)
+            ).exclude(pk__in=active_deletions().values("user_id"))
         )
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["deletions"] = active_deletions().order_by("pk")
+        return context
+
 
 class UserUpdateView(SuperAdminRequiredMixin, UpdateView):
     model = CustomUser
@@ -98,7 +190,7 @@ class UserUpdateView(SuperAdminRequiredMixin, UpdateView):
             return reverse_lazy("manage-users")
 
 
-class AdminUpdateView(SuperAdminRequiredMixin, UpdateView):
+class AdminUpdateView(SuperAdminRequiredMixin, AcceptedResponseMixin, UpdateView):
     model = CustomUser
     fields = ["username", "user_type"]
     template_name = "admin/update_admin.html"
@@ -119,32 +211,110 @@ class AdminUpdateView(SuperAdminRequiredMixin, UpdateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        current_admin = self.object
-
-        context["users"] = (
-            CustomUser.objects.filter(user_type=CustomUser.UserType.USER)
-            .filter(Q(assigned_admin__isnull=True) | Q(assigned_admin=current_admin))
-            .order_by("username")
+        page_size = settings.USER_PICKER_PAGE_SIZE
+        # Only the first page of each list is rendered; the picker fetches
+        # further pages and search results from AdminUserPickerView.
+        context["assigned_users"], context["assigned_next"] = picker_page(
+            self.object, assigned=True, page_size=page_size
+        )
+        context["unassigned_users"], context["unassigned_next"] = picker_page(
+            self.object, assigned=False, page_size=page_size
         )
-
         return context
 
+    def get_assignment_changes(self):
+        """
+        ``(add_ids, remove_ids)`` from the picker: ticked ``add_users``, plus
+        ``remove_users`` and any ``listed_users`` no longer in ``keep_users``.
+        """
+        post = self.request.POST
+        if {"add_users", "remove_users", "listed_users"}.intersection(post):
+            remove_ids = parse_ids(post.getlist("remove_users")) | (
+                parse_ids(post.getlist("listed_users"))
+                - parse_ids(post.getlist("keep_users"))
+            )
+            return parse_ids(post.getlist("add_users")), remove_ids
+        if "assigned_users" in post:
+            # Older clients post the full selection; turn it into a diff.
+            return assignment_diff(
+                self.object, parse_ids(post.getlist("assigned_users"))
+            )
+        return set(), set()
+
+    def get_assignment_payload(self):
+        admin = self.object
+        if admin.user_type != CustomUser.UserType.ADMIN:
+            return {"admin_id": admin.pk, "release_all": True}
+        add_ids, remove_ids = self.get_assignment_changes()
+        if not add_ids and not remove_ids:
+            return None
+        return {
+            "admin_id": admin.pk,
+            "add": sorted(add_ids),
+            "remove": sorted(remove_ids),
+        }
+
     def form_valid(self, form):
-        response = super().form_valid(form)
-        user = self.object
-        CustomUser.objects.filter(assigned_admin=user).update(assigned_admin=None)
+        # The reassignment is queued with the saved form, so it only runs
+        # if the save commits and can take as long as it needs.
+        with transaction.atomic():
+            response = super().form_valid(form)
+            payload = self.get_assignment_payload()
+            if payload is None:
+                return response
+            job = enqueue("reassign_users", payload, requested_by=self.request.user)
+        return self.job_accepted(
+            job,
+            f"Saved {self.object.username}; their users are being updated.",
+            self.get_success_url(),
+        )
 
-        if user.user_type == CustomUser.UserType.ADMIN:
-            selected_user_ids = self.request.POST.getlist("assigned_users")
-            if selected_user_ids:
-                CustomUser.objects.filter(id__in=selected_user_ids).update(
-                    assigned_admin=user
-                )
 
-        return response
+class AdminUserPickerView(SuperAdminRequiredMixin, View):
+    """
+    Keyset-paginated JSON list of an admin's users (``?assigned=1``) or of
+    unassigned users, filtered by username prefix ``q``.
+    """
 
+    def get(self, request, pk):
+        admin = get_object_or_404(
+            CustomUser, pk=pk, user_type=CustomUser.UserType.ADMIN
+        )
+        cursor = request.GET.get("cursor")
+        if cursor:
+            try:
+                cursor = decode_cursor(cursor, PICKER_ORDERING, CustomUser)
+            except ValueError:
+                raise Http404("Invalid cursor")
+        users, next_cursor = picker_page(
+            admin,
+            assigned=request.GET.get("assigned") == "1",
+            query=request.GET.get("q", "").strip(),
+            cursor=cursor,
+            page_size=settings.USER_PICKER_PAGE_SIZE,
+        )
+        return JsonResponse({"results": list(users), "next": next_cursor})
 
-class UserDeleteView(SuperAdminRequiredMixin, DeleteView):
+
+class BackgroundDeleteMixin(AcceptedResponseMixin):
+    """
+    Hand the delete to ``tm_app.deletion`` instead of one cascading
+    collector pass; the user is deactivated at once and removed in chunks.
+    """
+
+    def form_valid(self, form):
+        deletion = request_deletion(self.object, requested_by=self.request.user)
+        return self.accepted(
+            reverse("user-deletion", args=[deletion.pk]),
+            f"Deleting {deletion.username}; they will disappear once their "
+            "tasks are removed.",
+            self.get_success_url(),
+            deletion=deletion.pk,
+            status=deletion.status,
+        )
+
+
+class UserDeleteView(SuperAdminRequiredMixin, BackgroundDeleteMixin, DeleteView):
     model = CustomUser
     template_name = "admin/delete_user_confirm.html"
 
@@ -152,9 +322,30 @@ class UserDeleteView(SuperAdminRequiredMixin, DeleteView):
         return reverse_lazy("manage-users")
 
 
-class AdminDeleteView(SuperAdminRequiredMixin, DeleteView):
+class AdminDeleteView(SuperAdminRequiredMixin, BackgroundDeleteMixin, DeleteView):
     model = CustomUser
     template_name = "admin/delete_admin_confirm.html"
 
     def get_success_url(self):
         return reverse_lazy("manage-admins")
+
+
+class UserDeletionStatusView(SuperAdminRequiredMixin, View):
+    """Progress of a background user delete, for polling."""
+
+    def get(self, request, pk):
+        deletion = get_object_or_404(UserDeletion, pk=pk)
+        return JsonResponse(
+            {
+                "id": deletion.pk,
+                "user_id": deletion.user_id,
+                "username": deletion.username,
+                "status": deletion.status,
+                "progress": deletion.progress,
+                "total_tasks": deletion.total_tasks,
+                "deleted_tasks": deletion.deleted_tasks,
+                "total_users": deletion.total_users,
+                "released_users": deletion.released_users,
+                "error": deletion.error,
+            }
+        )
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -7,17 +9,32 @@ from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 
-from ..mixins import NoAuthMixin
-from ..models import Task
+from ..mixins import ConditionalGetMixin, NoAuthMixin, ReplicaReadMixin
+from ..models import ArchivedTask, Task
+from ..pagination import TaskCursorPagination, TaskSearchPagination
 from ..permissions import IsSuperUserAssignedUserOrAdminOfAssignedUser
+from ..scopes import get_role_scope
+from ..search import search_tasks, search_terms
+from ..sync import (
+    SYNC_VERSION_HEADER,
+    changes_since,
+    current_version,
+    list_marker,
+)
 from ..serializers import (
+    ArchivedTaskSerializer,
     LoginSerializer,
+    TaskBulkCreateSerializer,
+    TaskBulkPatchSerializer,
     TaskReportSerializer,
     TaskSerializer,
+    TaskValuesSerializer,
     TokenSerializer,
     UserSerializer,
+    parse_fields,
+    task_field_names,
 )
 
 
@@ -65,10 +82,11 @@ class LoginView(NoAuthMixin, GenericAPIView):
 
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TaskCursorPagination
 
     def get_object(self):
         queryset = self.filter_queryset(self.get_queryset())
@@ -78,10 +96,112 @@ class TaskViewSet(viewsets.ModelViewSet):
 
 
     def get_queryset(self):
-        if self.action in ["list", "retrieve", "update"]:
+        if self.action in ["list", "retrieve", "update", "partial_update"]:
             return Task.objects.filter(assigned_to=self.request.user)
         return Task.objects.all()
 
+    def get_change_marker(self):
+        if self.action == "list":
+            if self.is_scoped_sync():
+                # The marker only covers the requester's own list.
+                return None
+            return list_marker(self.request.user.pk)
+        if self.action in ("retrieve", "report"):
+            task = get_object_or_404(
+                self.get_queryset().only("assigned_to_id", "version", "updated_at"),
+                pk=self.kwargs.get("pk"),
+            )
+            self.check_object_permissions(self.request, task)
+            return task.version, task.updated_at
+        return None
+
+    def get_sparse_fields(self):
+        """The ``?fields=`` subset to render, or ``None`` for every field."""
+        fields = self.request.query_params.get("fields")
+        return parse_fields(fields, task_field_names())
+
+    def paginate_values(self, queryset, paginator):
+        """
+        One page of ``queryset`` rendered by ``TaskValuesSerializer``,
+        skipping model instances on the hottest read paths.
+        """
+        serializer = TaskValuesSerializer(self.get_sparse_fields())
+        page = paginator.paginate_queryset(
+            serializer.values(queryset, *paginator.ordering), self.request, view=self
+        )
+        return paginator.get_paginated_response(serializer.serialize(page))
+
+    def list(self, request, *args, **kwargs):
+        if "since" in request.query_params:
+            return self.conditional_get(self.sync, request)
+        return self.conditional_get(self.list_values)
+
+    def list_values(self):
+        # Read before the rows, so no write can fall between the two.
+        version = current_version()
+        queryset = self.filter_queryset(self.get_queryset())
+        response = self.paginate_values(queryset, self.paginator)
+        first_page = self.paginator.cursor_query_param not in self.request.query_params
+        # A delta sync covers the role's tasks; only advertise a starting
+        # version when that is the same set as this list.
+        if first_page and not self.is_role_scoped():
+            response[SYNC_VERSION_HEADER] = version
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(self.retrieve_task)
+
+    def retrieve_task(self):
+        serializer = self.get_serializer(
+            self.get_object(), fields=self.get_sparse_fields()
+        )
+        return Response(serializer.data)
+
+    def is_role_scoped(self):
+        """Whether the role covers other tasks than the requester's own."""
+        return get_role_scope(self.request).user_ids != {self.request.user.pk}
+
+    def is_scoped_sync(self):
+        """Whether this delta sync covers more than the requester's tasks."""
+        return "since" in self.request.query_params and self.is_role_scoped()
+
+    def sync(self, request):
+        """
+        Delta sync: tasks written and ids removed since the ``since`` version,
+        over every task the requester's role covers, so admins can catch up
+        on the event stream too. Clients pass back the returned ``version``
+        on their next poll; they start from ``since=0`` or, for users, the
+        version header of a full list.
+        """
+        try:
+            since = int(request.query_params["since"])
+        except ValueError:
+            raise ValidationError({"since": ["A valid integer is required."]})
+
+        scope = get_role_scope(request)
+        changes = changes_since(
+            scope.filter_tasks(Task.objects.all()),
+            scope,
+            since,
+            self.paginator.get_page_size(request),
+        )
+        if changes is None:
+            return Response(
+                {"detail": "Sync cursor expired; start over from since=0."},
+                status=status.HTTP_410_GONE,
+            )
+        changed, deleted, version, has_more = changes
+        return Response(
+            {
+                "version": version,
+                "has_more": has_more,
+                "changed": self.get_serializer(
+                    changed, many=True, fields=self.get_sparse_fields()
+                ).data,
+                "deleted": deleted,
+            }
+        )
+
     def update(self, request, *args, **kwargs):
         kwargs["partial"] = True
         return super().update(request, *args, **kwargs)
@@ -108,6 +228,120 @@ class TaskViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated, IsSuperUserAssignedUserOrAdminOfAssignedUser],
     )
     def report(self, request, pk=None):
+        return self.conditional_get(self.render_report)
+
+    def render_report(self):
         task = self.get_object()
         serializer = TaskReportSerializer(task)
         return Response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        """
+        Ranked full-text matches for ``q`` over title, description and
+        completion report, among the tasks the requester's role can see.
+        """
+        query = request.query_params.get("q", "")
+        if not search_terms(query):
+            raise ValidationError({"q": ["Enter at least one word to search for."]})
+
+        tasks = search_tasks(
+            get_role_scope(request).filter_tasks(Task.objects.all()), query
+        )
+        return self.paginate_values(tasks, TaskSearchPagination())
+
+    def get_archived_tasks(self):
+        return get_role_scope(self.request).filter_tasks(ArchivedTask.objects.all())
+
+    @action(detail=False, methods=["get"], url_path="archive")
+    def archive(self, request):
+        """Archived tasks the requester's role can see, oldest due first."""
+        paginator = TaskCursorPagination()
+        page = paginator.paginate_queryset(
+            self.get_archived_tasks(), request, view=self
+        )
+        return paginator.get_paginated_response(
+            ArchivedTaskSerializer(page, many=True).data
+        )
+
+    @action(
+        detail=False, methods=["get"], url_path=r"archive/(?P<archived_pk>[0-9]+)"
+    )
+    def archived_task(self, request, archived_pk=None):
+        task = get_object_or_404(self.get_archived_tasks(), pk=archived_pk)
+        return Response(ArchivedTaskSerializer(task).data)
+
+    def get_assignable_users(self):
+        return get_role_scope(self.request).filter_users(
+            CustomUser.objects.filter(user_type=CustomUser.UserType.USER)
+        )
+
+    def get_bulk_items(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of items."]})
+        if len(items) > settings.TASK_BULK_MAX_ITEMS:
+            raise ValidationError(
+                {
+                    "non_field_errors": [
+                        f"At most {settings.TASK_BULK_MAX_ITEMS} items per request."
+                    ]
+                }
+            )
+        return items
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request):
+        items = self.get_bulk_items(request)
+        serializer = TaskBulkCreateSerializer(
+            data=items,
+            many=True,
+            context={
+                **self.get_serializer_context(),
+                "assignable_user_ids": set(
+                    self.get_assignable_users().values_list("pk", flat=True)
+                ),
+            },
+        )
+        serializer.is_valid(raise_exception=True)
+
+        tasks = []
+        for item in serializer.validated_data:
+            item["assigned_to_id"] = item.pop("assigned_to")
+            tasks.append(Task(**item))
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create(tasks)
+        return Response(
+            TaskSerializer(tasks, many=True).data, status=status.HTTP_201_CREATED
+        )
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        items = self.get_bulk_items(request)
+        ids = [item.get("id") for item in items if isinstance(item, dict)]
+        tasks = get_role_scope(request).filter_tasks(
+            Task.objects.filter(pk__in=[pk for pk in ids if isinstance(pk, int)])
+        )
+        tasks = {task.pk: task for task in tasks}
+
+        serializer = TaskBulkPatchSerializer(
+            data=items,
+            many=True,
+            context={**self.get_serializer_context(), "tasks": tasks},
+        )
+        serializer.is_valid(raise_exception=True)
+
+        updated, fields = [], set()
+        for patch in serializer.validated_data:
+            task = tasks[patch.pop("id")]
+            for field, value in patch.items():
+                setattr(task, field, value)
+            fields.update(patch)
+            updated.append(task)
+        if fields:
+            with transaction.atomic():
+                Task.objects.bulk_update(updated, sorted(fields), batch_size=500)
+                # The update stamps version and updated_at in SQL; read them back.
+                fresh = Task.objects.in_bulk([task.pk for task in updated])
+            updated = [fresh[task.pk] for task in updated]
+        return Response(TaskSerializer(updated, many=True).data)
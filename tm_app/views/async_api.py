@@ -0,0 +1,241 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    PermissionDenied,
+    ValidationError,
+)
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from ..authentication import aauthenticate
+from ..mixins import (
+    ReplicaReadMixin,
+    add_validators,
+    change_etag,
+    not_modified_response,
+)
+from ..models import Task
+from ..pagination import TaskCursorPagination
+from ..scopes import aget_role_scope
+from ..serializers import (
+    TaskReportSerializer,
+    TaskSerializer,
+    TaskValuesSerializer,
+    completion_errors,
+    parse_fields,
+    task_field_names,
+)
+from ..sync import SYNC_VERSION_HEADER, acurrent_version, alist_marker
+from .api import TaskViewSet
+
+# The async views only render JSON, so their ETags name that media type.
+MEDIA_TYPE = "application/json"
+
+TASK_NOT_FOUND = "No Task matches the given query."
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncAPIView(View):
+    """
+    Base for async JSON endpoints that mirror a DRF view. Authentication,
+    permission checks and queries all run in the event loop with the async
+    ORM; errors are rendered the way DRF renders them. Requests the async
+    handlers do not cover (other methods, or ``use_fallback``) are handed to
+    ``fallback_view``, a sync DRF view run in a worker thread.
+    """
+
+    fallback_view = None
+    parser_classes = (JSONParser, FormParser, MultiPartParser)
+
+    def use_fallback(self, request):
+        return False
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None)
+        if (
+            method not in self.http_method_names
+            or handler is None
+            or self.use_fallback(request)
+        ):
+            return await sync_to_async(self.fallback_view)(request, *args, **kwargs)
+
+        try:
+            result = await aauthenticate(request)
+            if result is None:
+                raise NotAuthenticated()
+            self.request = Request(
+                request, parsers=[parser() for parser in self.parser_classes]
+            )
+            self.request.user = result[0]
+            return await handler(self.request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(exc)
+
+    def render(self, data, status=200, headers=None):
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        response = HttpResponse(
+            renderer.render(data, MEDIA_TYPE),
+            status=status,
+            content_type=MEDIA_TYPE,
+            headers=headers,
+        )
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    def handle_exception(self, exc):
+        response = exception_handler(exc, {"view": self, "request": None})
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name != "Content-Type"
+        }
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            # As APIView does: 401 with a challenge, or 403 without one.
+            authenticator = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+            challenge = authenticator.authenticate_header(None)
+            if challenge:
+                headers["WWW-Authenticate"] = challenge
+            else:
+                response.status_code = 403
+        return self.render(response.data, response.status_code, headers)
+
+    def conditional(self, request, version, last_modified, render):
+        """
+        Answer from ``(version, last_modified)`` with a 304 when the client
+        is current, otherwise with ``render()``, plus the validators.
+        """
+        etag = change_etag(request, version, MEDIA_TYPE)
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = render()
+        return add_validators(response, etag, last_modified)
+
+    def get_sparse_fields(self, request):
+        return parse_fields(request.query_params.get("fields"), task_field_names())
+
+
+class TaskListAsyncView(ReplicaReadMixin, AsyncAPIView):
+    """``GET /api/tasks/`` for the requester's own tasks."""
+
+    fallback_view = staticmethod(
+        TaskViewSet.as_view({"get": "list", "post": "create"})
+    )
+
+    def use_fallback(self, request):
+        # Delta sync is rare and serializes instances; leave it to the viewset.
+        return "since" in request.GET
+
+    async def get(self, request):
+        version, last_modified = await alist_marker(request.user.pk)
+        etag = change_etag(request, version, MEDIA_TYPE)
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = await self.list_page(request)
+        return add_validators(response, etag, last_modified)
+
+    async def list_page(self, request):
+        version = await acurrent_version()
+        serializer = TaskValuesSerializer(self.get_sparse_fields(request))
+        paginator = TaskCursorPagination()
+        queryset = serializer.values(
+            Task.objects.filter(assigned_to=request.user), *paginator.ordering
+        )
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+        response = self.render(
+            paginator.get_paginated_data(serializer.serialize(page))
+        )
+        if paginator.cursor_query_param not in request.query_params:
+            # As TaskViewSet.list_values: only when a sync covers this list.
+            scope = await aget_role_scope(request)
+            if scope.user_ids == {request.user.pk}:
+                response[SYNC_VERSION_HEADER] = version
+        return response
+
+
+class TaskDetailAsyncView(ReplicaReadMixin, AsyncAPIView):
+    """``GET``/``PATCH /api/tasks/<pk>/`` for one of the requester's tasks."""
+
+    fallback_view = staticmethod(
+        TaskViewSet.as_view(
+            {
+                "get": "retrieve",
+                "put": "update",
+                "patch": "partial_update",
+                "delete": "destroy",
+            }
+        )
+    )
+
+    def get_queryset(self, request):
+        return Task.objects.filter(assigned_to=request.user)
+
+    async def get(self, request, pk):
+        serializer = TaskValuesSerializer(self.get_sparse_fields(request))
+        queryset = serializer.values(
+            self.get_queryset(request), "version", "updated_at"
+        )
+        try:
+            row = await queryset.aget(pk=pk)
+        except Task.DoesNotExist:
+            raise NotFound(TASK_NOT_FOUND)
+        return self.conditional(
+            request,
+            row["version"],
+            row["updated_at"],
+            lambda: self.render(serializer.to_representation(row)),
+        )
+
+    async def patch(self, request, pk):
+        try:
+            task = await self.get_queryset(request).aget(pk=pk)
+        except Task.DoesNotExist:
+            raise NotFound(TASK_NOT_FOUND)
+        serializer = TaskSerializer(task, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        errors = completion_errors(data.get("status", task.status), data)
+        if errors:
+            raise ValidationError(errors)
+
+        for name, value in data.items():
+            setattr(task, name, value)
+        await task.asave()
+        return self.render(TaskSerializer(task).data)
+
+
+class TaskReportAsyncView(ReplicaReadMixin, AsyncAPIView):
+    """``GET /api/tasks/<pk>/report/`` for anyone whose role covers the task."""
+
+    fallback_view = staticmethod(TaskViewSet.as_view({"get": "report"}))
+
+    async def get(self, request, pk):
+        try:
+            task = await Task.objects.only(
+                "assigned_to_id",
+                "version",
+                "updated_at",
+                *TaskReportSerializer.Meta.fields,
+            ).aget(pk=pk)
+        except Task.DoesNotExist:
+            raise NotFound(TASK_NOT_FOUND)
+        if task.assigned_to_id != request.user.pk:
+            scope = await aget_role_scope(request)
+            if not scope.allows(task.assigned_to_id):
+                raise PermissionDenied()
+        return self.conditional(
+            request,
+            task.version,
+            task.updated_at,
+            lambda: self.render(TaskReportSerializer(task).data),
+        )
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import APIException
+
+from ..authentication import aauthenticate
+from ..events import OVERFLOW, get_broker
+from ..scopes import aget_role_scope
+
+
+async def _authenticate(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+    try:
+        result = await aauthenticate(request)
+    except APIException:
+        return None
+    return result[0] if result else None
+
+
+def visible_event(event, scope):
+    """A task moved out of the listener's scope reads as deleted to them."""
+    task = event["task"]
+    if scope.allows(task["assigned_to"]):
+        return event
+    return {**event, "type": "deleted", "task": {"id": task["id"]}}
+
+
+def format_event(event):
+    data = json.dumps(event["task"], cls=DjangoJSONEncoder, separators=(",", ":"))
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+async def stream_events(scope):
+    subscription = get_broker().subscribe(
+        scope.user_ids, maxsize=settings.TASK_EVENT_QUEUE_SIZE
+    )
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(), settings.TASK_EVENT_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is OVERFLOW:
+                yield "event: resync\ndata: {}\n\n"
+                return
+            yield format_event(visible_event(event, scope))
+    finally:
+        subscription.close()
+
+
+async def task_events(request):
+    """
+    Stream task create/update/delete events the requester may see as
+    server-sent events. Event ids are task versions, so a client that
+    reconnects (or receives ``resync``) catches up with
+    ``/api/tasks/?since=<id>``, which covers the same role scope.
+    """
+    if isinstance(request, WSGIRequest):
+        return JsonResponse(
+            {"detail": "The event stream is only served over ASGI."}, status=501
+        )
+    user = await _authenticate(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+    request.user = user
+    scope = await aget_role_scope(request)
+
+    response = StreamingHttpResponse(
+        stream_events(scope), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.generic import View
+
+from ..jobs import describe, result_storage
+from ..mixins import Admin_or_SuperAdminRequiredMixin
+from ..models import Job
+
+CustomUser = get_user_model()
+
+
+class JobMixin(Admin_or_SuperAdminRequiredMixin):
+    """Jobs the requester queued; a superadmin sees everyone's."""
+
+    def get_job(self, pk):
+        jobs = Job.objects.all()
+        if self.request.user.user_type != CustomUser.UserType.SUPERADMIN:
+            jobs = jobs.filter(requested_by=self.request.user)
+        return get_object_or_404(jobs, pk=pk)
+
+
+class JobStatusView(JobMixin, View):
+    """Status and result of a background job, for polling."""
+
+    def get(self, request, pk):
+        job = self.get_job(pk)
+        data = describe(job)
+        if job.status == Job.Status.DONE and "file" in (job.result or {}):
+            data["download_url"] = reverse("job-download", args=[job.pk])
+        return JsonResponse(data)
+
+
+class JobDownloadView(JobMixin, View):
+    """The file a finished job produced, e.g. a task report export."""
+
+    def get(self, request, pk):
+        job = self.get_job(pk)
+        result = job.result or {}
+        name = result.get("file")
+        storage = result_storage()
+        if job.status != Job.Status.DONE or not name or not storage.exists(name):
+            raise Http404("This job has no file to download.")
+        return FileResponse(
+            storage.open(name, "rb"),
+            as_attachment=True,
+            filename=result.get("filename"),
+            content_type=result.get("content_type"),
+        )
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views import View
+
+from ..metrics import get_registry
+from ..mixins import SuperAdminRequiredMixin
+
+
+class MetricsView(SuperAdminRequiredMixin, View):
+    """
+    Request metrics in the Prometheus text format, for SuperAdmins or
+    scrapers sending ``Authorization: Bearer <METRICS_TOKEN>``.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if not settings.METRICS_ENABLED:
+            raise Http404
+        if self.has_token(request):
+            return View.dispatch(self, request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    def has_token(self, request):
+        token = settings.METRICS_TOKEN
+        return bool(token) and constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        )
+
+    def get(self, request):
+        return HttpResponse(
+            get_registry().render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
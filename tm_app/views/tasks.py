@@ -1,16 +1,27 @@
+import csv
+import json
+import tempfile
+
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.http import HttpRequest, QueryDict, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView, DeleteView, ListView
 from django.views.generic.edit import UpdateView
 
-from tm_app.forms import TaskUpdateForm
+from tm_app.forms import TaskFilterForm, TaskReportFilterForm, TaskUpdateForm
 
+from ..jobs import enqueue, result_storage
 from ..models import Task
+from ..scopes import get_role_scope
+from ..stats import task_summary
 
 CustomUser = get_user_model()
-from ..mixins import Admin_or_SuperAdminRequiredMixin
+from ..mixins import (AcceptedResponseMixin, Admin_or_SuperAdminRequiredMixin,
+                      FilterFormMixin, KeysetPaginationMixin, ReplicaReadMixin)
 
 
 class TaskCreateView(Admin_or_SuperAdminRequiredMixin, CreateView):
@@ -31,9 +42,9 @@ class TaskCreateView(Admin_or_SuperAdminRequiredMixin, CreateView):
                 field.widget.input_type = "date"
 
         if self.request.user.user_type == CustomUser.UserType.ADMIN:
-            form.fields["assigned_to"].queryset = CustomUser.objects.filter(
-                assigned_admin=self.request.user
-            )
+            form.fields["assigned_to"].queryset = get_role_scope(
+                self.request
+            ).filter_users(CustomUser.objects.all())
 
         return form
 
@@ -41,23 +52,26 @@ class TaskCreateView(Admin_or_SuperAdminRequiredMixin, CreateView):
         return reverse_lazy("user-tasks", kwargs={"pk": self.object.assigned_to.id})
 
 
-class AllTasksView(Admin_or_SuperAdminRequiredMixin, ListView):
+class AllTasksView(
+    ReplicaReadMixin,
+    Admin_or_SuperAdminRequiredMixin,
+    FilterFormMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     model = Task
     template_name = "tasks/all_tasks.html"
     context_object_name = "tasks"
+    filter_form_class = TaskFilterForm
+    keyset_ordering = ("due_date", "id")
 
     def get_queryset(self):
-        user = self.request.user
-
-        if user.user_type == CustomUser.UserType.ADMIN:
-            managed_users = CustomUser.objects.filter(assigned_admin=user)
-            return Task.objects.filter(assigned_to__in=managed_users)
-
-        elif user.user_type == CustomUser.UserType.USER:
-            return Task.objects.filter(assigned_to=user)
-
-        else:
-            return Task.objects.all()
+        queryset = self.filter_queryset(
+            Task.objects.select_related("assigned_to").only(
+                "title", "description", "due_date", "status", "assigned_to__username"
+            )
+        )
+        return get_role_scope(self.request).filter_tasks(queryset)
 
 
 class UserTasksView(Admin_or_SuperAdminRequiredMixin, ListView):
@@ -66,8 +80,13 @@ class UserTasksView(Admin_or_SuperAdminRequiredMixin, ListView):
     context_object_name = "tasks"
 
     def get_queryset(self):
-        self.user = get_object_or_404(CustomUser, id=self.kwargs["pk"])
-        return Task.objects.filter(assigned_to=self.user)
+        self.user = get_object_or_404(
+            get_role_scope(self.request).filter_users(CustomUser.objects.all()),
+            id=self.kwargs["pk"],
+        )
+        return Task.objects.filter(assigned_to=self.user).defer(
+            "completion_report", "worked_hours"
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -81,6 +100,9 @@ class TaskUpdateView(Admin_or_SuperAdminRequiredMixin, UpdateView):
     form_class = TaskUpdateForm
     template_name = "tasks/edit_task.html"
 
+    def get_queryset(self):
+        return get_role_scope(self.request).filter_tasks(Task.objects.all())
+
     def get_form(self, form_class=None):
         form = super().get_form(form_class)
         for field in form.fields.values():
@@ -98,20 +120,151 @@ class TaskDeleteView(Admin_or_SuperAdminRequiredMixin, DeleteView):
     model = Task
     template_name = "tasks/delete_task.html"
 
+    def get_queryset(self):
+        return get_role_scope(self.request).filter_tasks(Task.objects.all())
+
     def get_success_url(self):
         return reverse_lazy("user-tasks", kwargs={"pk": self.object.assigned_to.id})
 
 
-class TaskReportView(Admin_or_SuperAdminRequiredMixin, ListView):
+class TaskReportView(
+    ReplicaReadMixin,
+    Admin_or_SuperAdminRequiredMixin,
+    FilterFormMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     model = Task
     template_name = "tasks/task_report.html"
     context_object_name = "tasks"
+    filter_form_class = TaskReportFilterForm
+    keyset_ordering = ("due_date", "id")
 
     def get_queryset(self):
-        user = self.request.user
-        if user.user_type == CustomUser.UserType.ADMIN:
-            managed_users = CustomUser.objects.filter(assigned_admin=user)
-            return Task.objects.filter(
-                status="completed", assigned_to__in=managed_users
+        queryset = self.filter_queryset(
+            Task.objects.select_related("assigned_to").only(
+                "title",
+                "description",
+                "due_date",
+                "status",
+                "completion_report",
+                "worked_hours",
+                "assigned_to__username",
             )
-        return Task.objects.filter(status="completed")
+        )
+        return get_role_scope(self.request).filter_tasks(
+            queryset.filter(status="completed")
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["task_summary"] = task_summary(get_role_scope(self.request).users())
+        return context
+
+
+class Echo:
+    """File-like object whose ``write`` hands the row back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+class TaskReportExportView(AcceptedResponseMixin, TaskReportView):
+    """
+    Stream the completed-task report as CSV or NDJSON.
+
+    Uses the same role scoping and filters as ``TaskReportView``; rows are
+    read with a chunked ``iterator()`` so memory stays flat however many
+    tasks are exported. POST writes the same export to a file as a job.
+    """
+
+    export_fields = (
+        "id",
+        "title",
+        "assigned_to__username",
+        "due_date",
+        "worked_hours",
+        "completion_report",
+    )
+    export_headers = (
+        "id",
+        "title",
+        "assigned_to",
+        "due_date",
+        "worked_hours",
+        "completion_report",
+    )
+
+    def get(self, request, *args, **kwargs):
+        export_format, content_type, content = self.export()
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="task-report.{export_format}"'
+        )
+        return response
+
+    def post(self, request, *args, **kwargs):
+        """Generate the export as a job, for reports too large to stream."""
+        job = enqueue(
+            "export_task_report",
+            {"user_id": request.user.pk, "query": request.GET.urlencode()},
+            requested_by=request.user,
+        )
+        download_url = reverse("job-download", args=[job.pk])
+        return self.job_accepted(
+            job,
+            "The report is being generated; download it from "
+            f"{download_url} once it is ready.",
+            f"{reverse('task-report')}?{request.GET.urlencode()}",
+        )
+
+    def export(self):
+        """``(format, content_type, chunks)`` of the report, per ``?format=``."""
+        export_format = self.request.GET.get("format", "csv")
+        rows = (
+            self.get_queryset()
+            .order_by("due_date", "id")
+            .values_list(*self.export_fields)
+            .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        )
+        if export_format == "ndjson":
+            return "ndjson", "application/x-ndjson", self.ndjson_rows(rows)
+        return "csv", "text/csv", self.csv_rows(rows)
+
+    def csv_rows(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.export_headers)
+        for row in rows:
+            yield writer.writerow(row)
+
+    def ndjson_rows(self, rows):
+        for row in rows:
+            yield json.dumps(dict(zip(self.export_headers, row)), default=str) + "\n"
+
+
+def export_task_report_job(job):
+    """
+    Write the export ``TaskReportExportView.post`` queued to the job result
+    storage, with the requester's role scope and filters at run time.
+    """
+    request = HttpRequest()
+    request.user = CustomUser.objects.get(pk=job.payload["user_id"])
+    request.GET = QueryDict(job.payload["query"])
+    view = TaskReportExportView()
+    view.setup(request)
+    export_format, content_type, content = view.export()
+
+    storage = result_storage()
+    name = f"task-reports/{job.pk}.{export_format}"
+    # A retry starts over rather than appending to a partial file.
+    storage.delete(name)
+    with tempfile.TemporaryFile() as buffer:
+        for chunk in content:
+            buffer.write(chunk.encode())
+        buffer.seek(0)
+        name = storage.save(name, File(buffer))
+    return {
+        "file": name,
+        "filename": f"task-report.{export_format}",
+        "content_type": content_type,
+    }